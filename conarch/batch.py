@@ -0,0 +1,177 @@
+from conarch.multi_pattern import MultiPatternMatcher
+from conarch.sound import Sound
+from conarch.sound_helpers import CompiledSoundChange, copy_sequence, replace_flat_matches
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it every stem goes through CompiledSoundChange.apply
+    np = None
+
+
+def can_batch(sound_change: CompiledSoundChange) -> bool:
+    """Return whether a compiled sound change can be applied by the batch
+    engine.
+
+    Old sounds containing None (insertions) are matched by position rather
+    than by Sound, so they are left to CompiledSoundChange.apply.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :return: Whether apply_sound_change_to_stems will vectorize it.
+    :rtype: bool
+    """
+    if np is None:
+        return False
+    return all(kind != CompiledSoundChange.MATCH_NONE for kind, _ in sound_change.pattern)
+
+
+def apply_sound_change_to_stems(stems: 'list[list[list[Sound]]]', sound_change) -> 'list[list[list[Sound]]]':
+    """Apply one sound change to many stems at once.
+
+    The stems are packed into one padded matrix of sound ids, with id 0
+    standing for the word boundary on either side of every stem. Each
+    element of the old sounds and each step of the condition becomes a
+    lookup table indexed by sound id, so finding every possible match in
+    every stem takes a few whole-matrix operations. Only the positions
+    where a match starts are then walked in Python, following the same
+    rules as change_sounds (a failed partial match is never retried from
+    its second Sound).
+
+    The result is always the same as applying the sound change to each
+    stem with change_sounds. Stems the batch engine cannot handle exactly,
+    namely stems with an empty syllable under a conditioned sound change
+    and any stem when the old sounds contain None or numpy is not
+    installed, are converted one at a time instead. A Multi Pattern
+    Matcher is applied to each stem in turn.
+
+    :param stems: The stems to convert. They are not modified.
+    :type stems: list[list[list[Sound]]]
+    :param sound_change: The sound change to apply.
+    :type sound_change: SoundChangeRule | CompiledSoundChange | MultiPatternMatcher
+    :return: The converted stems, in the same order.
+    :rtype: list[list[list[Sound]]]
+    """
+    if isinstance(sound_change, MultiPatternMatcher):
+        return [sound_change.apply(stem) for stem in stems]
+    if not isinstance(sound_change, CompiledSoundChange):
+        sound_change = sound_change.compile()
+    if not can_batch(sound_change):
+        return [sound_change.apply(stem) for stem in stems]
+    condition = sound_change.get_condition()
+    new_stems = [None] * len(stems)
+    rows = list()
+    for k, stem in enumerate(stems):
+        if condition is not None and any(len(syllable) == 0 for syllable in stem):
+            new_stems[k] = sound_change.apply(stem)  # conditions treat empty syllables as boundaries
+        else:
+            rows.append(k)
+    if not rows:
+        return new_stems
+
+    # give every distinct Sound object an id; 0 is the boundary
+    sound_ids = dict()  # [id(sound)] = sound id
+    sounds = [None]
+    flat_rows = list()
+    for k in rows:
+        flat_row = list()
+        for syllable in stems[k]:
+            for sound in syllable:
+                sound_id = sound_ids.get(id(sound))
+                if sound_id is None:
+                    sound_id = len(sounds)
+                    sound_ids[id(sound)] = sound_id
+                    sounds.append(sound)
+                flat_row.append(sound_id)
+        flat_rows.append(flat_row)
+
+    # pack the stems into a matrix with enough boundary padding for the pattern and the condition
+    pattern_length = len(sound_change.pattern)
+    padding = 1
+    if condition is not None:
+        padding = max([padding] + [abs(offset) for _, offset, _, _, _ in condition.steps])
+    width = max(len(flat_row) for flat_row in flat_rows)
+    lengths = np.array([len(flat_row) for flat_row in flat_rows])
+    matrix = np.zeros((len(rows), padding + width + pattern_length + padding), dtype=np.int32)
+    for r, flat_row in enumerate(flat_rows):
+        matrix[r, padding:padding + len(flat_row)] = flat_row
+
+    # longest prefix of the old sounds matched starting at every position
+    alive = np.ones((len(rows), width), dtype=bool)
+    prefix_lengths = np.zeros((len(rows), width), dtype=np.int32)
+    for k in range(pattern_length):
+        element_table = np.array([False] + [sound_change.element_matches(k, sound) for sound in sounds[1:]])
+        alive &= element_table[matrix[:, padding + k:padding + k + width]]
+        prefix_lengths += alive
+    match_rows, match_columns = np.nonzero(prefix_lengths)
+    match_prefix_lengths = prefix_lengths[match_rows, match_columns]
+
+    # evaluate the condition at every full match at once
+    passed = match_prefix_lengths == pattern_length
+    if condition is not None:
+        for (after, offset, category, step_sound, inverted), boundary_match in zip(condition.steps,
+                                                                                    condition.boundary_matches):
+            if category is not None:
+                step_table = [category in sound.phonotactics_categories for sound in sounds[1:]]
+            else:
+                step_table = [step_sound == sound for sound in sounds[1:]]
+            step_table = np.array([boundary_match] + step_table)
+            anchors = match_columns + (pattern_length - 1 if after else 0) + offset
+            passed &= step_table[matrix[match_rows, padding + anchors]] != inverted
+
+    # walk the match positions of each stem in order, skipping those consumed by an earlier match
+    replacements = dict()  # [row] = list of start positions of matches to replace
+    next_positions = [0] * len(rows)
+    for r, column, prefix_length, match_passed in zip(match_rows.tolist(), match_columns.tolist(),
+                                                      match_prefix_lengths.tolist(), passed.tolist()):
+        if column < next_positions[r] or column >= lengths[r]:
+            continue
+        if prefix_length == pattern_length:
+            next_positions[r] = column + pattern_length
+            if match_passed:
+                replacements.setdefault(r, list()).append(column)
+        else:  # partial match: the Sound that failed to match is consumed as well
+            next_positions[r] = column + prefix_length + 1
+
+    replacement = list(sound_change.replacement) if sound_change.replacement is not None else list()
+    for r, k in enumerate(rows):
+        if r in replacements:
+            new_stems[k] = replace_flat_matches(stems[k], replacements[r], pattern_length, replacement)
+        else:
+            new_stems[k] = copy_sequence(stems[k])
+    return new_stems
+
+
+def evolve_stems(stems: 'list[list[list[Sound]]]', sound_change_lists: 'list[list]') -> 'list[list[list[Sound]]]':
+    """Apply a separate list of sound changes to each of many stems.
+
+    Every stem advances through its own list in order, but stems that are
+    waiting on the same sound change (usually a change of the whole
+    Language) are converted together by apply_sound_change_to_stems.
+
+    :param stems: The stems to convert. They are not modified.
+    :type stems: list[list[list[Sound]]]
+    :param sound_change_lists: One list of Sound Change Rules per stem.
+    Runs of them may be given as Multi Pattern Matchers, which are
+    shared the same way.
+    :type sound_change_lists: list[list[SoundChangeRule | MultiPatternMatcher]]
+    :return: The converted stems, in the same order.
+    :rtype: list[list[list[Sound]]]
+    """
+    stems = [copy_sequence(stem) for stem in stems]
+    positions = [0] * len(stems)
+    waiting = dict()  # [id(sound change)] = (sound change, indices of stems waiting on it)
+    for k, sound_changes in enumerate(sound_change_lists):
+        if sound_changes:
+            waiting.setdefault(id(sound_changes[0]), (sound_changes[0], list()))[1].append(k)
+    while waiting:
+        # the sound change with the most stems waiting on it goes first; each stem keeps its own order
+        key = max(waiting, key=lambda sound_change_id: len(waiting[sound_change_id][1]))
+        sound_change, indices = waiting.pop(key)
+        new_stems = apply_sound_change_to_stems([stems[k] for k in indices], sound_change)
+        for k, new_stem in zip(indices, new_stems):
+            stems[k] = new_stem
+            positions[k] = positions[k] + 1
+            if positions[k] < len(sound_change_lists[k]):
+                next_sound_change = sound_change_lists[k][positions[k]]
+                waiting.setdefault(id(next_sound_change), (next_sound_change, list()))[1].append(k)
+    return stems
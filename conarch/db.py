@@ -3,6 +3,7 @@ import sqlite3
 from conarch.sound import Sound
 from conarch.word import Word
 from conarch.sound_change_rule import SoundChangeRule
+from conarch.sound_change_timeline import SoundChangeTimeline
 from conarch.language import Language
 from conarch.word_form_rule import WordFormRule
 import os
@@ -885,7 +886,7 @@ def update_word_form_rule(word_form_rule, refresh_sound_change_rules=True):
 
 def reload_language(language):  # TODO possibly out of date with fetch_langauge (merge the code somehow?)
     log('Entering reload_language', 1)
-    language.sound_changes = []
+    language.sound_changes = SoundChangeTimeline()
     language.words = []
     con = get_connection()
     cur = con.cursor()
@@ -0,0 +1,91 @@
+from bisect import bisect_right, insort
+
+
+class DefinitionTimeline(dict):
+    """The definitions of a Word, keyed by the language stage they were
+    given at.
+
+    Behaves exactly like the dict it replaces, including keeping
+    definitions in the order they were added, but also keeps its stages
+    sorted so the definition in effect at any stage is found by binary
+    search rather than by counting down one stage at a time.
+    """
+
+    def __init__(self, definitions: 'dict[int, str] | None' = None):
+        super().__init__()
+        self._stages = list()  # every key, sorted
+        if definitions:
+            self.update(definitions)
+
+    def __setitem__(self, stage: int, definition: str):
+        if stage not in self:
+            insort(self._stages, stage)
+        super().__setitem__(stage, definition)
+
+    def __delitem__(self, stage: int):
+        super().__delitem__(stage)
+        del self._stages[bisect_right(self._stages, stage) - 1]
+
+    def __reduce__(self):  # copies and pickles must rebuild the sorted stages rather than share them
+        return self.__class__, (dict(self),)
+
+    def update(self, *args, **kwargs):
+        for stage, definition in dict(*args, **kwargs).items():
+            self[stage] = definition
+
+    def setdefault(self, stage: int, definition: str = None) -> str:
+        if stage not in self:
+            self[stage] = definition
+        return self[stage]
+
+    def pop(self, stage: int, *default) -> str:
+        if stage not in self:
+            return super().pop(stage, *default)
+        definition = self[stage]
+        del self[stage]
+        return definition
+
+    def popitem(self) -> 'tuple[int, str]':
+        stage, definition = super().popitem()
+        del self._stages[bisect_right(self._stages, stage) - 1]
+        return stage, definition
+
+    def clear(self):
+        super().clear()
+        self._stages = list()
+
+    def copy(self) -> 'DefinitionTimeline':
+        return self.__class__(self)
+
+    def get_stages(self) -> 'list[int]':
+        """Return every stage with a definition, in order. The list must not
+        be modified."""
+        return self._stages
+
+    def get_stage_at_stage(self, language_stage: int) -> int:
+        """Return the stage of the definition in effect at a language stage.
+
+        That is the stage itself if it has a definition, and otherwise the
+        most recent earlier stage that has one, not counting negative
+        stages.
+
+        :param language_stage: The language stage.
+        :type language_stage: int
+        :return: The stage of the definition in effect, or -1 if there is
+        none.
+        :rtype: int
+        """
+        if language_stage in self:
+            return language_stage
+        index = bisect_right(self._stages, language_stage) - 1
+        if index < 0 or self._stages[index] < 0:  # the word was not defined by the provided stage
+            return -1
+        return self._stages[index]
+
+    def get_definition_at_stage(self, language_stage: int) -> str:
+        """Return the definition in effect at a language stage, or '' if
+        there is none."""
+        if language_stage in self:
+            return self[language_stage]
+        stage = self.get_stage_at_stage(language_stage)
+        return self[stage] if stage >= 0 else ''
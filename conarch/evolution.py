@@ -0,0 +1,233 @@
+from collections import Counter
+from weakref import WeakKeyDictionary
+from conarch import regex_backend
+from conarch.flat_stem import FlatStem, SoundTable, change_sounds_flat
+from conarch.multi_pattern import MultiPatternMatcher, apply_anchored_insertion
+from conarch.sound import Sound
+from conarch.sound_change_timeline import SoundChangeTimeline
+from conarch.sound_helpers import CompiledSoundChange
+from conarch.transducer import SoundChangeTransducer
+
+BACKENDS = ('python', 'regex', 'flat', 'transducer')
+
+# counts of sound changes that were applied and that were skipped by the prefilter
+prefilter_statistics = Counter()
+
+_feature_bits = dict()  # [('o', orthography) or ('c', category character)] = bit
+_sound_features = dict()  # [(orthography, categories)] = bitset of features
+_rule_requirements = WeakKeyDictionary()  # [CompiledSoundChange] = list of bitsets, or None if never skipped
+_IMPOSSIBLE = -1  # requirement used for elements that can never be matched
+
+
+def _get_feature_bit(feature: tuple) -> int:
+    bit = _feature_bits.get(feature)
+    if bit is None:
+        bit = 1 << len(_feature_bits)
+        _feature_bits[feature] = bit
+    return bit
+
+
+def get_sound_features(sound: Sound) -> int:
+    """Return the bitset of features a Sound could be matched on.
+
+    A Sound has one feature for its orthographic transcription and one for
+    each character of its phonotactics categories.
+
+    :param sound: The Sound.
+    :type sound: Sound
+    :return: The features of the Sound as a bitset.
+    :rtype: int
+    """
+    key = (sound.orthographic_transcription, sound.phonotactics_categories)
+    features = _sound_features.get(key)
+    if features is None:
+        features = _get_feature_bit(('o', sound.orthographic_transcription))
+        for category in sound.phonotactics_categories:
+            features = features | _get_feature_bit(('c', category))
+        _sound_features[key] = features
+    return features
+
+
+def get_sequence_features(sequence: 'list[list[Sound]]') -> int:
+    """Return the union of the features of every Sound in a sequence.
+
+    :param sequence: The sequence of sounds.
+    :type sequence: list[list[Sound]]
+    :return: The features of the sequence as a bitset.
+    :rtype: int
+    """
+    features = 0
+    for syllable in sequence:
+        for sound in syllable:
+            features = features | get_sound_features(sound)
+    return features
+
+
+def get_trigger_requirements(sound_change: CompiledSoundChange) -> 'list[int] | None':
+    """Return what a sequence must contain for a sound change to match.
+
+    Each element of the old sounds that consumes a Sound adds one bitset,
+    and at least one Sound in the sequence must have every feature in each
+    of them. Elements that are None match anywhere and add nothing, so a
+    sound change made only of None (an insertion) returns None and is
+    never skipped.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :return: The required bitsets, or None if the sound change can apply
+    to any sequence.
+    :rtype: list[int] | None
+    """
+    if sound_change in _rule_requirements:
+        return _rule_requirements[sound_change]
+    requirements = list()
+    for kind, value in sound_change.pattern:
+        if kind == CompiledSoundChange.MATCH_ORTHOGRAPHY:
+            requirements.append(_get_feature_bit(('o', value)))
+        elif kind == CompiledSoundChange.MATCH_CATEGORY:
+            requirement = 0
+            for category in value:  # categories match as substrings, so every character is needed
+                requirement = requirement | _get_feature_bit(('c', category))
+            requirements.append(requirement)
+        elif kind == CompiledSoundChange.MATCH_NEVER:
+            requirements.append(_IMPOSSIBLE)
+    if not requirements:
+        requirements = None
+    _rule_requirements[sound_change] = requirements
+    return requirements
+
+
+def can_match(sound_change: CompiledSoundChange, features: int) -> bool:
+    """Return whether a sound change could match a sequence with certain
+    features.
+
+    A False result is certain: applying the sound change would give back
+    the same sounds. A True result only means the sequence has to be
+    scanned.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :param features: The features of the sequence, as returned by
+    get_sequence_features.
+    :type features: int
+    :return: Whether the sound change needs to be applied.
+    :rtype: bool
+    """
+    requirements = get_trigger_requirements(sound_change)
+    if requirements is None:
+        return True
+    for requirement in requirements:
+        if requirement == _IMPOSSIBLE or features & requirement != requirement:
+            return False
+    return True
+
+
+def evolve_sequence(sequence: 'list[list[Sound]]', sound_changes: 'list', backend: str = 'python',
+                    timeline: 'SoundChangeTimeline | None' = None) -> 'list[list[Sound]]':
+    """Apply a list of sound changes to a sequence in order.
+
+    Sound changes that cannot possibly match the sequence are skipped
+    without scanning it, and prefix and suffix insertions only look at the
+    ends of the sequence. Skips and applications are counted in
+    prefilter_statistics.
+
+    The backend decides how each remaining sound change is matched, and
+    every backend gives the same sounds:
+
+    'python' uses each rule's compiled matcher (CompiledSoundChange).
+    'regex' matches with a regular expression over an encoded string (see
+    regex_backend), encoded by the timeline's Regex Encoder.
+    'flat' works on a Flat Stem of sound ids.
+    'transducer' fuses runs of context-free rules into single passes (see
+    SoundChangeTransducer) and does not use the prefilter. Runs of
+    consecutive stages of the timeline use the transducers it keeps.
+
+    The sequence passed in is not modified, but it is returned as-is if
+    every sound change is skipped.
+
+    :param sequence: The sequence of sounds.
+    :type sequence: list[list[Sound]]
+    :param sound_changes: The Sound Change Rules to apply. With the
+    'python' and 'regex' backends, runs of them may be given as Multi
+    Pattern Matchers, which apply them in shared scans.
+    :type sound_changes: list[SoundChangeRule | MultiPatternMatcher]
+    :param backend: The name of the backend to use, one of BACKENDS.
+    :type backend: str
+    :param timeline: The sound change timeline of the Language the
+    sequence belongs to, if any. Only the 'transducer' and 'regex'
+    backends use it.
+    :type timeline: SoundChangeTimeline | None
+    :return: The converted sequence.
+    :rtype: list[list[Sound]]
+    """
+    assert backend in BACKENDS, 'Unknown evolution backend: ' + str(backend)
+    if backend == 'transducer':
+        return _evolve_with_transducers(sequence, sound_changes, timeline)
+    if backend == 'flat':
+        return _evolve_flat_stem(sequence, sound_changes)
+    if backend == 'regex':
+        encoder = timeline.get_regex_encoder() if timeline is not None else regex_backend.RegexEncoder()
+        apply = encoder.apply_sound_change
+    else:
+        apply = apply_anchored_insertion
+    features = None
+    for sound_change in sound_changes:
+        if isinstance(sound_change, MultiPatternMatcher):
+            sequence = sound_change.apply(sequence)
+            features = None
+            continue
+        compiled = sound_change.compile()
+        if features is None:
+            features = get_sequence_features(sequence)
+        if can_match(compiled, features):
+            sequence = apply(compiled, sequence)
+            features = None
+            prefilter_statistics['applied'] += 1
+        else:
+            prefilter_statistics['skipped'] += 1
+    return sequence
+
+
+def _evolve_with_transducers(sequence: 'list[list[Sound]]', sound_changes: 'list',
+                             timeline: 'SoundChangeTimeline | None') -> 'list[list[Sound]]':
+    if timeline is None:
+        return SoundChangeTransducer(sound_changes).apply(sequence)
+    start = 0
+    while start < len(sound_changes):
+        first_stage = timeline.get_stage_of(sound_changes[start])
+        end = start + 1
+        if first_stage >= 0:  # a run of consecutive stages of the timeline
+            while end < len(sound_changes) and timeline.get_stage_of(sound_changes[end]) == first_stage + end - start:
+                end = end + 1
+            transducer = timeline.get_transducer(first_stage, first_stage + end - start)
+        else:  # e.g. word sound changes
+            while end < len(sound_changes) and timeline.get_stage_of(sound_changes[end]) < 0:
+                end = end + 1
+            transducer = SoundChangeTransducer(sound_changes[start:end])
+        sequence = transducer.apply(sequence)
+        start = end
+    return sequence
+
+
+def _evolve_flat_stem(sequence: 'list[list[Sound]]', sound_changes: 'list') -> 'list[list[Sound]]':
+    table = SoundTable()
+    stem = FlatStem.from_sequence(sequence, table)
+    features = None
+    for sound_change in sound_changes:
+        compiled = sound_change.compile()
+        if features is None:
+            features = get_sequence_features([[table.get_sound(sound_id) for sound_id in stem.sound_ids]])
+        if not can_match(compiled, features):
+            prefilter_statistics['skipped'] += 1
+            continue
+        if compiled.condition and stem.has_empty_syllable():  # conditions treat empty syllables as boundaries
+            stem = FlatStem.from_sequence(compiled.apply(stem.to_sequence(table)), table)
+        else:
+            stem = change_sounds_flat(stem, compiled, table)
+        features = None
+        prefilter_statistics['applied'] += 1
+    return stem.to_sequence(table)
+
+
+def reset_prefilter_statistics():
+    prefilter_statistics.clear()
@@ -0,0 +1,281 @@
+from array import array
+from bisect import bisect_right
+from conarch.sound import Sound, WORD_BOUNDARY
+from conarch.sound_helpers import CompiledCondition, CompiledSoundChange
+
+
+class SoundTable:
+    """Assigns a small integer id to every distinct Sound.
+
+    Sounds are considered distinct according to Sound equality, so two
+    equal Sound objects share one id and converting back from ids returns
+    the first of them that was interned.
+
+    Id 0 is reserved for the word boundary, represented (as elsewhere) by
+    WORD_BOUNDARY.
+    """
+
+    BOUNDARY_ID = 0
+
+    def __init__(self):
+        self.sounds = [WORD_BOUNDARY]
+        self.sound_ids = dict()  # [sound] = id
+
+    def __len__(self):
+        return len(self.sounds)
+
+    def intern(self, sound: Sound) -> int:
+        """Return the id of a Sound, assigning a new one if necessary.
+
+        :param sound: The Sound to look up.
+        :type sound: Sound
+        :return: The id of the Sound in this table.
+        :rtype: int
+        """
+        sound_id = self.sound_ids.get(sound)
+        if sound_id is None:
+            sound_id = len(self.sounds)
+            self.sounds.append(sound)
+            self.sound_ids[sound] = sound_id
+        return sound_id
+
+    def get_sound(self, sound_id: int) -> Sound:
+        return self.sounds[sound_id]
+
+
+class FlatStem:
+    """A compact stem: a flat array of sound ids plus syllable offsets.
+
+    The nested list[list[Sound]] form of a stem stores one list object per
+    syllable and one reference per Sound. A Flat Stem instead stores one
+    unsigned int per Sound (ids come from a Sound Table) and one more per
+    syllable giving the offset at which that syllable starts, so any Sound
+    can be reached from any other in constant time.
+
+    Positions outside of the stem read as the word boundary. Empty
+    syllables take up no positions, so a neighbour lookup steps straight
+    over them.
+    """
+
+    __slots__ = ('sound_ids', 'syllable_starts')
+
+    def __init__(self, sound_ids: 'array | None' = None, syllable_starts: 'array | None' = None):
+        self.sound_ids = sound_ids if sound_ids is not None else array('I')
+        self.syllable_starts = syllable_starts if syllable_starts is not None else array('I')
+
+    @classmethod
+    def from_sequence(cls, sequence: 'list[list[Sound]]', table: SoundTable) -> 'FlatStem':
+        """Convert a nested sequence of sounds into a Flat Stem.
+
+        :param sequence: The sequence of sounds.
+        :type sequence: list[list[Sound]]
+        :param table: The table used to assign ids to sounds.
+        :type table: SoundTable
+        :return: The equivalent Flat Stem.
+        :rtype: FlatStem
+        """
+        sound_ids = array('I')
+        syllable_starts = array('I')
+        for syllable in sequence:
+            syllable_starts.append(len(sound_ids))
+            sound_ids.extend(table.intern(sound) for sound in syllable)
+        return cls(sound_ids, syllable_starts)
+
+    def to_sequence(self, table: SoundTable) -> 'list[list[Sound]]':
+        """Convert this Flat Stem back into a nested sequence of sounds.
+
+        :param table: The table that was used to assign ids to sounds.
+        :type table: SoundTable
+        :return: The equivalent sequence of sounds.
+        :rtype: list[list[Sound]]
+        """
+        sounds = table.sounds
+        sequence = list()
+        for i in range(len(self.syllable_starts)):
+            syllable_ids = self.sound_ids[self.syllable_starts[i]:self.syllable_end(i)]
+            sequence.append([sounds[sound_id] for sound_id in syllable_ids])
+        return sequence
+
+    def __len__(self):
+        return len(self.sound_ids)
+
+    def __eq__(self, other):
+        if isinstance(other, FlatStem):
+            return self.sound_ids == other.sound_ids and self.syllable_starts == other.syllable_starts
+        return False
+
+    def syllable_count(self) -> int:
+        return len(self.syllable_starts)
+
+    def has_empty_syllable(self) -> bool:
+        return any(self.syllable_starts[i] == self.syllable_end(i) for i in range(len(self.syllable_starts)))
+
+    def syllable_end(self, i: int) -> int:
+        """Return the position just past the last Sound of a syllable."""
+        if i + 1 < len(self.syllable_starts):
+            return self.syllable_starts[i + 1]
+        return len(self.sound_ids)
+
+    def syllable_of(self, position: int) -> int:
+        """Return the index of the syllable containing a position."""
+        return bisect_right(self.syllable_starts, position) - 1
+
+    def position(self, i: int, j: int) -> int:
+        """Return the flat position of Sound j in syllable i."""
+        return self.syllable_starts[i] + j
+
+    def sound_id_at(self, position: int) -> int:
+        """Return the id at a position, or the boundary id outside the stem."""
+        if 0 <= position < len(self.sound_ids):
+            return self.sound_ids[position]
+        return SoundTable.BOUNDARY_ID
+
+
+def check_condition_flat(stem: FlatStem, table: SoundTable, first: int, last: int,
+                         condition: CompiledCondition) -> bool:
+    """Check if the sounds between two positions of a Flat Stem match a
+    compiled condition.
+
+    Works like CompiledCondition.evaluate, except that neighbouring sounds
+    are found directly by their offset in the stem.
+
+    :param stem: The full stem.
+    :type stem: FlatStem
+    :param table: The table that was used to assign ids to sounds.
+    :type table: SoundTable
+    :param first: The position of the first Sound being considered.
+    :type first: int
+    :param last: The position of the last Sound being considered.
+    :type last: int
+    :param condition: The compiled condition to evaluate.
+    :type condition: CompiledCondition
+    :return: Whether the condition is matched by the sounds.
+    :rtype: bool
+    """
+    sounds = table.sounds
+    for (after, offset, category, sound, inverted), boundary_match in zip(condition.steps,
+                                                                          condition.boundary_matches):
+        sound_id = stem.sound_id_at((last if after else first) + offset)
+        if sound_id == SoundTable.BOUNDARY_ID:
+            matched = boundary_match
+        elif category is not None:
+            matched = category in sounds[sound_id].phonotactics_categories
+        else:
+            matched = sound == sounds[sound_id]
+        if matched == inverted:
+            return False
+    return True
+
+
+def change_sounds_flat(stem: FlatStem, sound_change: CompiledSoundChange, table: SoundTable) -> FlatStem:
+    """Apply a compiled sound change to a Flat Stem.
+
+    Follows the same matching rules as CompiledSoundChange.apply, so
+    converting the result back with to_sequence gives the same sounds as
+    applying the sound change to the nested form of the stem (apart from
+    conditions that look across an empty syllable, which the nested form
+    treats as a word boundary).
+
+    :param stem: The stem to convert.
+    :type stem: FlatStem
+    :param sound_change: The compiled sound change to apply.
+    :type sound_change: CompiledSoundChange
+    :param table: The table that was used to assign ids to sounds. Sounds
+    in the replacement are added to it if they are not already there.
+    :type table: SoundTable
+    :return: The converted stem.
+    :rtype: FlatStem
+    """
+    pattern = sound_change.pattern
+    pattern_length = len(pattern)
+    replacement = [table.intern(sound) for sound in sound_change.replacement] \
+        if sound_change.replacement is not None else None
+    condition = sound_change.condition
+    sounds = table.sounds
+    sound_ids = stem.sound_ids
+    syllable_count = stem.syllable_count()
+    new_syllables = list()
+    match_count = 0
+    match_positions = list()  # (syllable, position) of each element matched so far; position is None for None
+    none_target = None
+    for i in range(syllable_count):
+        new_syllable = array('I')
+        syllable_start = stem.syllable_starts[i]
+        for p in range(syllable_start, stem.syllable_end(i)):
+            while match_count < pattern_length and pattern[match_count][0] == CompiledSoundChange.MATCH_NONE:
+                match_count = match_count + 1
+                match_positions.append((i, None, p))
+                none_target = sound_ids[p]
+            if match_count < pattern_length:  # check for a match of one non-None sound
+                if sound_change.element_matches(match_count, sounds[sound_ids[p]]):
+                    match_count = match_count + 1
+                    match_positions.append((i, p, p))
+                    none_target = None
+                else:  # match failed: put the old sounds back and undo the match
+                    for match_i, match_p, _ in match_positions:
+                        if match_p is not None:
+                            (new_syllables[match_i] if match_i < i else new_syllable).append(sound_ids[match_p])
+                    new_syllable.append(sound_ids[p])
+                    match_count = 0
+                    match_positions = list()
+            if match_count >= pattern_length:  # full match found
+                passed = True
+                if condition:
+                    first = match_positions[0][2]
+                    last = p
+                    if match_positions[-1][1] is None:
+                        last = _none_match_end(stem, i, p - syllable_start)
+                    passed = check_condition_flat(stem, table, first, last, sound_change.get_condition())
+                if passed:
+                    if replacement is not None:
+                        new_syllable.extend(replacement)
+                else:
+                    for match_i, match_p, _ in match_positions:
+                        if match_p is not None:
+                            (new_syllables[match_i] if match_i < i else new_syllable).append(sound_ids[match_p])
+                match_count = 0
+                match_positions = list()
+                if none_target is not None:
+                    new_syllable.append(none_target)
+        new_syllables.append(new_syllable)
+    while match_count < pattern_length and pattern[match_count][0] == CompiledSoundChange.MATCH_NONE:
+        match_count = match_count + 1
+        match_positions.append((syllable_count - 1, None, len(sound_ids)))
+    if match_count >= pattern_length:  # full match found (special case; None can match after the sequence)
+        passed = True
+        if condition:
+            first = match_positions[0][2]
+            last = len(sound_ids) - 1
+            if match_positions[-1][1] is None:
+                last_syllable = syllable_count - 1
+                last = _none_match_end(stem, last_syllable, len(sound_ids) - stem.syllable_starts[last_syllable])
+            passed = check_condition_flat(stem, table, first, last, sound_change.get_condition())
+        if passed and replacement is not None:
+            new_syllables[-1].extend(replacement)
+            match_positions = list()
+        elif passed and condition:  # an unconditioned deletion here leaves the matched sounds in place
+            match_positions = list()
+    for match_i, match_p, _ in match_positions:
+        if match_p is not None:  # put old sounds back in case of partial match
+            new_syllables[match_i].append(sound_ids[match_p])
+    new_sound_ids = array('I')
+    new_syllable_starts = array('I')
+    for new_syllable in new_syllables:
+        new_syllable_starts.append(len(new_sound_ids))
+        new_sound_ids.extend(new_syllable)
+    return FlatStem(new_sound_ids, new_syllable_starts)
+
+
+def _none_match_end(stem: FlatStem, i: int, j: int) -> int:
+    """Return the position a condition is checked after for a match that
+    ends in None at Sound j of syllable i.
+
+    Mirrors the nested implementation, which steps back one Sound and, at
+    the start of a syllable, moves to the first Sound of the syllable
+    before it.
+    """
+    j = j - 1
+    if j < 0 < i:
+        i = i - 1
+        j = 0
+    return stem.position(i, j)
@@ -201,8 +201,7 @@ class Application:
         self.language_word_list.delete(0, tk.END)
         self.language_words = list()
         i = 0
-        for word in language.words:
-            word_stem = word.get_modern_stem_string(include_ipa=True)
+        for word, word_stem in zip(language.words, language.get_word_stem_strings_at_stage(include_ipa=True)):
             self.language_word_list.insert(i, word_stem)
             self.language_words.append(word)
             i = i + 1
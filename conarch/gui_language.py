@@ -53,8 +53,7 @@ class LanguageWindow:
             i = i + 1
 
         i = 0
-        for word in language.words:
-            word_stem = word.get_modern_stem_string(include_ipa=True)
+        for word, word_stem in zip(language.words, language.get_word_stem_strings_at_stage(include_ipa=True)):
             language_word_list.insert(i, word_stem)
             self.popup_language_words.append(word)
             i = i + 1
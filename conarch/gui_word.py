@@ -26,6 +26,11 @@ class WordWindow:
         self.word_forms_list_scrollbar.configure(command=self.word_forms_list.yview)
         self.word_forms_list.bind('<Double-1>', self.open_word_form_window)
         self.populate_forms_list(word)
+        self.word_history_list_label = tk.Label(self.frame, text='Stem History:')
+        self.word_history_list_scrollbar = tk.Scrollbar(self.frame, orient='vertical')
+        self.word_history_list = tk.Listbox(self.frame, width=60, yscrollcommand=self.word_history_list_scrollbar.set)
+        self.word_history_list_scrollbar.configure(command=self.word_history_list.yview)
+        self.populate_history_list(word)
         self.word_edit_button = tk.Button(self.frame, text='Edit Word', command=self.open_edit_word_window)
         self.word_define_button = tk.Button(self.frame, text='Edit Definitions',
                                             command=self.open_new_definition_window)
@@ -39,9 +44,12 @@ class WordWindow:
         self.word_forms_list_label.grid(row=6, column=1)
         self.word_forms_list.grid(row=7, column=1, sticky='ew')
         self.word_forms_list_scrollbar.grid(row=7, column=2, sticky='ns')
+        self.word_history_list_label.grid(row=8, column=1)
+        self.word_history_list.grid(row=9, column=1, sticky='ew')
+        self.word_history_list_scrollbar.grid(row=9, column=2, sticky='ns')
         if edit_word_command:
-            self.word_define_button.grid(row=8, column=1)
-            self.word_edit_button.grid(row=9, column=1)
+            self.word_define_button.grid(row=10, column=1)
+            self.word_edit_button.grid(row=11, column=1)
 
         self.frame.grid()
 
@@ -59,6 +67,12 @@ class WordWindow:
                                                                            include_modern_stem=False)):
             self.word_forms_list.insert(i, form_string)
 
+    def populate_history_list(self, word):
+        self.word_history_list.delete(0, tk.END)
+        for stage, stem_string, changed in word.iter_stem_history_strings(include_ipa=True):
+            if changed or stage == word.original_language_stage:  # only list the stages where the stem changed
+                self.word_history_list.insert(tk.END, 'Stage ' + str(stage) + ': ' + stem_string)
+
     def open_edit_word_window(self):
         edit_word_window = tk.Toplevel(self.master)
         NewWordWindow(edit_word_window, self.language, self.edit_word, edit_word=self.word)
@@ -67,6 +81,7 @@ class WordWindow:
         self.edit_word_command(word)
         self.set_labels(self.language, word)
         self.populate_forms_list(word)
+        self.populate_history_list(word)
 
     def open_new_definition_window(self):
         new_definition_window = tk.Toplevel(self.master)
@@ -111,7 +126,9 @@ class NewWordWindow:
             self.new_word_syllable_count.set(str(len(edit_word.get_base_stem())))
             self.new_word_text.set(edit_word.get_base_stem_string(include_ipa=True))
             self.new_word_stage.set(edit_word.original_language_stage)
-            self.new_word_stem = edit_word.base_stem  # TODO how does branching interact with this
+            # edit a copy so that the word only changes (through its base_stem setter) once the edit is confirmed
+            # TODO how does branching interact with this
+            self.new_word_stem = sound_helpers.copy_sequence(edit_word.get_base_stem())
 
         new_word_phonotactics_label = tk.Label(self.frame, text='Syllable Phonotactics: ' + language.phonotactics)
         new_word_categories_label = tk.Label(self.frame, text='Enter Part(s) of Speech')
@@ -0,0 +1,232 @@
+from collections import Counter
+from conarch.sound import Sound
+
+
+class _InventoryBuilder:
+    """A list of sounds with the same membership rules as a plain list
+    (Sound equality), but which remembers which Sound objects it has
+    already matched so that seeing the same object again is a dictionary
+    lookup instead of a scan with Sound.__eq__."""
+
+    def __init__(self, sounds: 'list[Sound]'):
+        self.sounds = list(sounds)
+        self._matches = dict()  # [id(sound)] = (sound, the equal Sound in self.sounds)
+
+    def add(self, sound: Sound):
+        if id(sound) in self._matches:
+            return
+        for inventory_sound in self.sounds:
+            if sound == inventory_sound:
+                self._matches[id(sound)] = (sound, inventory_sound)
+                return
+        self.sounds.append(sound)
+        self._matches[id(sound)] = (sound, sound)
+
+    def remove(self, sound: Sound):
+        if sound in self.sounds:
+            removed = self.sounds.pop(self.sounds.index(sound))
+            self._matches = {key: match for key, match in self._matches.items() if match[1] is not removed}
+
+
+class InventoryLog:
+    """Records what adds sounds to and removes sounds from a Language, so
+    that its phonetic inventory at any stage can be worked out without
+    copying any words.
+
+    At each stage, the sounds of the base stems of the words added at that
+    stage are added first, then the sound change of that stage removes its
+    old Sound if it has no condition and only one old Sound, and adds its
+    new sounds. The original phonetic inventory comes before everything.
+
+    Words are recorded as they are added (see record_word), along with the
+    sounds of their base stems, and a recorded Word tells the log when its
+    base stem or original stage changes (see update_word), so the words
+    that did not change are never looked at again. The exceptions are
+    words whose base stem comes from another Word (forms and branched
+    words), which can change along with that Word; they are checked
+    against their base stem token whenever an inventory is asked for.
+    Words appended to the list of words of the Language directly are
+    recorded the next time an inventory is asked for, and a list that is
+    replaced or gets shorter makes the log record every Word again. Sound
+    changes are read from the Language as they are.
+
+    The log also keeps every Sound object any Word has added, keyed by id,
+    with the stages of the words that added it, so the union of the
+    inventories of all stages never has to go through the stages or the
+    words.
+    """
+
+    def __init__(self):
+        self._entries = dict()  # [id(word)] = (word, stage, base stem token, sounds of its base stem)
+        self._stage_sounds = None  # [stage] = sounds added by words at that stage, in order
+        self._word_sounds = dict()  # [id(sound)] = (sound, Counter of the stages of the words that added it)
+        self._words = None  # the list of words of the Language the entries were recorded from
+        self._word_count = 0  # how many words of that list have been recorded
+        self._changed = dict()  # [id(word)] = word, for recorded words that changed since they were read
+        self._dependents = dict()  # [id(word)] = word, for recorded words whose base stem comes from another Word
+
+    def __deepcopy__(self, memo: dict) -> 'InventoryLog':
+        return self  # a deep copy of a recorded Word keeps telling this log about changes, which it ignores
+
+    @staticmethod
+    def _get_entry(word) -> tuple:
+        sounds = dict()  # [id(sound)] = sound; keeps the order of the stem
+        for sound in word.get_base_sounds():
+            sounds.setdefault(id(sound), sound)
+        return word, word.original_language_stage, word.get_base_stem_token(), list(sounds.values())
+
+    def _add_sounds(self, entry: tuple):
+        _, stage, _, sounds = entry
+        for sound in sounds:
+            self._word_sounds.setdefault(id(sound), (sound, Counter()))[1][stage] += 1
+
+    def _remove_sounds(self, entry: tuple):
+        _, stage, _, sounds = entry
+        for sound in sounds:
+            stages = self._word_sounds[id(sound)][1]
+            stages[stage] -= 1
+            if stages[stage] == 0:
+                del stages[stage]
+                if not stages:
+                    del self._word_sounds[id(sound)]
+
+    def _read_word(self, word) -> tuple:
+        entry = self._entries.get(id(word))
+        if entry is not None:
+            self._remove_sounds(entry)
+        entry = self._get_entry(word)
+        self._entries[id(word)] = entry
+        self._add_sounds(entry)
+        if word.is_word_form() or word.has_source_word():
+            self._dependents[id(word)] = word
+        else:
+            self._dependents.pop(id(word), None)
+        return entry
+
+    def _record_all(self, words: 'list'):
+        self._entries = dict()
+        self._stage_sounds = None
+        self._word_sounds = dict()
+        self._changed = dict()
+        self._dependents = dict()
+        self._words = words
+        self._word_count = 0
+        for word in words:
+            self._read_word(word)
+            word.set_inventory_log(self)
+            self._word_count = self._word_count + 1
+
+    def record_word(self, language, word):
+        """Record the sounds a Word adds at the stage it was added. The Word
+        must have just been added to the end of the words of the Language.
+
+        :param language: The Language this log belongs to.
+        :type language: Language
+        :param word: The Word.
+        :type word: Word
+        """
+        if language.words is not self._words or self._word_count != len(language.words) - 1 or \
+                id(word) in self._entries:
+            self._record_all(language.words)
+        else:
+            self._record_appended(word)
+
+    def _record_appended(self, word):
+        entry = self._read_word(word)
+        word.set_inventory_log(self)
+        self._word_count = self._word_count + 1
+        if self._stage_sounds is not None:
+            self._stage_sounds.setdefault(entry[1], list()).extend(entry[3])
+
+    def update_word(self, word):
+        """Note that the base stem or original stage of a Word has changed.
+        The Word is read again the next time an inventory is asked for.
+        Words this log has not recorded are ignored.
+
+        :param word: The Word.
+        :type word: Word
+        """
+        entry = self._entries.get(id(word))
+        if entry is not None and entry[0] is word:
+            self._changed[id(word)] = word
+
+    def _update(self, language):
+        words = language.words
+        if words is not self._words or self._word_count > len(words):
+            self._record_all(words)
+            return
+        for word in words[self._word_count:]:  # appended directly
+            if id(word) in self._entries:
+                self._record_all(words)
+                return
+            self._record_appended(word)
+        for key, word in self._dependents.items():
+            if key not in self._changed and self._entries[key][2] != word.get_base_stem_token():
+                self._changed[key] = word
+        if self._changed:
+            for word in self._changed.values():
+                self._read_word(word)
+            self._changed = dict()
+            self._stage_sounds = None
+
+    def _get_stage_sounds(self) -> 'dict[int, list[Sound]]':
+        if self._stage_sounds is None:
+            self._stage_sounds = dict()
+            for word in self._words:
+                _, stage, _, sounds = self._entries[id(word)]
+                self._stage_sounds.setdefault(stage, list()).extend(sounds)
+        return self._stage_sounds
+
+    def get_inventory_at_stage(self, language, language_stage: int) -> 'list[Sound]':
+        """Return the phonetic inventory of a Language at a stage.
+
+        :param language: The Language this log belongs to.
+        :type language: Language
+        :param language_stage: The language stage, which must not be
+        negative.
+        :type language_stage: int
+        :return: All sounds present in the Language at language_stage.
+        :rtype: list[Sound]
+        """
+        self._update(language)
+        stage_sounds = self._get_stage_sounds()
+        inventory = _InventoryBuilder(language.original_phonetic_inventory)
+        for stage in range(language_stage + 1):
+            for sound in stage_sounds.get(stage, ()):
+                inventory.add(sound)
+            if stage < language_stage:
+                sound_change = language.sound_changes[stage]
+                if not sound_change.condition and len(sound_change.old_sounds) == 1:
+                    inventory.remove(sound_change.old_sounds[0])
+                if sound_change.new_sounds is not None:
+                    for sound in sound_change.new_sounds:
+                        inventory.add(sound)
+        return inventory.sounds
+
+    def get_full_inventory(self, language) -> 'list[Sound]':
+        """Return every Sound that was ever in the phonetic inventory of a
+        Language, at any stage up to its current one.
+
+        That is the original phonetic inventory, the sounds of every Word
+        added by the current stage, and the new sounds of every sound
+        change, as sounds are only ever removed after they were added. Equal
+        sounds are only included once.
+
+        :param language: The Language this log belongs to.
+        :type language: Language
+        :return: All sounds that ever existed in the Language.
+        :rtype: list[Sound]
+        """
+        self._update(language)
+        current_stage = language.get_current_stage()
+        sounds = dict()  # [id(sound)] = sound
+        for sound in language.original_phonetic_inventory:
+            sounds[id(sound)] = sound
+        for key, (sound, stages) in self._word_sounds.items():
+            if min(stages) <= current_stage:
+                sounds[key] = sound
+        for sound_change in language.sound_changes:
+            if sound_change.new_sounds is not None:
+                for sound in sound_change.new_sounds:
+                    sounds[id(sound)] = sound
+        return list(dict.fromkeys(sounds.values()))
@@ -1,7 +1,13 @@
 import copy
+from conarch import batch
+from conarch.inventory_log import InventoryLog
+from conarch.phonotactics import PhonotacticsAutomaton, get_phonotactics_automaton
 from conarch.sound import Sound
 from conarch.sound_change_rule import SoundChangeRule
+from conarch.sound_change_timeline import SoundChangeTimeline
+from conarch.transducer import SoundChangeTransducer
 from conarch.word import Word
+from conarch.word_stage_view import WordStageView
 import random
 from conarch.word_form_rule import WordFormRule
 
@@ -37,12 +43,14 @@ class Language:
         self.original_phonetic_inventory = phonetic_inventory
         self.phonotactics = phonotactics
         self.words = list()
-        self.sound_changes = list()
+        self.sound_changes = SoundChangeTimeline()  # shared by all words as their language sound changes
         self.modern_phonetic_inventory = copy.copy(self.original_phonetic_inventory)
         self.source_language = None
         self.source_language_stage = None
         self.child_languages = list()
         self.word_forms = list()
+        self._phonotactics_automaton = None
+        self._inventory_log = InventoryLog()
 
     def add_word(self, word: Word, language_stage: int = -1):
         """Add a Word to this Language.
@@ -53,14 +61,25 @@ class Language:
         value of -1 (the default) will use the most modern stage.
         :type language_stage: int
         """
+        self._attach_word(word, language_stage)
+
+        # reassess phonetic inventory
+        for syllable in word.get_modern_stem():
+            for sound in syllable:
+                if sound not in self.modern_phonetic_inventory:
+                    self.modern_phonetic_inventory.append(sound)
+
+    def _attach_word(self, word: Word, language_stage: int = -1):
+        """Add a Word to this Language with its language sound changes and
+        forms, but without reassessing the modern phonetic inventory."""
         if language_stage < 0:
             language_stage = self.get_current_stage()
         self.words.append(word)  # add word
         word.original_language_stage = language_stage
+        self._inventory_log.record_word(self, word)
 
         # add language sound changes to word
-        for sound_change in self.sound_changes:  # evolve words
-            word.add_language_sound_change(sound_change)
+        word.share_language_sound_changes(self.sound_changes)  # evolve words
 
         # add forms to word
         for word_form in self.get_forms_at_stage(language_stage):  # preexisting forms
@@ -74,12 +93,6 @@ class Language:
                     if any(category in word.categories for category in word_form.categories):
                         self.apply_form_to_word(word_form, word)
 
-        # reassess phonetic inventory
-        for syllable in word.get_modern_stem():
-            for sound in syllable:
-                if sound not in self.modern_phonetic_inventory:
-                    self.modern_phonetic_inventory.append(sound)
-
     def add_words(self, words: 'list[Word]', language_stage: int = -1):
         """Add several words to this Language.
 
@@ -267,9 +280,10 @@ class Language:
         :type sound_change: SoundChangeRule
         """
         sound_change.stage = self.get_current_stage()  # first should be 1
-        self.sound_changes.append(sound_change)
+        self.sound_changes.append(sound_change)  # adds the stage to every word sharing the timeline
         for word in self.words:
-            word.add_language_sound_change(sound_change)
+            if word.language_sound_changes is not self.sound_changes:  # e.g. words appended directly by the database
+                word.add_language_sound_change(sound_change)
         if not sound_change.condition and len(sound_change.old_sounds) == 1:
             if sound_change.old_sounds[0] in self.modern_phonetic_inventory:
                 self.modern_phonetic_inventory.remove(sound_change.old_sounds[0])
@@ -302,9 +316,9 @@ class Language:
             word_form.original_language_stage = self.get_current_stage()
         self.word_forms.append(word_form)
         form_words = []
-        for word in self.copy_words_at_stage(word_form.original_language_stage, include_all_definitions=True):
+        for word in self.get_word_views_at_stage(word_form.original_language_stage, include_all_definitions=True):
             if any(category in word.categories for category in word_form.categories):
-                form_words.append(self.apply_form_to_word(word_form, word.copied_from))
+                form_words.append(self.apply_form_to_word(word_form, word.word))
         return form_words
 
     @staticmethod
@@ -340,14 +354,15 @@ class Language:
     def get_full_sound_inventory(self) -> 'list[Sound]':
         """Return all sounds that ever existed in this Language.
 
+        Answered from the InventoryLog of this Language, which keeps the
+        sounds of the words up to date as they are added and edited, so it
+        only costs time in proportion to the number of sounds and sound
+        changes rather than going through every stage or every Word.
+
         :return: A list of all sounds that ever existed in this Language.
         :rtype: list[Sound]
         """
-        sounds = set()
-        for i in range(0, self.get_current_stage() + 1):
-            for sound in self.get_phonetic_inventory_at_stage(i):
-                sounds.add(sound)
-        return list(sounds)
+        return self._inventory_log.get_full_inventory(self)
 
     def get_current_stage(self) -> int:
         """Return the most modern stage of this Language.
@@ -367,6 +382,9 @@ class Language:
         """Return a list containing copies of all words that existed at a
         certain language stage.
 
+        The copies are detached from this Language. To only read the words
+        as they were, get_word_views_at_stage is much cheaper.
+
         The words will exist as they did at the specified stage, including all
         language sound changes and word sound changes up to and including the
         specified stage, and none from future stages.
@@ -408,63 +426,44 @@ class Language:
         if language_stage < 0:
             language_stage = self.get_current_stage()
         stage_words = list()
-
-        # determine which words to include
         for word in self.words:
-            if include_previous_stages:
-                if word.original_language_stage <= language_stage:
-                    new_word = copy.deepcopy(word)
-                    if not preserve_ids:
-                        new_word.word_id = None
-                    if not include_forms:
-                        new_word.word_forms = []
-                    if not preserve_ids and include_forms:
-                        for form in new_word.word_forms:
-                            form.word_id = None
-                    if branch:
-                        new_word.set_as_branch(word, language_stage)
-                    new_word.copied_from = word
-                    stage_words.append(new_word)
-            else:
-                if word.original_language_stage == language_stage:
-                    new_word = copy.deepcopy(word)
-                    if not preserve_ids:
-                        new_word.word_id = None
-                    if not include_forms:
-                        new_word.word_forms = []
-                    if not preserve_ids and include_forms:
-                        for form in new_word.word_forms:
-                            form.word_id = None
-                    if branch:
-                        new_word.set_as_branch(word, language_stage)
-                    new_word.copied_from = word
-                    stage_words.append(new_word)
-
-        # trim sound changes from included words to match language stage
-        for word in stage_words:
-            word.word_sound_changes = [s for s in word.word_sound_changes if s.stage <= language_stage]
-            if include_language_sound_changes:
-                word.language_sound_changes = [s for s in word.language_sound_changes if s.stage <= language_stage]
-            else:
-                word.language_sound_changes = []
-
-        # trim definitions from included words to match language stage
-        if not include_all_definitions:
-            for word in stage_words:
-                definitions = list()
-                for definition, stage in word.get_definitions_and_stages():
-                    if stage <= language_stage:
-                        definitions.append((definition, stage))
-                word.clear_definitions()
-                if len(definitions) > 0:
-                    if branch:
-                        word.add_definition(definitions[-1][0], 0)
-                    else:
-                        for definition, stage in definitions:
-                            word.add_definition(definition, stage)
-
+            if word.original_language_stage == language_stage or \
+                    include_previous_stages and word.original_language_stage <= language_stage:
+                stage_words.append(word.copy_at_stage(language_stage,
+                                                      include_language_sound_changes=include_language_sound_changes,
+                                                      branch=branch, include_all_definitions=include_all_definitions,
+                                                      preserve_ids=preserve_ids, include_forms=include_forms))
         return stage_words
 
+    def get_word_views_at_stage(self, language_stage: int = -1, include_previous_stages: bool = True,
+                                include_all_definitions: bool = False) -> 'list[WordStageView]':
+        """Return a view of every Word that existed at a certain language
+        stage.
+
+        The views read like the copies returned by copy_words_at_stage, but
+        nothing is copied unless a view is modified (see WordStageView), so
+        use this whenever the words only need to be looked at.
+
+        :param language_stage: The stage to view the words at. A value of -1
+        (the default) will use the most modern stage.
+        :type language_stage: int
+        :param include_previous_stages: Whether to include words that were
+        added at stages before language_stage as opposed to only those added
+        at precisely language_stage.
+        :type include_previous_stages: bool
+        :param include_all_definitions: If True, the views will show all
+        definitions of the words as opposed to only those from stages up to
+        and including language_stage.
+        :type include_all_definitions: bool
+        :return: The views of the words.
+        :rtype: list[WordStageView]
+        """
+        if language_stage < 0:
+            language_stage = self.get_current_stage()
+        return [WordStageView(word, language_stage, include_all_definitions=include_all_definitions)
+                for word in self.words if word.original_language_stage == language_stage or
+                include_previous_stages and word.original_language_stage <= language_stage]
+
     def get_sound_changes_at_stage(self, language_stage: int = -1) -> 'list[SoundChangeRule]':
         """Return all historical sound changes present at a given stage.
 
@@ -483,12 +482,34 @@ class Language:
             language_stage = self.get_current_stage()
         return [s for s in self.sound_changes if s.stage <= language_stage]
 
+    def get_sound_change_transducer(self, first_stage: int = 0, last_stage: int = -1) -> SoundChangeTransducer:
+        """Return the historical sound changes between two stages compiled
+        into a Sound Change Transducer.
+
+        The transducer is kept by the sound change timeline and reused, also
+        by words evolved with the 'transducer' backend, until a sound change
+        in its range is replaced or edited.
+
+        :param first_stage: The stage of the first sound change to include.
+        :type first_stage: int
+        :param last_stage: The stage to stop at; its sound change is not
+        included. A value of -1 (the default) will include every sound
+        change up to the most modern stage.
+        :type last_stage: int
+        :return: A transducer applying every sound change in the range.
+        :rtype: SoundChangeTransducer
+        """
+        if last_stage < 0:
+            last_stage = self.get_current_stage()
+        return self.sound_changes.get_transducer(first_stage, last_stage)
+
     def get_phonetic_inventory_at_stage(self, language_stage: int = -1) -> 'list[Sound]':
         """Return the phonetic inventory of this Language at a given stage.
 
         Starts with the original phonetic inventory as a basis, then goes
         through each language stage up to language_stage adding and removing
-        sounds based on sound changes and added words.
+        sounds based on sound changes and added words. The sounds each Word
+        adds are kept in an InventoryLog, so no words are copied.
 
         :param language_stage: The language stage to pull the phonetic
         inventory from. A value of -1 (the default) will use the most modern
@@ -499,26 +520,90 @@ class Language:
         """
         if language_stage < 0:
             language_stage = self.get_current_stage()
-        stage_inventory = copy.copy(self.original_phonetic_inventory)
-        stage = 0
-        while stage <= language_stage:
-            stage_words = self.copy_words_at_stage(language_stage=stage, include_previous_stages=False)
-            for word in stage_words:
-                for syllable in word.get_base_stem():
-                    for sound in syllable:
-                        if sound not in stage_inventory:
-                            stage_inventory.append(sound)
-            if stage < language_stage:
-                sound_change = self.sound_changes[stage]
-                if not sound_change.condition and len(sound_change.old_sounds) == 1:
-                    if sound_change.old_sounds[0] in stage_inventory:
-                        stage_inventory.remove(sound_change.old_sounds[0])
-                if sound_change.new_sounds is not None:
-                    for sound in sound_change.new_sounds:
-                        if sound not in stage_inventory:
-                            stage_inventory.append(sound)
-            stage = stage + 1
-        return stage_inventory
+        return self._inventory_log.get_inventory_at_stage(self, language_stage)
+
+    def get_word_stems_at_stage(self, language_stage: int = -1) -> 'list[list[list[Sound]]]':
+        """Return the stem of every Word in this Language at a given stage.
+
+        Gives the same stems as calling get_stem_at_stage (or
+        get_modern_stem) on each Word, but applies each sound change to all
+        of the words it affects in one batch.
+
+        :param language_stage: The language stage to evolve stems to. A
+        value of -1 (the default) will return the modern stem of each Word.
+        :type language_stage: int
+        :return: One stem per Word, in the same order as the words of this
+        Language.
+        :rtype: list[list[list[Sound]]]
+        """
+        if language_stage < 0:
+            sound_change_lists = [word.all_sound_changes() for word in self.words]
+        else:
+            sound_change_lists = [word.sound_changes_at_stage(language_stage) for word in self.words]
+        return batch.evolve_stems([word.get_base_stem() for word in self.words], sound_change_lists)
+
+    def get_word_stem_strings_at_stage(self, language_stage: int = -1, include_ipa: bool = False) -> 'list[str]':
+        """Return the stem string of every Word in this Language at a given
+        stage, evolving the stems in batches as in get_word_stems_at_stage.
+
+        :param language_stage: The language stage to evolve stems to. A
+        value of -1 (the default) will use the modern stem of each Word.
+        :type language_stage: int
+        :param include_ipa: Whether to add the IPA transcription of each stem
+        as in Word.get_stem_string.
+        :type include_ipa: bool
+        :return: One stem string per Word, in the same order as the words of
+        this Language.
+        :rtype: list[str]
+        """
+        return [Word.get_stem_string(stem, include_ipa=include_ipa)
+                for stem in self.get_word_stems_at_stage(language_stage=language_stage)]
+
+    def get_phonotactics_automaton(self) -> PhonotacticsAutomaton:
+        """Return the phonotactics of this Language compiled for checking
+        syllables. It is compiled again only if the phonotactics change."""
+        if self._phonotactics_automaton is None or self._phonotactics_automaton.phonotactics != self.phonotactics:
+            self._phonotactics_automaton = get_phonotactics_automaton(self.phonotactics)
+        return self._phonotactics_automaton
+
+    def get_phonotactics_violations(self, language_stage: int = -1) -> 'list[tuple[Word, int, list[Sound]]]':
+        """Find every syllable in the lexicon that does not fit the
+        phonotactics of this Language at a given stage.
+
+        :param language_stage: The language stage to check the stems of
+        words at. A value of -1 (the default) will check modern stems. Words
+        added after the stage are not checked.
+        :type language_stage: int
+        :return: A (Word, syllable index, syllable) tuple for every syllable
+        that does not fit, in the order of the words of this Language.
+        :rtype: list[tuple[Word, int, list[Sound]]]
+        """
+        automaton = self.get_phonotactics_automaton()
+        violations = list()
+        for word, stem in zip(self.words, self.get_word_stems_at_stage(language_stage=language_stage)):
+            if language_stage >= 0 and word.original_language_stage > language_stage:
+                continue
+            for i in automaton.get_violations(stem):
+                violations.append((word, i, stem[i]))
+        return violations
+
+    def get_word_definitions_at_stage(self, language_stage: int = -1, exact: bool = False) -> 'list[str]':
+        """Return the definition of every Word in this Language at a given
+        stage.
+
+        :param language_stage: The language stage to get definitions from.
+        A value of -1 (the default) will use the current stage.
+        :type language_stage: int
+        :param exact: If True, only definitions given at exactly that stage
+        are returned, and '' for every other Word.
+        :type exact: bool
+        :return: One definition per Word, in the same order as the words of
+        this Language, with '' for words not defined by that stage.
+        :rtype: list[str]
+        """
+        if language_stage < 0:
+            language_stage = self.get_current_stage()
+        return [word.get_definition_at_stage(language_stage, exact=exact) for word in self.words]
 
     def copy_language_at_stage(self, language_stage: int = -1) -> 'Language':
         """Return a copy of this Language as it existed at a given stage.
@@ -527,6 +612,12 @@ class Language:
         includes all words and word forms that were added during the given
         stage.
 
+        The copy is built directly rather than by replaying the history of
+        this Language: every Sound is copied once, each sound change and
+        word form once, and words keep the stages they were added at. Words
+        are not deep-copied (see Word.snapshot_at_stage), and their stems are
+        not evolved until they are needed.
+
         :param language_stage: The stage of this Language to copy. A value of
         -1 (the default) will use the most modern stage.
         :type language_stage: int
@@ -535,18 +626,27 @@ class Language:
         """
         if language_stage < 0:
             language_stage = self.get_current_stage()
-        language = Language(self.name, self.original_phonetic_inventory, self.phonotactics)
-        language.add_words(self.copy_words_at_stage(language_stage=language_stage, include_previous_stages=True,
-                                                    include_language_sound_changes=False,
-                                                    include_all_definitions=True, include_forms=False))
-        for form in copy.deepcopy(self.get_forms_at_stage(language_stage)):
-            language.add_word_form(form, use_current_stage=False)
+        full_sound_inventory = self.get_full_sound_inventory()
+        sound_map = dict(zip(full_sound_inventory, copy.deepcopy(full_sound_inventory)))
+        language = Language(self.name, [sound_map.get(sound, sound) for sound in self.original_phonetic_inventory],
+                            self.phonotactics)
         for stage_change in self.sound_changes[:language_stage]:
             sound_change = copy.copy(stage_change)
             sound_change.sound_change_rule_id = None
+            sound_change.map_sounds(sound_map)
             language.apply_sound_change(sound_change)
-        sound_map = dict(zip(language.get_full_sound_inventory(), copy.deepcopy(language.get_full_sound_inventory())))
-        language.map_sounds(sound_map)
+        for form in copy.deepcopy(self.get_forms_at_stage(language_stage)):
+            form.map_sounds(sound_map)
+            language.add_word_form(form, use_current_stage=False)
+        for word in self.words:
+            if word.original_language_stage <= language_stage:
+                language._attach_word(word.snapshot_at_stage(language_stage, sound_map=sound_map),
+                                      word.original_language_stage)
+        if language_stage == self.get_current_stage():
+            modern_phonetic_inventory = self.modern_phonetic_inventory
+        else:
+            modern_phonetic_inventory = self.get_phonetic_inventory_at_stage(language_stage)
+        language.modern_phonetic_inventory = [sound_map.get(sound, sound) for sound in modern_phonetic_inventory]
         return language
 
     def branch_language_at_stage(self, language_stage: int = -1) -> 'Language':
@@ -568,7 +668,9 @@ class Language:
         changes to propagate to the branched Language as if the branch was
         recreated following the change. Changing the source Language after
         language_stage will not affect the branch, and no change to a branch
-        can affect its source Language.
+        can affect its source Language. Since branched words take their stems
+        from the source words, nothing but their own word sound changes and
+        definitions is copied (see Word.snapshot_at_stage).
 
         Uses the "newest" form of the Language from the stage. In other words,
         includes all words and word forms that were added during the given
@@ -584,9 +686,8 @@ class Language:
             language_stage = self.get_current_stage()
         language = Language('Branch of ' + self.name, self.get_phonetic_inventory_at_stage(language_stage),
                             self.phonotactics)
-        language.add_words(self.copy_words_at_stage(language_stage=language_stage, include_previous_stages=True,
-                                                    include_language_sound_changes=False, branch=True,
-                                                    include_forms=False))
+        language.add_words([word.snapshot_at_stage(language_stage, branch=True) for word in self.words
+                            if word.original_language_stage <= language_stage])
         for form in copy.deepcopy(self.get_forms_at_stage(language_stage)):
             language.add_word_form(form, use_current_stage=False)
             form.original_language_stage = 0
@@ -0,0 +1,246 @@
+from bisect import bisect_right
+from weakref import WeakKeyDictionary
+from conarch.sound import Sound
+from conarch.sound_helpers import CompiledSoundChange, SequenceIndex, copy_sequence
+
+_anchors = WeakKeyDictionary()  # [CompiledSoundChange] = (after, offset) of its boundary step, or None
+
+
+def get_insertion_anchor(sound_change: CompiledSoundChange) -> 'tuple[bool, int] | None':
+    """Return the word boundary an insertion is tied to, if any.
+
+    An insertion (old sounds made only of None) is checked at every gap
+    between sounds, but if its condition requires the word boundary at a
+    fixed distance, as prefix and suffix rules do, only the few gaps near
+    either end of a sequence can ever pass. Conditions that look two or
+    more sounds past the match are not considered, since change_sounds can
+    fail on those near the end of a sequence.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :return: The (after, offset) of the condition step that requires the
+    boundary, or None if the sound change is not an anchored insertion.
+    :rtype: tuple[bool, int] | None
+    """
+    if sound_change in _anchors:
+        return _anchors[sound_change]
+    anchor = None
+    if sound_change.condition and \
+            all(kind == CompiledSoundChange.MATCH_NONE for kind, _ in sound_change.pattern):
+        steps = sound_change.get_condition().steps
+        if all(offset == 1 for after, offset, _, _, _ in steps if after):
+            for after, offset, category, _, inverted in steps:
+                if category == '#' and not inverted:
+                    anchor = (after, offset)
+                    break
+    _anchors[sound_change] = anchor
+    return anchor
+
+
+def apply_anchored_insertion(sound_change: CompiledSoundChange, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
+    """Apply an insertion tied to the word boundary by checking only the
+    gaps where its condition can pass.
+
+    Gives the same result as CompiledSoundChange.apply, including which
+    Sound each gap's condition is checked from, but costs time in
+    proportion to the number of syllables rather than the number of
+    sounds. Any other sound change, and any sequence with an empty
+    syllable, is simply passed on to CompiledSoundChange.apply.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :param sequence: The sequence of sounds. It is not modified.
+    :type sequence: list[list[Sound]]
+    :return: The converted sequence.
+    :rtype: list[list[Sound]]
+    """
+    anchor = get_insertion_anchor(sound_change)
+    if anchor is None or not sequence or any(len(syllable) == 0 for syllable in sequence):
+        return sound_change.apply(sequence)
+    index = SequenceIndex(sequence)
+    syllable_starts = index.syllable_starts
+    length = len(index.sounds)
+    # gaps are numbered by the flat position of the Sound that follows them; the gap after the last Sound is length
+    after, offset = anchor
+    if after:  # checked from the Sound before the gap, or the start of the previous syllable at a syllable start
+        gaps = set(range(0, min(length, -offset) + 1)) | set(range(max(0, length + 1 - offset), length + 1))
+        gaps.update(syllable_starts[1:])
+    else:  # checked from the Sound after the gap
+        gaps = set(range(0, min(length + 1, -offset))) | set(range(max(0, length - offset), length + 1))
+    condition = sound_change.get_condition()
+    passed = set()
+    for gap in gaps:
+        if gap == length:
+            i = len(sequence) - 1
+            j = len(sequence[i])
+            last_i, last_j = i, j - 1
+        else:
+            i = bisect_right(syllable_starts, gap) - 1
+            j = gap - syllable_starts[i]
+            last_i, last_j = i, j - 1
+            if last_j < 0 < last_i:
+                last_i = last_i - 1
+                last_j = 0
+        if condition.evaluate(sequence, i, j, last_i, last_j, index):
+            passed.add(gap)
+    if not passed or sound_change.replacement is None:
+        return copy_sequence(sequence)
+    new_stem = list()
+    position = 0
+    for syllable in sequence:
+        new_syllable = list()
+        for sound in syllable:
+            if position in passed:
+                new_syllable.extend(sound_change.replacement)
+            new_syllable.append(sound)
+            position = position + 1
+        new_stem.append(new_syllable)
+    if length in passed:
+        new_stem[-1].extend(sound_change.replacement)
+    return new_stem
+
+
+def can_share_scan(sound_change: CompiledSoundChange) -> bool:
+    """Return whether a compiled sound change can be matched in a scan
+    shared with other sound changes: it has no condition, its old sounds
+    are all Sounds, and it replaces them with at least one Sound."""
+    if sound_change.condition or not sound_change.replacement:
+        return False
+    return all(kind == CompiledSoundChange.MATCH_ORTHOGRAPHY for kind, _ in sound_change.pattern)
+
+
+class MultiPatternMatcher:
+    """Applies a list of sound changes with as few scans as possible.
+
+    Sound changes are applied in order, exactly as if each were applied
+    with change_sounds, but:
+
+    Anchored insertions (prefix and suffix rules, see
+    get_insertion_anchor) only check the gaps near the ends of a sequence.
+
+    Consecutive sound changes that can share a scan (see can_share_scan)
+    are grouped as long as no sound change in a group can match a Sound
+    that an earlier one matches or produces. Within a group every Sound
+    can start a match of at most one sound change, so a single left to
+    right pass with one dispatch table, keyed on orthography, finds the
+    matches of all of them. Like change_sounds, a failed partial match
+    returns to the start state without retrying from its second Sound.
+
+    Every other sound change gets a scan of its own.
+
+    The matcher holds the compiled form of each rule, so it no longer
+    applies once one of its rules is edited; see is_current.
+    """
+
+    INSERTION = 0
+    SHARED_SCAN = 1
+    SINGLE_SCAN = 2
+
+    def __init__(self, sound_changes: 'list'):
+        self.sound_changes = list(sound_changes)
+        self.compiled = [sound_change.compile() for sound_change in self.sound_changes]
+        self.steps = list()  # (kind, compiled sound changes, [orthography] = index in the group)
+        group = list()
+        owners = dict()
+        seen = set()  # orthographies matched or produced by the group so far
+        for compiled in self.compiled:
+            if can_share_scan(compiled):
+                orthographies = set(value for _, value in compiled.pattern)
+                if orthographies & seen:
+                    self.steps.append((self.SHARED_SCAN, group, owners))
+                    group = list()
+                    owners = dict()
+                    seen = set()
+                for orthography in orthographies:
+                    owners[orthography] = len(group)
+                group.append(compiled)
+                seen.update(orthographies)
+                seen.update(sound.orthographic_transcription for sound in compiled.replacement)
+                continue
+            if group:
+                self.steps.append((self.SHARED_SCAN, group, owners))
+                group = list()
+                owners = dict()
+                seen = set()
+            if get_insertion_anchor(compiled) is not None:
+                self.steps.append((self.INSERTION, [compiled], None))
+            else:
+                self.steps.append((self.SINGLE_SCAN, [compiled], None))
+        if group:
+            self.steps.append((self.SHARED_SCAN, group, owners))
+
+    def is_current(self) -> bool:
+        """Return whether none of the rules have been edited since this
+        matcher was built."""
+        return all(sound_change.compile() is compiled
+                   for sound_change, compiled in zip(self.sound_changes, self.compiled))
+
+    def get_scan_count(self) -> int:
+        """Return the number of full scans of a sequence apply will make."""
+        return len([kind for kind, _, _ in self.steps if kind != self.INSERTION])
+
+    def apply(self, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
+        """Apply every sound change of this matcher to a sequence, in order.
+
+        :param sequence: The sequence of sounds. It is not modified.
+        :type sequence: list[list[Sound]]
+        :return: The converted sequence.
+        :rtype: list[list[Sound]]
+        """
+        sequence = copy_sequence(sequence)
+        for kind, group, owners in self.steps:
+            if kind == self.INSERTION:
+                sequence = apply_anchored_insertion(group[0], sequence)
+            elif kind == self.SHARED_SCAN and len(group) > 1:
+                sequence = self._scan(sequence, group, owners)
+            else:
+                sequence = group[0].apply(sequence)
+        return sequence
+
+    @staticmethod
+    def _scan(sequence: 'list[list[Sound]]', group: 'list[CompiledSoundChange]',
+              owners: 'dict[str, int]') -> 'list[list[Sound]]':
+        matches = dict()  # [flat position of the last Sound of a match] = (flat position of its first Sound, index)
+        active = None
+        match_count = 0
+        match_start = 0
+        position = 0
+        for syllable in sequence:
+            for sound in syllable:
+                owner = owners.get(sound.orthographic_transcription)
+                if active is not None and owner != active:  # the Sound fails the active match
+                    active = None
+                    match_count = 0
+                elif active is not None:
+                    if group[active].pattern[match_count][1] == sound.orthographic_transcription:
+                        match_count = match_count + 1
+                    else:  # failed partial match: the failing Sound is not retried
+                        active = None
+                        match_count = 0
+                    owner = None
+                if owner is not None and group[owner].pattern[0][1] == sound.orthographic_transcription:
+                    active = owner
+                    match_count = 1
+                    match_start = position
+                if active is not None and match_count >= len(group[active].pattern):
+                    matches[position] = (match_start, active)
+                    active = None
+                    match_count = 0
+                position = position + 1
+        if not matches:
+            return sequence
+        removed = set()
+        for end, (start, _) in matches.items():
+            removed.update(range(start, end + 1))
+        new_stem = list()
+        position = 0
+        for syllable in sequence:
+            new_syllable = list()
+            for sound in syllable:
+                if position not in removed:
+                    new_syllable.append(sound)
+                elif position in matches:
+                    new_syllable.extend(group[matches[position][1]].replacement)
+                position = position + 1
+            new_stem.append(new_syllable)
+        return new_stem
@@ -0,0 +1,131 @@
+from conarch.sound import Sound
+
+_automata = dict()  # [phonotactics string] = PhonotacticsAutomaton
+_IGNORED_CHARACTERS = '1234567890,'  # chances and separators; they never stand for a sound
+_IGNORED_IN_BRACES = ' ;/|'
+
+
+class PhonotacticsAutomaton:
+    """A phonotactics string compiled into an automaton that checks
+    syllables.
+
+    Every character of the string is a phonotactics category that one
+    Sound of the syllable must have, {} holds a choice of categories for a
+    single Sound, and () makes its contents optional (an optional group
+    may start with a digit for the chance the generator includes it, which
+    is ignored here, as are commas). Groups may be nested.
+
+    The string becomes a small nondeterministic automaton with one state
+    per position in the string. Sets of states are turned into
+    deterministic states lazily, keyed by the phonotactics categories of
+    each Sound read, so checking a syllable costs one dictionary lookup
+    per Sound once the automaton has seen sounds like it, however many
+    optional groups the string has.
+    """
+
+    def __init__(self, phonotactics: str):
+        self.phonotactics = phonotactics
+        self._transitions = list()  # [state] = list of (categories, next state)
+        self._epsilons = list()  # [state] = list of next states
+        start = self._add_state()
+        self._accept = self._compile(phonotactics, 0, start, top_level=True)[1]
+        self._start = self._get_closure([start])
+        self._steps = dict()  # [(state set, phonotactics categories of a Sound)] = next state set
+
+    def _add_state(self) -> int:
+        self._transitions.append(list())
+        self._epsilons.append(list())
+        return len(self._transitions) - 1
+
+    def _compile(self, phonotactics: str, index: int, state: int, top_level: bool = False) -> 'tuple[int, int]':
+        """Add the states for the string from index up to the end of its
+        group, starting from a state. Return the index after the group and
+        the state reached at its end."""
+        while index < len(phonotactics):
+            char = phonotactics[index]
+            if char == ')':
+                assert not top_level, 'Unmatched ) in phonotactics: ' + phonotactics
+                return index + 1, state
+            elif char == '(':
+                group_end, end_state = self._compile(phonotactics, index + 1, state)
+                self._epsilons[state].append(end_state)  # the group may be left out
+                index = group_end
+                state = end_state
+            elif char == '{':
+                close = phonotactics.find('}', index)
+                assert close >= 0, 'Unmatched { in phonotactics: ' + phonotactics
+                categories = ''.join([c for c in phonotactics[index + 1:close]
+                                      if c not in _IGNORED_CHARACTERS + _IGNORED_IN_BRACES + '{'])
+                next_state = self._add_state()
+                self._transitions[state].append((categories, next_state))
+                index = close + 1
+                state = next_state
+            else:
+                if char not in _IGNORED_CHARACTERS:
+                    next_state = self._add_state()
+                    self._transitions[state].append((char, next_state))
+                    state = next_state
+                index = index + 1
+        assert top_level, 'Unmatched ( in phonotactics: ' + phonotactics
+        return index, state
+
+    def _get_closure(self, states: 'list[int]') -> frozenset:
+        closure = set(states)
+        pending = list(states)
+        while pending:
+            for next_state in self._epsilons[pending.pop()]:
+                if next_state not in closure:
+                    closure.add(next_state)
+                    pending.append(next_state)
+        return frozenset(closure)
+
+    def _step(self, states: frozenset, categories: str) -> frozenset:
+        key = (states, categories)
+        next_states = self._steps.get(key)
+        if next_states is None:
+            next_states = self._get_closure([next_state for state in states
+                                             for slot_categories, next_state in self._transitions[state]
+                                             if any(category in slot_categories for category in categories)])
+            self._steps[key] = next_states
+        return next_states
+
+    def fits_categories(self, categories: 'list[str]') -> bool:
+        """Return whether a syllable fits the phonotactics.
+
+        :param categories: The phonotactics categories of each Sound in the
+        syllable. A Sound fills a place in the phonotactics if any one of
+        its categories is allowed there.
+        :type categories: list[str]
+        :return: Whether the syllable fits.
+        :rtype: bool
+        """
+        states = self._start
+        for sound_categories in categories:
+            states = self._step(states, sound_categories)
+            if not states:
+                return False
+        return self._accept in states
+
+    def fits_syllable(self, syllable: 'list[Sound]') -> bool:
+        return self.fits_categories([sound.phonotactics_categories for sound in syllable])
+
+    def get_violations(self, stem: 'list[list[Sound]]') -> 'list[int]':
+        """Return the index of every syllable of a stem that does not fit
+        the phonotactics."""
+        return [i for i, syllable in enumerate(stem) if not self.fits_syllable(syllable)]
+
+
+def get_phonotactics_automaton(phonotactics: str) -> PhonotacticsAutomaton:
+    """Return the compiled automaton for a phonotactics string, compiling it
+    only the first time the string is seen.
+
+    :param phonotactics: The phonotactics string.
+    :type phonotactics: str
+    :return: The compiled automaton.
+    :rtype: PhonotacticsAutomaton
+    """
+    automaton = _automata.get(phonotactics)
+    if automaton is None:
+        automaton = PhonotacticsAutomaton(phonotactics)
+        _automata[phonotactics] = automaton
+    return automaton
@@ -0,0 +1,223 @@
+import re
+from weakref import WeakKeyDictionary
+from conarch.flat_stem import SoundTable
+from conarch.multi_pattern import apply_anchored_insertion
+from conarch.sound import Sound
+from conarch.sound_helpers import CompiledSoundChange, copy_sequence, replace_flat_matches
+
+_PRIVATE_USE_SIZE = 0xF8FF - 0xE000 + 1
+
+
+def get_sound_character(sound_id: int) -> str:
+    """Return the private use character that stands for a sound id.
+
+    Ids run through the Private Use Area first, then through
+    Supplementary Private Use Area-A.
+    """
+    if sound_id < _PRIVATE_USE_SIZE:
+        return chr(0xE000 + sound_id)
+    assert sound_id - _PRIVATE_USE_SIZE < 0xFFFE, 'Too many distinct sounds to encode'
+    return chr(0xF0000 + sound_id - _PRIVATE_USE_SIZE)
+
+
+def can_compile(sound_change: CompiledSoundChange) -> bool:
+    """Return whether a compiled sound change can be turned into a regular
+    expression. Old sounds containing None (insertions) cannot."""
+    return all(kind != CompiledSoundChange.MATCH_NONE for kind, _ in sound_change.pattern)
+
+
+class RegexEncoder:
+    """Encodes sequences of sounds as strings and compiles sound changes
+    into regular expressions over them.
+
+    Every Sound encoded gets an id from the encoder's own Sound Table,
+    which picks its code point, so an encoder normally belongs to the sound
+    change timeline of one Language (see SoundChangeTimeline) and only
+    holds the sounds of that Language.
+
+    Character classes list the sounds encoded so far that fit them. When
+    new sounds are encoded, a cached expression is only rebuilt if one of
+    them fits one of its character classes.
+    """
+
+    def __init__(self):
+        self.table = SoundTable()
+        self._patterns = WeakKeyDictionary()  # [CompiledSoundChange] = (table size checked, pattern, class tests)
+
+    def encode_sequence(self, sequence: 'list[list[Sound]]') -> str:
+        """Encode a sequence of sounds as a string with one character per
+        Sound.
+
+        Syllables are not marked: matches and conditions both run across
+        syllables, so the string holds the sounds exactly as change_sounds
+        sees them, and the nested sequence is used again to put the result
+        back into syllables.
+
+        :param sequence: The sequence of sounds.
+        :type sequence: list[list[Sound]]
+        :return: The encoded string.
+        :rtype: str
+        """
+        return ''.join([get_sound_character(self.table.intern(sound)) for syllable in sequence for sound in syllable])
+
+    @staticmethod
+    def _fits(sound_change: CompiledSoundChange, test: tuple, sound: Sound) -> bool:
+        """Return whether a Sound belongs in a character class, described
+        as ('element', index in the old sounds), ('category', category), or
+        ('sound', Sound) so that the cache never refers to its own key."""
+        kind, value = test
+        if kind == 'element':
+            return sound_change.element_matches(value, sound)
+        if kind == 'category':
+            return value in sound.phonotactics_categories
+        return value == sound
+
+    def _character_class(self, sound_change: CompiledSoundChange, test: tuple, tests: list) -> str:
+        tests.append(test)
+        characters = [re.escape(get_sound_character(sound_id)) for sound_id in range(1, len(self.table))
+                      if self._fits(sound_change, test, self.table.get_sound(sound_id))]
+        if not characters:
+            return '(?!)'
+        return '[' + ''.join(characters) + ']'
+
+    def _condition_lookarounds(self, sound_change: CompiledSoundChange, tests: list) -> 'tuple[str, str]':
+        """Return the lookbehinds that go before a match and the lookaheads
+        that go after it, one per step of the condition.
+
+        A step before the match at offset -k checks the character k places
+        before the start of the match, and the word boundary there means
+        there are fewer than k characters before it. A step after the match
+        at offset k checks the character k - 1 places after its end, and the
+        boundary there means fewer than k characters are left.
+        """
+        condition = sound_change.get_condition()
+        if condition is None:
+            return '', ''
+        before = ''
+        after = ''
+        for (step_after, offset, category, sound, inverted), boundary_match in zip(condition.steps,
+                                                                                   condition.boundary_matches):
+            if category is not None:
+                character_class = self._character_class(sound_change, ('category', category), tests)
+            else:
+                character_class = self._character_class(sound_change, ('sound', sound), tests)
+            distance = abs(offset)
+            if step_after:
+                sound_test = '(?=.{' + str(distance - 1) + '}' + character_class + ')'
+                boundary_test = '(?!.{' + str(distance) + '})'
+                not_sound_test = '(?!.{' + str(distance - 1) + '}' + character_class + ')'
+                not_boundary_test = '(?=.{' + str(distance) + '})'
+            else:
+                sound_test = '(?<=' + character_class + '.{' + str(distance - 1) + '})'
+                boundary_test = '(?<!.{' + str(distance) + '})'
+                not_sound_test = '(?<!' + character_class + '.{' + str(distance - 1) + '})'
+                not_boundary_test = '(?<=.{' + str(distance) + '})'
+            if inverted:
+                test = not_sound_test + (not_boundary_test if boundary_match else '')
+            elif boundary_match:
+                test = '(?:' + sound_test + '|' + boundary_test + ')'
+            else:
+                test = sound_test
+            if step_after:
+                after = after + test
+            else:
+                before = before + test
+        return before, after
+
+    def _is_current(self, sound_change: CompiledSoundChange, cached: tuple) -> bool:
+        """Return whether none of the sounds encoded since a pattern was last
+        checked fit any of its character classes."""
+        size, pattern, tests = cached
+        for sound_id in range(size, len(self.table)):
+            sound = self.table.get_sound(sound_id)
+            if any(self._fits(sound_change, test, sound) for test in tests):
+                return False
+        return True
+
+    def get_pattern(self, sound_change: CompiledSoundChange) -> 're.Pattern':
+        """Return the regular expression for a compiled sound change.
+
+        The expression is an alternation that consumes the encoded string in
+        the same steps change_sounds takes through a sequence, so that
+        re.finditer never retries a failed partial match from its second
+        Sound:
+
+        a full match that passes the condition (the only alternative
+        captured as 'match'), then a full match that fails it, then every
+        partial match from longest to shortest together with the Sound that
+        broke it, then a run of sounds that cannot start a match, and
+        finally any single Sound.
+
+        :param sound_change: The compiled sound change.
+        :type sound_change: CompiledSoundChange
+        :return: The compiled regular expression.
+        :rtype: re.Pattern
+        """
+        cached = self._patterns.get(sound_change)
+        if cached is not None and self._is_current(sound_change, cached):
+            if cached[0] != len(self.table):
+                self._patterns[sound_change] = (len(self.table), cached[1], cached[2])
+            return cached[1]
+        tests = list()
+        elements = [self._character_class(sound_change, ('element', k), tests)
+                    for k in range(len(sound_change.pattern))]
+        full_match = ''.join(elements)
+        before, after = self._condition_lookarounds(sound_change, tests)
+        alternatives = ['(?P<match>' + before + full_match + after + ')']
+        if before or after:
+            alternatives.append(full_match)
+        for k in range(len(elements) - 1, 0, -1):
+            alternatives.append(''.join(elements[:k]) + '(?:.|$)')
+        if elements[0].startswith('['):  # skip over every Sound that cannot start a match at once
+            alternatives.append('[^' + elements[0][1:] + '+')
+        alternatives.append('.')
+        pattern = re.compile('|'.join(alternatives), re.DOTALL)
+        self._patterns[sound_change] = (len(self.table), pattern, tests)
+        return pattern
+
+    def apply_sound_change(self, sound_change, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
+        """Apply a sound change to a sequence using a regular expression.
+
+        Gives the same result as change_sounds. Insertions, and conditioned
+        sound changes on sequences with an empty syllable (which conditions
+        treat as a word boundary), are applied without a regular expression.
+
+        :param sound_change: The sound change to apply.
+        :type sound_change: SoundChangeRule | CompiledSoundChange
+        :param sequence: The sequence of sounds. It is not modified.
+        :type sequence: list[list[Sound]]
+        :return: The converted sequence.
+        :rtype: list[list[Sound]]
+        """
+        if not isinstance(sound_change, CompiledSoundChange):
+            sound_change = sound_change.compile()
+        if not can_compile(sound_change) or \
+                (sound_change.condition and any(len(syllable) == 0 for syllable in sequence)):
+            return apply_anchored_insertion(sound_change, sequence)
+        encoded = self.encode_sequence(sequence)
+        match_starts = [match.start() for match in self.get_pattern(sound_change).finditer(encoded)
+                        if match.lastgroup == 'match']
+        if not match_starts:
+            return copy_sequence(sequence)
+        replacement = list(sound_change.replacement) if sound_change.replacement is not None else list()
+        return replace_flat_matches(sequence, match_starts, len(sound_change.pattern), replacement)
+
+
+def apply_sound_change(sound_change, sequence: 'list[list[Sound]]',
+                       encoder: 'RegexEncoder | None' = None) -> 'list[list[Sound]]':
+    """Apply a sound change to a sequence using a regular expression, as in
+    RegexEncoder.apply_sound_change.
+
+    :param sound_change: The sound change to apply.
+    :type sound_change: SoundChangeRule | CompiledSoundChange
+    :param sequence: The sequence of sounds. It is not modified.
+    :type sequence: list[list[Sound]]
+    :param encoder: The encoder to use, e.g. that of the Language the
+    sequence belongs to. A new one is used if it is not given.
+    :type encoder: RegexEncoder | None
+    :return: The converted sequence.
+    :rtype: list[list[Sound]]
+    """
+    if encoder is None:
+        encoder = RegexEncoder()
+    return encoder.apply_sound_change(sound_change, sequence)
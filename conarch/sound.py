@@ -7,8 +7,18 @@ class Sound:
     for phonotactics (e.g. C for consonant, etc.), relative frequency in
     the language in which it appears, a description, and a number of rules
     for automatic generation of words.
+
+    Evolved stems share Sound objects with the base stem and with the
+    sound changes that produced them rather than copying them, so editing
+    a Sound in place edits it everywhere it is used; copy it first if only
+    one Word should see the change. edit_count counts every such edit, to
+    any Sound, made after the Sound was created, so that anything computed
+    from the orthography or categories of sounds can tell that it may be
+    out of date.
     """
 
+    edit_count = 0
+
     def __init__(self, orthographic_transcription: str, ipa_transcription: str = '', phonotactics_categories: str = '',
                  frequency: float = 1.0, description: str = ''):
         self.sound_id = None
@@ -25,6 +35,12 @@ class Sound:
         self.can_appear_in_clusters = True
         self.can_cluster_self = True
         self.can_duplicate_across_syllable_boundaries = True
+        self._created = True
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_') and getattr(self, '_created', False) and getattr(self, name, None) != value:
+            Sound.edit_count += 1
+        super().__setattr__(name, value)
 
     def set_generation_options(self, options: 'int | str'):
         """Set the 8 generation options of this Sound based on one integer.
@@ -195,3 +211,32 @@ class Sound:
         if self.ipa_transcription:
             string = string + ' /' + self.ipa_transcription + '/'
         return string
+
+
+class BoundarySound(Sound):
+    """The word boundary, represented by the character '#' with the
+    phonotactics category '#'.
+
+    Equal to Sound('#', phonotactics_categories='#'), but read-only so
+    that a single instance, WORD_BOUNDARY, can be handed out wherever a
+    lookup runs off either end of a sequence. Copying it returns the same
+    instance.
+    """
+
+    def __init__(self):
+        super().__init__('#', phonotactics_categories='#')
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError('The word boundary cannot be modified')
+        super().__setattr__(name, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+WORD_BOUNDARY = BoundarySound()
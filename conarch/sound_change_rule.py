@@ -14,11 +14,20 @@ class SoundChangeRule:
 
     A Sound Change Rule also knows when in the evolution of a language it
     was added in the case that it represents a historical sound change.
+
+    version counts the edits to a rule made after it has been used, plus
+    every change of its stage once that was set, so that anything computed
+    from the rule can tell whether it is out of date. edit_count counts the
+    same edits over all rules; while it has not changed, nothing computed
+    from any rule needs to check their versions again.
     """
 
+    edit_count = 0
+
     def __init__(self, old_sounds: 'Sound | list[Sound] | None', new_sounds: 'Sound | list[Sound]', condition: str = '',
                  condition_sounds: 'list[Sound] | None' = None, stage: int = -1):
         self.sound_change_rule_id = None
+        self.version = 0
         self.old_sounds = old_sounds
         if type(self.old_sounds) is not list:
             self.old_sounds = [self.old_sounds]
@@ -31,6 +40,87 @@ class SoundChangeRule:
         self.condition_sounds = condition_sounds
         self.stage = stage
 
+    @property
+    def stage(self) -> int:
+        return self._stage
+
+    @stage.setter
+    def stage(self, stage: int):
+        old_stage = getattr(self, '_stage', stage)
+        # a rule may have been left out at its old stage, unless it had none and has never been used
+        if old_stage != stage and (old_stage != -1 or getattr(self, '_compiled', None) is not None):
+            self.version = self.version + 1
+            SoundChangeRule.edit_count += 1
+        self._stage = stage
+
+    @property
+    def old_sounds(self) -> 'list[Sound | str | None]':
+        return self._old_sounds
+
+    @old_sounds.setter
+    def old_sounds(self, old_sounds: 'list[Sound | str | None]'):
+        self._old_sounds = old_sounds
+        self.invalidate()
+
+    @property
+    def new_sounds(self) -> 'list[Sound] | None':
+        return self._new_sounds
+
+    @new_sounds.setter
+    def new_sounds(self, new_sounds: 'list[Sound] | None'):
+        self._new_sounds = new_sounds
+        self.invalidate()
+
+    @property
+    def condition(self) -> str:
+        return self._condition
+
+    @condition.setter
+    def condition(self, condition: str):
+        self._condition = condition
+        self.invalidate()
+
+    @property
+    def condition_sounds(self) -> 'list[Sound] | None':
+        return self._condition_sounds
+
+    @condition_sounds.setter
+    def condition_sounds(self, condition_sounds: 'list[Sound] | None'):
+        self._condition_sounds = condition_sounds
+        self.invalidate()
+
+    def invalidate(self):
+        """Discard the compiled form of this rule.
+
+        Called automatically whenever the old sounds, new sounds, condition,
+        or condition sounds are replaced. Call it manually after modifying
+        one of those lists in place.
+        """
+        if getattr(self, '_compiled', None) is not None:  # only a rule that has been used can be out of date
+            self.version = self.version + 1
+            SoundChangeRule.edit_count += 1
+        self._compiled = None
+
+    def compile(self) -> sound_helpers.CompiledSoundChange:
+        """Return a reusable matcher that applies this rule to sequences.
+
+        The matcher is built on first use and cached until the rule is
+        edited, so replaying the same rule against many words only resolves
+        its sounds and condition once. It is also built again after any
+        Sound is edited in place (see Sound.edit_count), since it copies the
+        orthography of the rule's sounds.
+
+        :return: The compiled form of this rule.
+        :rtype: CompiledSoundChange
+        """
+        if self._compiled is not None and self._sound_edit_count != Sound.edit_count:
+            self.invalidate()
+        if self._compiled is None:
+            self._compiled = sound_helpers.CompiledSoundChange(self.old_sounds, self.new_sounds, self.condition,
+                                                               self.condition_sounds)
+            self._sound_edit_count = Sound.edit_count
+        return self._compiled
+
     def __str__(self):
         output = ''
         for sound in self.old_sounds:
@@ -0,0 +1,80 @@
+import copy
+from conarch.regex_backend import RegexEncoder
+from conarch.transducer import SoundChangeTransducer
+
+# the most Sound Change Transducers a timeline keeps; once there are more, the least recently used one is dropped
+max_transducers = 64
+
+
+class SoundChangeTimeline(list):
+    """The historical sound changes of a Language, one for each stage.
+
+    A single timeline is shared as the language sound changes of every Word
+    in the Language and of all their forms, so a new stage is added for all
+    of them by appending one sound change rather than by giving it to each
+    Word. Each Word only applies the part of the timeline from its original
+    stage up to its current stage (see Word.get_current_stage), and its
+    cached sound change order picks up new stages the next time it is read.
+
+    Words never append to a shared timeline themselves: a Word that is
+    given a language sound change of its own (add_language_sound_change)
+    first takes a copy of the timeline as a plain list.
+
+    The timeline also keeps the Sound Change Transducers built for the
+    most recently used ranges of its stages (see get_transducer and
+    max_transducers) and a Regex Encoder for the sounds of
+    its Language (see get_regex_encoder), so every Word evolved with the
+    'transducer' or 'regex' backend shares them. A deep copy starts without
+    either.
+    """
+
+    def __init__(self, sound_changes: 'list' = ()):
+        super().__init__(sound_changes)
+        self._transducers = dict()  # [(first stage, last stage)] = SoundChangeTransducer, least recently used first
+        self._regex_encoder = None
+
+    def __deepcopy__(self, memo: dict) -> 'SoundChangeTimeline':
+        timeline = SoundChangeTimeline()
+        memo[id(self)] = timeline
+        timeline.extend([copy.deepcopy(sound_change, memo) for sound_change in self])
+        return timeline
+
+    def get_regex_encoder(self) -> RegexEncoder:
+        """Return the Regex Encoder that words sharing this timeline are
+        encoded with, so its table only holds the sounds of their Language."""
+        if self._regex_encoder is None:
+            self._regex_encoder = RegexEncoder()
+        return self._regex_encoder
+
+    def get_transducer(self, first_stage: int, last_stage: int) -> SoundChangeTransducer:
+        """Return the sound changes from one stage up to another compiled
+        into a Sound Change Transducer.
+
+        The transducer is kept and reused until a sound change in its range
+        is replaced or edited, or until max_transducers transducers of other
+        ranges have been used since.
+
+        :param first_stage: The stage of the first sound change to include.
+        :type first_stage: int
+        :param last_stage: The stage to stop at; its sound change is not
+        included.
+        :type last_stage: int
+        :return: A transducer applying every sound change in the range.
+        :rtype: SoundChangeTransducer
+        """
+        sound_changes = self[first_stage:last_stage]
+        transducer = self._transducers.pop((first_stage, last_stage), None)
+        if transducer is None or len(transducer.sound_changes) != len(sound_changes) or \
+                any(a is not b for a, b in zip(transducer.sound_changes, sound_changes)) or not transducer.is_current():
+            transducer = SoundChangeTransducer(sound_changes)
+        self._transducers[(first_stage, last_stage)] = transducer  # moved to the end as the most recently used
+        if len(self._transducers) > max_transducers:
+            del self._transducers[next(iter(self._transducers))]
+        return transducer
+
+    def get_stage_of(self, sound_change) -> int:
+        """Return the stage of a sound change in this timeline, or -1 if it
+        is not one of its sound changes."""
+        if 0 <= sound_change.stage < len(self) and self[sound_change.stage] is sound_change:
+            return sound_change.stage
+        return -1
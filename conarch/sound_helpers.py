@@ -1,8 +1,9 @@
 import copy
-from conarch.sound import Sound
+from conarch.sound import Sound, WORD_BOUNDARY
 
 
-def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int = 1, backwards: bool = False) -> Sound:
+def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int = 1, backwards: bool = False,
+                     index: 'SequenceIndex | None' = None) -> Sound:
     """Return a Sound in a sequence a certain number of sounds away.
 
     Works across syllables, so the next Sound after the last Sound in a
@@ -12,8 +13,8 @@ def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int =
     return the Sound after that, and so on. -1 steps will return the Sound
     preceding the current Sound.
 
-    If there is no Sound at the target position, return a new Sound
-    represented by the character '#'.
+    If there is no Sound at the target position, return WORD_BOUNDARY, a
+    read-only Sound represented by the character '#'.
 
     :param sequence: The sequence of sounds.
     :type sequence: list[list[Sound]]
@@ -29,15 +30,30 @@ def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int =
     :param backwards: Whether to search in the opposite direction implied
     by the sign of the 'steps' parameter.
     :type backwards: bool
-    :return: The Sound at the target position, or a new Sound represented
-    by '#' if there is no Sound there.
+    :param index: A Sequence Index of the sequence, to find the Sound in
+    constant time rather than by stepping through the sequence.
+    :type index: SequenceIndex | None
+    :return: The Sound at the target position, or WORD_BOUNDARY if there
+    is no Sound there.
     :rtype: Sound
     """
+    if index is not None:
+        sound = index.get_nearby_sound(i, j, -steps if backwards else steps)
+    else:
+        sound = _find_nearby_sound(sequence, i, j, steps, backwards)
+    if sound is None:
+        return WORD_BOUNDARY
+    return sound
+
+
+def _find_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int = 1,
+                       backwards: bool = False) -> 'Sound | None':
+    """Return the Sound get_nearby_sound would, or None at a word boundary."""
     # to refer from a hypothetical character after the end of a sequence, leave i and increment j by 1
     # i.e. don't start a new syllable
     assert steps != 0
     if i < 0:
-        return Sound('#', phonotactics_categories='#')
+        return None
     if steps < 0:
         backwards = not backwards
         steps = steps * -1
@@ -55,7 +71,7 @@ def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int =
         if ii < len(sequence) and jj < len(sequence[ii]):
             return sequence[ii][jj]
         else:
-            return Sound('#', phonotactics_categories='#')
+            return None
     else:
         while stepped < steps:
             if jj > 0:
@@ -66,10 +82,57 @@ def get_nearby_sound(sequence: 'list[list[Sound]]', i: int, j: int, steps: int =
                 jj = len(sequence[ii]) - 1
                 stepped = stepped + 1
             else:
-                return Sound('#', phonotactics_categories='#')
+                return None
         return sequence[ii][jj]
 
 
+class SequenceIndex:
+    """A flat view of a sequence of sounds for constant time lookups.
+
+    Stores every Sound of the sequence in one list along with the position
+    at which each syllable starts, so the Sound any number of steps away
+    from another is found with one addition instead of by stepping through
+    syllables.
+
+    Only describes sequences without empty syllables, which stepping
+    treats as a word boundary; get_sequence_index returns None for those.
+    The index is not updated if the sequence changes.
+    """
+
+    __slots__ = ('sounds', 'syllable_starts')
+
+    def __init__(self, sequence: 'list[list[Sound]]'):
+        self.sounds = list()
+        self.syllable_starts = list()
+        for syllable in sequence:
+            self.syllable_starts.append(len(self.sounds))
+            self.sounds.extend(syllable)
+
+    def get_position(self, i: int, j: int) -> int:
+        """Return the flat position of Sound j in syllable i.
+
+        j may be -1 for the position before a syllable, or the length of
+        the last syllable for the position after the sequence.
+        """
+        return self.syllable_starts[i] + j
+
+    def get_nearby_sound(self, i: int, j: int, steps: int) -> 'Sound | None':
+        """Return the Sound a number of steps away from Sound j in syllable
+        i (negative steps go backwards), or None at a word boundary."""
+        position = self.syllable_starts[i] + j + steps
+        if 0 <= position < len(self.sounds):
+            return self.sounds[position]
+        return None
+
+
+def get_sequence_index(sequence: 'list[list[Sound]]') -> 'SequenceIndex | None':
+    """Return a Sequence Index of a sequence, or None if the sequence has an
+    empty syllable (or no syllables) and must be stepped through instead."""
+    if not sequence or any(len(syllable) == 0 for syllable in sequence):
+        return None
+    return SequenceIndex(sequence)
+
+
 def check_condition(sequence: 'list[list[Sound]]', i1: int, j1: int, i2: int, j2: int, condition: str,
                     condition_sounds: 'list[Sound] | None' = None) -> bool:
     """Check if a Sound (or sounds) in a sequence matches a condition.
@@ -108,35 +171,363 @@ def check_condition(sequence: 'list[list[Sound]]', i1: int, j1: int, i2: int, j2
     subsequence of sounds.
     :rtype: bool
     """
-    assert '_' in condition
-    if '@' in condition:
-        assert type(condition_sounds) is list and len(condition_sounds) >= condition.count('@')
-    conditions_met = True
-    sound_position = condition.index('_')
-    condition_sounds_used = 0
-    k = 0
-    while k < len(condition) and conditions_met:
-        if k != sound_position:
-            inverted = condition[k] == '!'
-            if k < sound_position:
-                if inverted:
+    return CompiledCondition(condition, condition_sounds).evaluate(sequence, i1, j1, i2, j2)
+
+
+class CompiledCondition:
+    """A condition string turned into a short list of checks.
+
+    check_condition would otherwise walk the condition character by
+    character for every candidate match, working out again which
+    characters are negated, how far away each one looks, and which of the
+    condition sounds each '@' refers to. Here that is done once and each
+    character becomes a step of the form (after, offset, category, sound,
+    inverted):
+
+    after: whether the offset counts from the last Sound of the match
+    (True) or from its first Sound (False).
+    offset: the distance to the Sound being checked, e.g. -1 for the Sound
+    before the match.
+    category: the phonotactics category to look for, or None for '@'.
+    sound: the condition Sound to compare against for '@', otherwise None.
+    inverted: whether the step was negated with '!'.
+
+    Steps are checked in order and evaluation stops at the first failure.
+    """
+
+    def __init__(self, condition: str, condition_sounds: 'list[Sound] | None' = None):
+        assert '_' in condition
+        if '@' in condition:
+            assert type(condition_sounds) is list and len(condition_sounds) >= condition.count('@')
+        self.condition = condition
+        steps = list()
+        sound_position = condition.index('_')
+        condition_sounds_used = 0
+        k = 0
+        while k < len(condition):
+            if k != sound_position:
+                inverted = condition[k] == '!'
+                after = k > sound_position
+                if not after and inverted:
                     k = k + 1  # negation preceding _: check position relative to character that is negated
-                target_sound = get_nearby_sound(sequence, i1, j1, k - sound_position)
-            else:
-                target_sound = get_nearby_sound(sequence, i2, j2, k - sound_position)
-                if inverted:
+                offset = k - sound_position
+                if after and inverted:
                     k = k + 1  # negation following _: check position relative to !, then advance
-            if condition[k] == '@':  # @ here tells the code to check against the next sound in condition_sounds
-                if (not inverted and condition_sounds[condition_sounds_used] != target_sound) or \
-                        (inverted and condition_sounds[condition_sounds_used] == target_sound):
-                    conditions_met = False
-                condition_sounds_used = condition_sounds_used + 1
-            else:  # anything other than @, _, and ! assumed to be a word category (# is handled in get_nearby_sound)
-                if (not inverted and condition[k] not in target_sound.phonotactics_categories) or \
-                   (inverted and condition[k] in target_sound.phonotactics_categories):
-                    conditions_met = False
-        k = k + 1
-    return conditions_met
+                if condition[k] == '@':  # @ here means the next sound in condition_sounds
+                    sound = condition_sounds[condition_sounds_used]
+                    condition_sounds_used = condition_sounds_used + 1
+                    steps.append((after, offset, None, sound, inverted))
+                else:  # anything other than @, _, and ! is a word category (# matches the word boundary)
+                    steps.append((after, offset, condition[k], None, inverted))
+            k = k + 1
+        self.steps = tuple(steps)
+        self.boundary_matches = tuple((category == '#') if sound is None else (sound == WORD_BOUNDARY)
+                                      for _, _, category, sound, _ in self.steps)
+
+    def evaluate(self, sequence: 'list[list[Sound]]', i1: int, j1: int, i2: int, j2: int,
+                 index: 'SequenceIndex | None' = None) -> bool:
+        """Check if a Sound (or sounds) in a sequence matches this condition.
+
+        Takes the same positions as check_condition, plus an optional
+        Sequence Index of the sequence to look up neighbouring sounds with.
+
+        :return: Whether the condition is matched by the specified Sound or
+        subsequence of sounds.
+        :rtype: bool
+        """
+        for (after, offset, category, sound, inverted), boundary_match in zip(self.steps, self.boundary_matches):
+            if index is not None:
+                target_sound = index.get_nearby_sound(i2, j2, offset) if after else \
+                    index.get_nearby_sound(i1, j1, offset)
+            elif after:
+                target_sound = _find_nearby_sound(sequence, i2, j2, offset)
+            else:
+                target_sound = _find_nearby_sound(sequence, i1, j1, offset)
+            if target_sound is None:
+                matched = boundary_match
+            elif category is not None:
+                matched = category in target_sound.phonotactics_categories
+            else:
+                matched = sound == target_sound
+            if matched == inverted:
+                return False
+        return True
+
+
+class CompiledSoundChange:
+    """A sound change prepared once so it can be applied to many sequences.
+
+    Resolves everything change_sounds would otherwise work out again on
+    every call: the old sounds become a tuple of (kind, value) pairs that
+    can be tested against a Sound without inspecting types, the new sounds
+    become a ready-made replacement tuple, and the condition is compiled
+    into a CompiledCondition the first time it is needed.
+
+    Instances should be treated as read-only. A Sound Change Rule creates
+    and caches one through SoundChangeRule.compile() and discards it
+    whenever the rule is edited.
+
+    Sounds are never copied: the returned sequence is made of new lists,
+    but the Sound objects in it are the same objects found in the input
+    sequence and in the replacement, so stems evolved from one another
+    share their sounds structurally.
+    """
+
+    MATCH_NONE = 0  # None in the old sounds: matches without consuming a Sound
+    MATCH_ORTHOGRAPHY = 1  # a Sound: matches on orthographic transcription
+    MATCH_CATEGORY = 2  # a str: matches on phonotactics category
+    MATCH_NEVER = 3  # anything else can never be matched
+
+    def __init__(self, sounds_before: 'Sound | list[Sound] | None | str | list[str]',
+                 sounds_after: 'Sound | list[Sound] | None', condition: str = '',
+                 condition_sounds: 'list[Sound] | None' = None):
+        if type(sounds_before) is not list:
+            sounds_before = [sounds_before]
+        if type(sounds_after) is not list:
+            sounds_after = [sounds_after]
+        if len(sounds_after) == 1 and sounds_after[0] is None:
+            sounds_after = None
+        pattern = list()
+        for sound in sounds_before:
+            if sound is None:
+                pattern.append((self.MATCH_NONE, None))
+            elif isinstance(sound, Sound):
+                pattern.append((self.MATCH_ORTHOGRAPHY, sound.orthographic_transcription))
+            elif type(sound) is str:
+                pattern.append((self.MATCH_CATEGORY, sound))
+            else:
+                pattern.append((self.MATCH_NEVER, None))
+        self.pattern = tuple(pattern)
+        self.replacement = tuple(sounds_after) if sounds_after is not None else None
+        self.condition = condition if condition else ''
+        self.condition_sounds = list(condition_sounds) if condition_sounds is not None else None
+        self._compiled_condition = None
+
+    def get_condition(self) -> 'CompiledCondition | None':
+        """Return the compiled condition, or None if there is no condition.
+
+        The condition is compiled the first time a full match needs it.
+        """
+        if self._compiled_condition is None and self.condition:
+            self._compiled_condition = CompiledCondition(self.condition, self.condition_sounds)
+        return self._compiled_condition
+
+    def element_matches(self, index: int, sound: Sound) -> bool:
+        """Return whether a Sound matches one element of the old sounds.
+
+        :param index: The position of the element in the old sounds.
+        :type index: int
+        :param sound: The Sound to test.
+        :type sound: Sound
+        :return: True if the Sound satisfies the element.
+        :rtype: bool
+        """
+        kind, value = self.pattern[index]
+        if kind == self.MATCH_ORTHOGRAPHY:
+            return sound.orthographic_transcription == value
+        elif kind == self.MATCH_CATEGORY:
+            return value in sound.phonotactics_categories
+        return False
+
+    def apply(self, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
+        """Apply this sound change to a sequence of sounds.
+
+        Behaves exactly like change_sounds called with the arguments this
+        object was compiled from.
+
+        :param sequence: The sequence of sounds.
+        :type sequence: list[list[Sound]]
+        :return: The converted sequence.
+        :rtype: list[list[Sound]]
+        """
+        pattern = self.pattern
+        pattern_length = len(pattern)
+        sounds_after = self.replacement
+        condition = self.condition
+        new_stem = list()
+        i = 0
+        j = 0
+        match_count = 0
+        match_locations = list()
+        match_sounds = list()
+        none_target = None
+        index = None
+        index_built = False
+        while i < len(sequence):
+            new_syllable = list()
+            while j < len(sequence[i]):
+                while match_count < pattern_length and pattern[match_count][0] == self.MATCH_NONE:  # match all None
+                    match_count = match_count + 1
+                    match_locations.append((i, j))
+                    match_sounds.append(None)
+                    none_target = sequence[i][j]
+                if match_count < pattern_length:  # check for a match of one non-None sound
+                    if self.element_matches(match_count, sequence[i][j]):  # one sound matched
+                        match_count = match_count + 1
+                        match_locations.append((i, j))
+                        match_sounds.append(sequence[i][j])
+                        none_target = None
+                    else:  # match failed: put the old sounds back and undo the match
+                        for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
+                            if match_sound is not None:
+                                if match_i < i:
+                                    new_stem[match_i].append(match_sound)
+                                else:
+                                    new_syllable.append(match_sound)
+                        new_syllable.append(sequence[i][j])
+                        match_count = 0
+                        match_locations = list()
+                        match_sounds = list()
+                if match_count >= pattern_length:  # full match found
+                    if not condition:  # no condition specified: replace sounds automatically
+                        if sounds_after is not None:
+                            new_syllable += sounds_after
+                        match_count = 0
+                        match_locations = list()
+                        match_sounds = list()
+                    else:  # condition specified: check condition before replacing sounds
+                        match_i, match_j = match_locations[0]
+                        last_i, last_j = i, j
+                        if match_sounds[-1] is None:
+                            last_j = last_j - 1
+                            if last_j < 0 < last_i:
+                                last_i = last_i - 1
+                                last_j = 0
+                        if not index_built:  # conditions look up neighbours through one index per sequence
+                            index = get_sequence_index(sequence)
+                            index_built = True
+                        if self.get_condition().evaluate(sequence, match_i, match_j, last_i, last_j, index):
+                            if sounds_after is not None:  # (^1)condition passed: replace sounds
+                                new_syllable += sounds_after
+                            match_count = 0
+                            match_locations = list()
+                            match_sounds = list()
+                        else:  # condition failed: put the old sounds back and undo the match
+                            for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
+                                if match_sound is not None:
+                                    if match_i < i:
+                                        new_stem[match_i].append(match_sound)
+                                    else:
+                                        new_syllable.append(match_sound)
+                            match_count = 0
+                            match_locations = list()
+                            match_sounds = list()
+                    if none_target is not None:  # TODO does this always preserve syllable bounds?
+                        new_syllable.append(none_target)
+                j += 1
+            new_stem.append(new_syllable)
+            i += 1
+            j = 0
+        while match_count < pattern_length and pattern[match_count][0] == self.MATCH_NONE:  # match all None once more
+            match_count = match_count + 1
+            match_locations.append((len(sequence)-1, len(sequence[-1])))
+            match_sounds.append(None)
+        if match_count >= pattern_length:  # full match found (special case; None can match after the sequence)
+            if not condition:  # no condition specified: replace sounds automatically
+                if sounds_after is not None:
+                    new_stem[-1] += sounds_after
+                    match_locations = list()
+                    match_sounds = list()
+            else:  # condition specified: check condition before replacing sounds
+                match_i, match_j = match_locations[0]
+                last_i, last_j = match_locations[-1]
+                if match_sounds[-1] is None:
+                    last_j = last_j - 1
+                    if last_j < 0 < last_i:
+                        last_i = last_i - 1
+                        last_j = 0
+                if not index_built:
+                    index = get_sequence_index(sequence)
+                if self.get_condition().evaluate(sequence, match_i, match_j, last_i, last_j, index):
+                    if sounds_after is not None:  # (^1)condition passed: replace sounds
+                        new_stem[-1] += sounds_after
+                    match_locations = list()
+                    match_sounds = list()
+        for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
+            if match_sound is not None:  # (^1)put old sounds back in case of partial match
+                new_stem[match_i].append(match_sound)
+        return new_stem
+
+
+def copy_sequence(sequence: 'list[list[Sound]]', copy_sounds: bool = False) -> 'list[list[Sound]]':
+    """Return a copy of a sequence of sounds.
+
+    By default only the syllable lists are copied and the sounds are shared
+    with the original sequence, which is all that is needed to add, remove,
+    or reorder sounds in the copy. Sounds are values that the evolution
+    functions in this module never modify, so only callers that really
+    intend to edit the sounds themselves should ask for them to be copied.
+
+    :param sequence: The sequence of sounds.
+    :type sequence: list[list[Sound]]
+    :param copy_sounds: Whether to also copy every Sound in the sequence.
+    :type copy_sounds: bool
+    :return: The copied sequence.
+    :rtype: list[list[Sound]]
+    """
+    if copy_sounds:
+        return copy.deepcopy(sequence)
+    return [list(syllable) if syllable is not None else None for syllable in sequence]
+
+
+def has_same_sounds(sequence: 'list[list[Sound]]', other_sequence: 'list[list[Sound]]') -> bool:
+    """Return whether two sequences hold the very same Sound objects in the
+    same syllables. Unlike ==, this never compares the sounds themselves.
+
+    :param sequence: The first sequence of sounds.
+    :type sequence: list[list[Sound]]
+    :param other_sequence: The second sequence of sounds.
+    :type other_sequence: list[list[Sound]]
+    :return: Whether the sequences are made of the same Sound objects.
+    :rtype: bool
+    """
+    if len(sequence) != len(other_sequence):
+        return False
+    for syllable, other_syllable in zip(sequence, other_sequence):
+        if len(syllable) != len(other_syllable):
+            return False
+        for sound, other_sound in zip(syllable, other_syllable):
+            if sound is not other_sound:
+                return False
+    return True
+
+
+def replace_flat_matches(sequence: 'list[list[Sound]]', match_starts: 'list[int]', match_length: int,
+                         replacement: 'list[Sound]') -> 'list[list[Sound]]':
+    """Return a copy of a sequence with some runs of sounds replaced.
+
+    Runs are given by the position of their first Sound counting across
+    syllables, as if the sequence were flat. As in change_sounds, each
+    replacement goes into the syllable of the last Sound it replaces.
+
+    :param sequence: The sequence of sounds. It is not modified.
+    :type sequence: list[list[Sound]]
+    :param match_starts: The flat position of the first Sound of each run.
+    The runs must not overlap.
+    :type match_starts: list[int]
+    :param match_length: The number of sounds in each run.
+    :type match_length: int
+    :param replacement: The sounds to put in place of each run.
+    :type replacement: list[Sound]
+    :return: The new sequence.
+    :rtype: list[list[Sound]]
+    """
+    match_ends = set(start + match_length - 1 for start in match_starts)
+    removed = set()
+    for start in match_starts:
+        removed.update(range(start, start + match_length))
+    new_stem = list()
+    position = 0
+    for syllable in sequence:
+        new_syllable = list()
+        for sound in syllable:
+            if position not in removed:
+                new_syllable.append(sound)
+            elif position in match_ends:
+                new_syllable.extend(replacement)
+            position = position + 1
+        new_stem.append(new_syllable)
+    return new_stem
 
 
 def change_sounds(sequence: 'list[list[Sound]]', sounds_before: 'Sound | list[Sound] | None | str | list[str]',
@@ -147,6 +538,10 @@ def change_sounds(sequence: 'list[list[Sound]]', sounds_before: 'Sound | list[So
     All occurrences of sounds_before in the sequence that match the
     provided condition will be replaced with sounds_after.
 
+    This compiles the sound change on every call. Code that applies the
+    same change repeatedly should use SoundChangeRule.compile() (or a
+    CompiledSoundChange directly) instead.
+
     :param sequence: The sequence of sounds.
     :type sequence: list[list[Sound]]
     :param sounds_before: The Sound, sequence of sounds, category of
@@ -171,114 +566,7 @@ def change_sounds(sequence: 'list[list[Sound]]', sounds_before: 'Sound | list[So
     :return: The converted sequence.
     :rtype: list[list[Sound]]
     """
-    # print('changing sound', get_sequence_as_string(sequence), 'from', get_sequence_as_string([sounds_before]), 'to',
-    #       get_sequence_as_string([sounds_after]))
-    if type(sounds_before) is not list:
-        sounds_before = [sounds_before]
-    if type(sounds_after) is not list:
-        sounds_after = [sounds_after]
-    if len(sounds_after) == 1 and sounds_after[0] is None:
-        sounds_after = None
-    new_stem = list()
-    i = 0
-    j = 0
-    match_count = 0
-    match_locations = list()
-    match_sounds = list()
-    none_target = None
-    while i < len(sequence):
-        new_syllable = list()
-        while j < len(sequence[i]):
-            while match_count < len(sounds_before) and sounds_before[match_count] is None:  # match all None sounds
-                match_count = match_count + 1
-                match_locations.append((i, j))
-                match_sounds.append(None)
-                none_target = copy.deepcopy(sequence[i][j])
-            if match_count < len(sounds_before):  # check for a match of one non-None sound
-                if (type(sounds_before[match_count]) is Sound and
-                        sequence[i][j].orthographic_transcription ==
-                        sounds_before[match_count].orthographic_transcription) or \
-                        (type(sounds_before[match_count]) is str and
-                         sounds_before[match_count] in sequence[i][j].phonotactics_categories):  # one sound matched
-                    match_count = match_count + 1
-                    match_locations.append((i, j))
-                    match_sounds.append(copy.deepcopy(sequence[i][j]))
-                    none_target = None
-                else:  # match failed: put the old sounds back and undo the match
-                    for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
-                        if match_sound is not None:
-                            if match_i < i:
-                                new_stem[match_i].append(copy.deepcopy(match_sound))
-                            else:
-                                new_syllable.append(copy.deepcopy(match_sound))
-                    new_syllable.append(copy.deepcopy(sequence[i][j]))
-                    match_count = 0
-                    match_locations = list()
-                    match_sounds = list()
-            if match_count >= len(sounds_before):  # full match found
-                if not condition:  # no condition specified: replace sounds automatically
-                    if sounds_after is not None:
-                        new_syllable += copy.deepcopy(sounds_after)
-                    match_count = 0
-                    match_locations = list()
-                    match_sounds = list()
-                else:  # condition specified: check condition before replacing sounds
-                    match_i, match_j = match_locations[0]
-                    last_i, last_j = i, j
-                    if match_sounds[-1] is None:
-                        last_j = last_j - 1
-                        if last_j < 0 < last_i:
-                            last_i = last_i - 1
-                            last_j = 0
-                    if check_condition(sequence, match_i, match_j, last_i, last_j, condition, condition_sounds):
-                        if sounds_after is not None:  # (^1)condition passed: replace sounds
-                            new_syllable += copy.deepcopy(sounds_after)
-                        match_count = 0
-                        match_locations = list()
-                        match_sounds = list()
-                    else:  # condition failed: put the old sounds back and undo the match
-                        for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
-                            if match_sound is not None:
-                                if match_i < i:
-                                    new_stem[match_i].append(copy.deepcopy(match_sound))
-                                else:
-                                    new_syllable.append(copy.deepcopy(match_sound))
-                        match_count = 0
-                        match_locations = list()
-                        match_sounds = list()
-                if none_target is not None:  # TODO does this always preserve syllable bounds?
-                    new_syllable.append(none_target)
-            j += 1
-        new_stem.append(new_syllable)
-        i += 1
-        j = 0
-    while match_count < len(sounds_before) and sounds_before[match_count] is None:  # match all None sounds once more
-        match_count = match_count + 1
-        match_locations.append((len(sequence)-1, len(sequence[-1])))
-        match_sounds.append(None)
-    if match_count >= len(sounds_before):  # full match found (special case; None can match after the sequence)
-        if not condition:  # no condition specified: replace sounds automatically
-            if sounds_after is not None:
-                new_stem[-1] += copy.deepcopy(sounds_after)
-                match_locations = list()
-                match_sounds = list()
-        else:  # condition specified: check condition before replacing sounds
-            match_i, match_j = match_locations[0]
-            last_i, last_j = match_locations[-1]
-            if match_sounds[-1] is None:
-                last_j = last_j - 1
-                if last_j < 0 < last_i:
-                    last_i = last_i - 1
-                    last_j = 0
-            if check_condition(sequence, match_i, match_j, last_i, last_j, condition, condition_sounds):
-                if sounds_after is not None:  # (^1)condition passed: replace sounds
-                    new_stem[-1] += copy.deepcopy(sounds_after)
-                match_locations = list()
-                match_sounds = list()
-    for (match_i, match_j), match_sound in zip(match_locations, match_sounds):
-        if match_sound is not None:  # (^1)put old sounds back in case of partial match
-            new_stem[match_i].append(copy.deepcopy(match_sound))
-    return new_stem
+    return CompiledSoundChange(sounds_before, sounds_after, condition, condition_sounds).apply(sequence)
 
 
 def get_sequence_as_string(sequence: 'list[list[Sound]]', use_ipa: bool = False) -> str:
@@ -295,13 +583,26 @@ def get_sequence_as_string(sequence: 'list[list[Sound]]', use_ipa: bool = False)
     :return: A string representation of a sequence of sounds.
     :rtype: str
     """
-    output = ''
-    for syllable in sequence:
-        if syllable is not None:
-            for sound in syllable:
-                if sound is not None:
-                    if not use_ipa:
-                        output = output + sound.orthographic_transcription
-                    else:
-                        output = output + sound.ipa_transcription
-    return output
+    if use_ipa:
+        return ''.join([sound.ipa_transcription for syllable in sequence if syllable is not None
+                        for sound in syllable if sound is not None])
+    return ''.join([sound.orthographic_transcription for syllable in sequence if syllable is not None
+                    for sound in syllable if sound is not None])
+
+
+def get_sequence_strings(sequence: 'list[list[Sound]]', include_ipa: bool = True) -> 'tuple[str, str]':
+    """Return the orthographic and IPA representations of a sequence of
+    sounds, walking the sequence only once.
+
+    :param sequence: The sequence of sounds.
+    :type sequence: list[list[Sound]]
+    :param include_ipa: Whether to build the IPA representation at all. If
+    False, it is returned as ''.
+    :type include_ipa: bool
+    :return: The orthographic and IPA representations.
+    :rtype: tuple[str, str]
+    """
+    sounds = [sound for syllable in sequence if syllable is not None for sound in syllable if sound is not None]
+    orthography = ''.join([sound.orthographic_transcription for sound in sounds])
+    ipa = ''.join([sound.ipa_transcription for sound in sounds]) if include_ipa else ''
+    return orthography, ipa
@@ -0,0 +1,109 @@
+from conarch.sound import Sound
+from conarch.sound_helpers import CompiledSoundChange, copy_sequence
+
+
+def can_fuse(sound_change: CompiledSoundChange) -> bool:
+    """Return whether a compiled sound change acts on each Sound on its own.
+
+    A sound change with no condition and exactly one Sound or category in
+    its old sounds replaces (or deletes) every matching Sound regardless
+    of its neighbours, so it can be composed with others like it into one
+    mapping from Sound to sounds. Anything that looks at context, i.e. a
+    condition (including '#' for the word boundary), more than one old
+    Sound, or an insertion, cannot.
+
+    :param sound_change: The compiled sound change.
+    :type sound_change: CompiledSoundChange
+    :return: Whether the sound change can be fused.
+    :rtype: bool
+    """
+    if sound_change.condition or len(sound_change.pattern) != 1:
+        return False
+    return sound_change.pattern[0][0] != CompiledSoundChange.MATCH_NONE
+
+
+class SoundChangeTransducer:
+    """A list of sound changes compiled to run as few passes as possible.
+
+    Contiguous runs of sound changes that act on each Sound on its own (see
+    can_fuse) are composed into a single mapping from each input Sound to
+    the sounds it ends up as after the whole run, so the run costs one pass
+    over a sequence no matter how many sound changes it contains. The
+    mapping is built lazily, the first time each Sound is seen. Any other
+    sound change is applied on its own, in order, exactly as change_sounds
+    would.
+
+    fused_rules and unfused_rules list the Sound Change Rules that went
+    into each kind of step.
+
+    The transducer holds the compiled form of each rule, so it no longer
+    applies once one of its rules is edited; see is_current.
+    """
+
+    def __init__(self, sound_changes: 'list'):
+        self.sound_changes = list(sound_changes)
+        self.compiled = [sound_change.compile() for sound_change in self.sound_changes]
+        self.segments = list()  # (compiled sound changes, True if fused)
+        self.fused_rules = list()
+        self.unfused_rules = list()
+        run = list()
+        for sound_change, compiled in zip(self.sound_changes, self.compiled):
+            if can_fuse(compiled):
+                run.append(compiled)
+                self.fused_rules.append(sound_change)
+            else:
+                if run:
+                    self.segments.append((run, True))
+                    run = list()
+                self.segments.append(([compiled], False))
+                self.unfused_rules.append(sound_change)
+        if run:
+            self.segments.append((run, True))
+        self._mappings = [dict() if fused else None for _, fused in self.segments]  # [id(sound)] = (sound, output)
+
+    def is_current(self) -> bool:
+        """Return whether none of the rules have been edited since this
+        transducer was built."""
+        return all(sound_change.compile() is compiled
+                   for sound_change, compiled in zip(self.sound_changes, self.compiled))
+
+    def get_pass_count(self) -> int:
+        return len(self.segments)
+
+    def apply(self, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
+        """Apply every sound change of this transducer to a sequence.
+
+        :param sequence: The sequence of sounds. It is not modified.
+        :type sequence: list[list[Sound]]
+        :return: The converted sequence.
+        :rtype: list[list[Sound]]
+        """
+        sequence = copy_sequence(sequence)
+        for (segment, fused), mapping in zip(self.segments, self._mappings):
+            if fused:
+                sequence = [self._map_syllable(syllable, segment, mapping) for syllable in sequence]
+            else:
+                sequence = segment[0].apply(sequence)
+        return sequence
+
+    @staticmethod
+    def _map_syllable(syllable: 'list[Sound]', segment: 'list[CompiledSoundChange]',
+                      mapping: 'dict[int, tuple]') -> 'list[Sound]':
+        new_syllable = list()
+        for sound in syllable:
+            entry = mapping.get(id(sound))
+            if entry is None:  # first time this Sound is seen: run it through every sound change of the segment
+                output = [sound]
+                for compiled in segment:
+                    new_output = list()
+                    for output_sound in output:
+                        if compiled.element_matches(0, output_sound):
+                            if compiled.replacement is not None:
+                                new_output.extend(compiled.replacement)
+                        else:
+                            new_output.append(output_sound)
+                    output = new_output
+                entry = (sound, tuple(output))  # keep the Sound so its id cannot be reused
+                mapping[id(sound)] = entry
+            new_syllable.extend(entry[1])
+        return new_syllable
@@ -1,11 +1,29 @@
+from bisect import bisect_right
 import copy
+from collections import Counter
 from collections.abc import Generator
+from conarch import batch
+from conarch import evolution
 from conarch import sound_helpers
 import itertools
+from conarch.definition_timeline import DefinitionTimeline
+from conarch.phonotactics import PhonotacticsAutomaton, get_phonotactics_automaton
 from conarch.sound import Sound
 from conarch.sound_change_rule import SoundChangeRule
+from conarch.sound_change_timeline import SoundChangeTimeline
 from conarch.word_form_rule import WordFormRule
 
+# counts of evolved stems that were served from a Word's stem cache ('hits'), that had to be computed ('misses'), or
+# that were computed from an earlier cached stem instead of the base stem ('resumed'), and of stem strings that were
+# served from a Word's string cache ('string_hits') or had to be rendered ('string_misses')
+stem_cache_statistics = Counter()
+_base_stem_versions = itertools.count()  # unique across words so that shallow copies never share a version
+
+# checkpointing keeps a Word's stem every checkpoint_interval sound changes instead of caching the stem of every stage;
+# 0 turns it off. If max_checkpoints is not 0 the interval grows so that no Word keeps more checkpoints than that
+checkpoint_interval = 0
+max_checkpoints = 0
+
 
 class Word:
     """One word represented by a number of sounds and sound changes.
@@ -32,32 +50,97 @@ class Word:
     has existed in its Language. Its "current" definition at any stage in
     which it was not defined is simply pulled from the most recent stage
     (at the time) in which it was.
+
+    Evolved stems are cached by stage. The cache notices a new base stem,
+    sound changes added to or removed from the Word, a new original or
+    obsoleted stage, an edit to any Sound Change Rule or to any Sound
+    (see Sound.edit_count), and any change to the Word this one is a form
+    of or derived from. Call invalidate_stem_cache after editing a base
+    stem in place. A stem that is no longer valid is recomputed from the
+    furthest cached stem that still is, so adding a stage only costs the
+    new sound change. See set_checkpointing for keeping fewer stems in
+    Languages with very many stages. Stem strings are cached the same way,
+    by stage and by whether they include IPA.
     """
 
     def __init__(self, base_stem: 'list[list[Sound]] | None', categories: str = '', original_language_stage: int = 0):
         self.word_id = None
+        self._stem_cache = dict()  # [stage, or None for the modern stem] = (token, stem)
+        # (base stem, rules applied, [number of rules applied] = stem, [number of rules applied] = checkpoint stem)
+        self._evolution = None
+        self._sound_change_order = None
+        self._string_cache = dict()  # [(stage, or None for the modern stem, include_ipa)] = (token, stem string)
+        self._sound_edit_count = Sound.edit_count  # Sound.edit_count when the caches were last checked
+        self._inventory_log = None  # the InventoryLog of the language the word was added to
         self.base_stem = base_stem  # don't access this directly unless you're sure the word is not branched etc.
         self.categories = categories
-        self.language_sound_changes = list()  # inherited from the language; should be same as language.sound_changes
+        self.language_sound_changes = list()  # inherited from the language; the SoundChangeTimeline of its language
         self.word_sound_changes = list()  # unique to this word
         self.original_language_stage = original_language_stage  # the stage the word was added to its language
         self.obsoleted_language_stage = -1  # the stage the word was removed from its language
-        self.definitions = dict()  # [stage] = definition
+        self.definitions = DefinitionTimeline()  # [stage] = definition
         self.source_word = None  # only populated if this word is derived from another word
         self.source_word_language_stage = None  # only populated if this word is derived from another word
         self.word_forms = list()  # list of child words that represent conjugations etc. of this word
         self.stem_word = None  # only populated if this is a form of another word
         self.stem_word_language_stage = None  # only populated if this is a form of another word
         self.word_form_name = None  # only populated if this is a form of another word
+        self.word_form_rule = None  # only populated if this form was created from a word form rule
         self.copied_from = None  # not saved to db, only for language.copy_words functions
 
+    @property
+    def definitions(self) -> DefinitionTimeline:
+        return self._definitions
+
+    @definitions.setter
+    def definitions(self, definitions: 'dict[int, str]'):
+        if not isinstance(definitions, DefinitionTimeline):
+            definitions = DefinitionTimeline(definitions)
+        self._definitions = definitions
+
+    @property
+    def base_stem(self) -> 'list[list[Sound]] | None':
+        return self._base_stem
+
+    @base_stem.setter
+    def base_stem(self, base_stem: 'list[list[Sound]] | None'):
+        self._base_stem = base_stem
+        self._base_stem_version = next(_base_stem_versions)
+        self._update_inventory_log()
+
+    @property
+    def original_language_stage(self) -> int:
+        return self._original_language_stage
+
+    @original_language_stage.setter
+    def original_language_stage(self, original_language_stage: int):
+        self._original_language_stage = original_language_stage
+        self._update_inventory_log()
+
+    def set_inventory_log(self, inventory_log):
+        """Make this Word tell an InventoryLog whenever its base stem or
+        original stage changes (see InventoryLog.update_word)."""
+        self._inventory_log = inventory_log
+
+    def _update_inventory_log(self):
+        if self._inventory_log is not None:
+            self._inventory_log.update_word(self)
+
     def get_base_stem(self) -> 'list[list[Sound]]':
+        if self.is_word_form() or self.has_source_word():
+            return sound_helpers.copy_sequence(self._get_shared_base_stem())
+        return self.base_stem
+
+    def _get_shared_base_stem(self) -> 'list[list[Sound]]':
+        """Return the base stem without copying it. For forms and branched
+        words it is the stem their parent keeps for all of its dependents,
+        so it must not be modified."""
         if self.is_word_form():
-            return self.stem_word.get_stem_at_stage(self.stem_word_language_stage)
+            return self.stem_word.get_stem_for_dependents(self.stem_word_language_stage)
         elif not self.has_source_word():
             return self.base_stem
         else:
-            return self.source_word.get_stem_at_stage(self.source_word_language_stage)
+            return self.source_word.get_stem_for_dependents(self.source_word_language_stage)
 
     def set_as_branch(self, source_word: 'Word', source_word_language_stage: int):
         self.source_word = source_word
@@ -80,7 +163,10 @@ class Word:
 
         form_word.stem_word = self
         form_word.stem_word_language_stage = max(stage, self.original_language_stage)
-        form_word.language_sound_changes = copy.copy(self.language_sound_changes)
+        if isinstance(self.language_sound_changes, SoundChangeTimeline):  # shared, so it needs no copy
+            form_word.share_language_sound_changes(self.language_sound_changes)
+        else:
+            form_word.language_sound_changes = copy.copy(self.language_sound_changes)
         form_word.word_sound_changes = copy.copy(self.word_sound_changes) + form_word.word_sound_changes
         if form_word.word_form_name is None:
             form_word.word_form_name = 'Unnamed'
@@ -95,11 +181,15 @@ class Word:
         The form will determine its name, original stage, obsoleted stage, and
         conjugation rules (in the form of word sound changes) from the word
         form rule. It will inherit everything else it needs from this Word as
-        described in add_form_word.
+        described in add_form_word. As long as they are not edited, the
+        conjugation rules are applied together in shared scans by the word
+        form rule's matcher (see WordFormRule.get_matcher).
         """
 
         form_word = Word(None, self.categories, max(word_form.original_language_stage, self.original_language_stage))
         form_word.word_form_name = word_form.name
+        form_word.word_form_rule = word_form
+        word_form.get_matcher()  # compile the rules first so that their copies share the compiled rules
         if self.obsoleted_language_stage > -1 < word_form.obsoleted_language_stage:
             form_word.obsoleted_language_stage = min(self.obsoleted_language_stage,
                                                      word_form.obsoleted_language_stage)
@@ -107,8 +197,8 @@ class Word:
             form_word.obsoleted_language_stage = max(self.obsoleted_language_stage,
                                                      word_form.obsoleted_language_stage)
         for conjugation_rule in word_form.get_adjusted_rules():  # forms have a None base stem and are calculated on the
-            form_word.add_word_sound_change(conjugation_rule)  # fly; the rules are located in the word sound changes
-            conjugation_rule.stage = form_word.original_language_stage
+            conjugation_rule.stage = form_word.original_language_stage  # fly; the rules are located in the word
+            form_word.add_word_sound_change(conjugation_rule)  # sound changes
         return self.add_form_word(form_word, word_form.original_language_stage)
 
     def has_source_word(self) -> bool:
@@ -131,81 +221,101 @@ class Word:
         if language_stage in self.definitions.keys():
             return self.definitions[language_stage]
         elif not exact:  # find most recent definition
-            defined_stages = list(self.definitions.keys())
-            defined_stages.sort()
-            while language_stage not in defined_stages:
-                language_stage = language_stage - 1
-                if language_stage < 0:  # the word was not defined by the provided stage
-                    return ''
-            return self.definitions[language_stage]
+            return self.definitions.get_definition_at_stage(language_stage)
         else:
             return ''
 
     def get_definition_stage_at_stage(self, language_stage: int) -> int:
-        if language_stage in self.definitions.keys():
-            return self.definitions[language_stage]
-        else:  # find most recent definition
-            defined_stages = list(self.definitions.keys())
-            defined_stages.sort()
-            while language_stage not in defined_stages:
-                language_stage = language_stage - 1
-                if language_stage < 0:  # the word was not defined by the provided stage
-                    return -1
-            return language_stage
+        return self.definitions.get_stage_at_stage(language_stage)
 
     def clear_definitions(self):
-        self.definitions = dict()
+        self.definitions = DefinitionTimeline()
 
     def has_definition_at_stage(self, language_stage: int, exact: bool = False) -> bool:
         if language_stage in self.definitions.keys():
             return True
         elif not exact:  # find most recent definition
-            defined_stages = list(self.definitions.keys())
-            defined_stages.sort()
-            while language_stage not in defined_stages:
-                language_stage = language_stage - 1
-                if language_stage < 0:  # the word was not defined by the provided stage
-                    return False
-            return True
+            return self.definitions.get_stage_at_stage(language_stage) >= 0
         else:
             return False
 
+    def share_language_sound_changes(self, timeline: SoundChangeTimeline):
+        """Make this Word and its forms use the sound changes of a
+        Language's timeline as their language sound changes, replacing any
+        they had. Sound changes added to the timeline from then on apply to
+        them without needing add_language_sound_change."""
+        self.language_sound_changes = timeline
+        for form in self.word_forms:
+            form.share_language_sound_changes(timeline)
+
+    def get_sound_change_timeline(self) -> 'SoundChangeTimeline | None':
+        """Return the timeline of the Language this Word shares its language
+        sound changes with, or None if it has a list of its own."""
+        if isinstance(self.language_sound_changes, SoundChangeTimeline):
+            return self.language_sound_changes
+        return None
+
     def add_language_sound_change(self, sound_change: SoundChangeRule):
+        if isinstance(self.language_sound_changes, SoundChangeTimeline):  # don't add a stage to the whole language
+            self.language_sound_changes = list(self.language_sound_changes)
+        order = self._get_current_sound_change_order()
         self.language_sound_changes.append(sound_change)
+        if order is not None:
+            order.add_language_sound_change(self, len(self.language_sound_changes) - 1)
+            order.token = self.get_sound_change_order_token()
         for form in self.word_forms:
             form.add_language_sound_change(sound_change)
 
     def add_word_sound_change(self, sound_change: SoundChangeRule):
+        order = self._get_current_sound_change_order()
         if sound_change.stage == -1:  # word sound changes need a stage to function correctly
             sound_change.stage = self.get_current_stage()  # it is still recommended to set this manually before calling
         self.word_sound_changes.append(sound_change)
+        if order is not None:
+            order.add_word_sound_change(self, sound_change)
+
+    def get_sound_change_order_token(self) -> tuple:
+        """Return everything the order of this Word's sound changes depends
+        on, to be compared with ==."""
+        return (self.language_sound_changes, len(self.language_sound_changes), self.word_sound_changes,
+                len(self.word_sound_changes), self.original_language_stage, self.obsoleted_language_stage)
+
+    def _get_current_sound_change_order(self) -> 'SoundChangeOrder | None':
+        order = self._sound_change_order
+        if order is None or not order.is_current():
+            return None
+        token = self.get_sound_change_order_token()
+        if order.token == token:
+            return order
+        if order.token[0] is token[0] and order.token[1] < token[1] and order.token[2:] == token[2:]:
+            # only new stages were added to the language sound changes, e.g. to a shared timeline
+            for stage in range(order.token[1], token[1]):
+                order.add_language_sound_change(self, stage)
+            order.token = token
+            return order
+        return None
+
+    def get_sound_change_order(self) -> 'SoundChangeOrder':
+        """Return the sound changes of this Word in order, rebuilding them
+        only if the Word or its sound changes were changed other than by
+        add_language_sound_change, add_word_sound_change, or new stages
+        being added to its language sound changes."""
+        order = self._get_current_sound_change_order()
+        if order is None:
+            order = SoundChangeOrder(self)
+            self._sound_change_order = order
+        return order
 
     def all_sound_changes(self) -> 'list[SoundChangeRule]':
         """Gets all sound changes, in order, that apply to the modern word."""
-        ordered_sound_changes = list()
-        # add all language sound changes and word sound changes that correspond to a language stage
-        for i in range(self.original_language_stage, self.get_current_stage()):
-            for word_sound_change in [s for s in self.word_sound_changes if s.stage == i]:
-                ordered_sound_changes.append(word_sound_change)
-            ordered_sound_changes.append(self.language_sound_changes[i])
-        # add word sound changes from stages at or beyond the highest language stage
-        for word_sound_change in sorted([s for s in self.word_sound_changes if s.stage >= self.get_current_stage()],
-                                        key=lambda s: s.stage):
-            ordered_sound_changes.append(word_sound_change)
-        return ordered_sound_changes
+        return list(self.get_sound_change_order().sound_changes)
 
     def sound_changes_at_stage(self, stage: int) -> 'list[SoundChangeRule]':
-        return [s for s in self.all_sound_changes() if s.stage <= stage]
+        return self.get_sound_change_order().get_sound_changes_at_stage(stage)
 
     @staticmethod
     def get_stem_string(stem: 'list[list[Sound]]', include_ipa: bool = False) -> str:
-        orthography = ''
-        ipa = ''
-        for syllable in stem:
-            for s in syllable:
-                orthography = orthography + s.orthographic_transcription
-                if include_ipa:
-                    ipa = ipa + s.ipa_transcription
+        orthography, ipa = sound_helpers.get_sequence_strings(stem, include_ipa=include_ipa)
         if include_ipa and ipa:
             return orthography + ' /' + ipa + '/'
         else:
@@ -217,32 +327,314 @@ class Word:
     def print_base_stem(self, include_ipa: bool = False):
         print(self.get_base_stem_string(include_ipa=include_ipa))
 
-    def get_modern_stem(self) -> 'list[list[Sound]]':
-        modern_stem = copy.deepcopy(self.get_base_stem())
-        for sound_change in self.all_sound_changes():
-            modern_stem = sound_helpers.change_sounds(modern_stem, sound_change.old_sounds, sound_change.new_sounds,
-                                                      sound_change.condition, sound_change.condition_sounds)
-        return modern_stem
+    def get_base_stem_token(self) -> tuple:
+        """Return everything the base stem of this Word depends on, to be
+        compared with ==. For forms and branched words that includes the
+        stem cache token of the Word they come from."""
+        if self.is_word_form():
+            parent = (self.stem_word, self.stem_word_language_stage, self.stem_word.get_stem_cache_token())
+        elif self.has_source_word():
+            parent = (self.source_word, self.source_word_language_stage, self.source_word.get_stem_cache_token())
+        else:
+            parent = None
+        return self._base_stem_version, parent
+
+    def get_stem_cache_token(self) -> tuple:
+        """Return everything the evolved stems of this Word depend on.
+
+        Two tokens compare equal only if every stem cached under the first
+        is still valid under the second. The sound change lists themselves
+        are part of the token, which keeps them alive and so stops a new
+        list from being mistaken for an old one. So is the sound change
+        order, which is only replaced when one of this Word's own sound
+        changes is edited, so edits to any other rule leave the token as
+        it is. Sounds are edited far more rarely and can change how any
+        rule matches, so an edit to any Sound changes every token.
+        """
+        return (self.get_base_stem_token(), self.language_sound_changes, len(self.language_sound_changes),
+                self.word_sound_changes, len(self.word_sound_changes), self.original_language_stage,
+                self.obsoleted_language_stage, self.get_sound_change_order(), Sound.edit_count)
+
+    def invalidate_stem_cache(self):
+        self._stem_cache = dict()
+        self._evolution = None
+        self._string_cache = dict()
+        self._update_inventory_log()
+
+    def get_stem_for_dependents(self, stage: int) -> 'list[list[Sound]]':
+        """Return the stem at a stage that forms of this Word or words
+        derived from it use as their base stem.
+
+        The stem is computed once and shared by every dependent, even when
+        checkpointing keeps stems of other stages from being cached, so a
+        deep family of words evaluates each parent stem only once. It must
+        not be modified.
+
+        :param stage: The stage the dependents were formed or derived at.
+        :type stage: int
+        :return: The shared stem.
+        :rtype: list[list[Sound]]
+        """
+        return self._get_cached_stem(stage, 'python', shared=True)
+
+    def _discard_caches_after_sound_edits(self):
+        """Empty the stem and string caches if any Sound has been edited
+        since they were last used. Their tokens would no longer match, but
+        strings spell out the old sounds and are dropped straight away."""
+        if self._sound_edit_count != Sound.edit_count:
+            self._stem_cache = dict()
+            self._evolution = None
+            self._string_cache = dict()
+            self._sound_edit_count = Sound.edit_count
+
+    def _get_valid_cached_stem(self, stage: 'int | None', token: tuple) -> 'list[list[Sound]] | None':
+        self._discard_caches_after_sound_edits()
+        cached = self._stem_cache.get(stage)
+        if cached is not None and cached[0] == token:
+            stem_cache_statistics['hits'] += 1
+            return cached[1]
+        stem_cache_statistics['misses'] += 1
+        return None
+
+    def _store_cached_stem(self, stage: 'int | None', token: tuple, stem: 'list[list[Sound]]', evolution: tuple,
+                           count: int):
+        """Cache a stem evolved by the first count rules applied of an
+        evolution record (see _find_resume_point), and keep it to resume
+        from. A record that has since been replaced is simply dropped with
+        the stem."""
+        self._stem_cache[stage] = (token, stem)
+        evolution[2][count] = stem
+
+    def _get_cached_stem(self, stage: 'int | None', backend: str, shared: bool = False,
+                         copy_stem: bool = True) -> 'list[list[Sound]]':
+        token = self.get_stem_cache_token()
+        cached_stem = self._get_valid_cached_stem(stage, token)
+        if cached_stem is not None:
+            return sound_helpers.copy_sequence(cached_stem) if copy_stem and not shared else cached_stem
+        base_stem = self._get_shared_base_stem()
+        sound_changes = self.all_sound_changes() if stage is None else self.sound_changes_at_stage(stage)
+        start, stem, evolution = self._find_resume_point(base_stem, sound_changes)
+        if start > 0:
+            stem_cache_statistics['resumed'] += 1
+        interval = get_checkpoint_interval(len(sound_changes))
+        if interval:
+            new_stem = self._evolve_with_checkpoints(base_stem, stem, sound_changes, start, interval, backend,
+                                                     evolution)
+        else:
+            new_stem = self._evolve(stem, sound_changes[start:], backend)
+        if new_stem is base_stem:  # every sound change was skipped
+            new_stem = sound_helpers.copy_sequence(base_stem)
+        if stage is None or shared or not interval:  # with checkpoints, other stems are not cached in full
+            self._store_cached_stem(stage, token, new_stem, evolution, len(sound_changes))
+        return sound_helpers.copy_sequence(new_stem) if copy_stem and not shared else new_stem
+
+    def _get_cached_string(self, stage: 'int | None', include_ipa: bool) -> str:
+        """Return the stem string at a stage (or the modern one for None),
+        rendering it straight from the cached stem without copying it."""
+        self._discard_caches_after_sound_edits()
+        token = self.get_stem_cache_token()
+        cached = self._string_cache.get((stage, include_ipa))
+        if cached is not None and cached[0] == token:
+            stem_cache_statistics['string_hits'] += 1
+            return cached[1]
+        stem_cache_statistics['string_misses'] += 1
+        stem_string = self.get_stem_string(self._get_cached_stem(stage, 'python', copy_stem=False),
+                                           include_ipa=include_ipa)
+        self._string_cache[(stage, include_ipa)] = (token, stem_string)
+        return stem_string
+
+    @staticmethod
+    def get_modern_stems(words: 'list[Word]') -> 'list[list[list[Sound]]]':
+        """Return the modern stem of each of many words.
+
+        Stems that are cached are returned straight away. The rest are
+        evolved together (see batch.evolve_stems), each from the furthest
+        stem it has cached, and then cached.
+
+        :param words: The words. A Word may appear more than once.
+        :type words: list[Word]
+        :return: One modern stem per Word, in the same order.
+        :rtype: list[list[list[Sound]]]
+        """
+        stems = dict()  # [id(word)] = modern stem
+        pending = list()  # (word, token, evolution record, sound change count, stem to resume from, sound changes left)
+        for word in words:
+            if id(word) in stems:
+                continue
+            token = word.get_stem_cache_token()
+            stems[id(word)] = word._get_valid_cached_stem(None, token)
+            if stems[id(word)] is None:
+                base_stem = word._get_shared_base_stem()
+                sound_changes = word.all_sound_changes()
+                start, stem, evolution = word._find_resume_point(base_stem, sound_changes)
+                if start > 0:
+                    stem_cache_statistics['resumed'] += 1
+                pending.append((word, token, evolution, len(sound_changes), stem,
+                                word._group_form_rules(sound_changes[start:])))
+        new_stems = batch.evolve_stems([stem for _, _, _, _, stem, _ in pending],
+                                       [remaining for _, _, _, _, _, remaining in pending])
+        for (word, token, evolution, count, _, _), new_stem in zip(pending, new_stems):
+            word._store_cached_stem(None, token, new_stem, evolution, count)
+            stems[id(word)] = new_stem
+        return [sound_helpers.copy_sequence(stems[id(word)]) for word in words]
+
+    def _group_form_rules(self, sound_changes: 'list[SoundChangeRule]') -> 'list':
+        """Return the sound changes with the conjugation rules this form got
+        from its word form rule replaced by the rule's Multi Pattern Matcher,
+        which applies them in shared scans. The sound changes are returned as
+        they are unless all of those rules are there, in order and unedited."""
+        if self.word_form_rule is None:
+            return sound_changes
+        matcher = self.word_form_rule.get_matcher()
+        if not matcher.compiled:
+            return sound_changes
+        for k, sound_change in enumerate(sound_changes):
+            if sound_change.compile() is matcher.compiled[0]:
+                end = k + len(matcher.compiled)
+                if end <= len(sound_changes) and \
+                        all(s.compile() is c for s, c in zip(sound_changes[k:end], matcher.compiled)):
+                    return sound_changes[:k] + [matcher] + sound_changes[end:]
+                break
+        return sound_changes
+
+    def _evolve(self, stem: 'list[list[Sound]]', sound_changes: 'list[SoundChangeRule]',
+                backend: str) -> 'list[list[Sound]]':
+        if backend == 'python':
+            sound_changes = self._group_form_rules(sound_changes)
+        return evolution.evolve_sequence(stem, sound_changes, backend=backend,
+                                         timeline=self.get_sound_change_timeline())
+
+    @staticmethod
+    def _count_valid_sound_changes(applied: 'list[tuple]', sound_changes: 'list[SoundChangeRule]') -> int:
+        """Return how many of the sound changes applied to a cached stem are,
+        in order and unedited, the first of the given sound changes."""
+        for k, (sound_change, compiled) in enumerate(applied):
+            if k >= len(sound_changes) or sound_change is not sound_changes[k] or \
+                    sound_change.compile() is not compiled:
+                return k
+        return len(applied)
+
+    def _find_resume_point(self, base_stem: 'list[list[Sound]]',
+                           sound_changes: 'list[SoundChangeRule]') -> 'tuple[int, list[list[Sound]], tuple]':
+        """Find the cached stem or checkpoint that is furthest along the
+        given sound changes.
+
+        Every stem kept to resume from belongs to the Word's evolution
+        record: one base stem, one list of the sound changes applied, and
+        the stems evolved by the first so many of them. A stem can be
+        resumed from if the first sound changes of the list are, in order
+        and unedited, the first sound changes given, which only has to be
+        checked once for all of them. New stages are only ever appended, so
+        after a Language gains a sound change the modern stem resumes from
+        the previous modern stem and only the new sound change is applied.
+        An edit to an older sound change falls back to the stem of an
+        earlier stage, an earlier checkpoint, or the base stem.
+
+        The record is then made to start with the given sound changes. If
+        it has to be cut short for that, a new record takes its place with
+        only the stems that are still valid, and the old one is left as it
+        was for anyone still holding it.
+
+        :return: The number of sound changes already applied, the stem
+        they give, and the evolution record to keep the new stem in. The
+        stem must not be modified.
+        :rtype: tuple[int, list[list[Sound]], tuple]
+        """
+        evolution = self._evolution
+        if evolution is None or not sound_helpers.has_same_sounds(evolution[0], base_stem):
+            evolution = (sound_helpers.copy_sequence(base_stem), list(), dict(), dict())
+            self._evolution = evolution
+        _, applied, stems, checkpoints = evolution
+        valid = self._count_valid_sound_changes(applied, sound_changes)
+        if valid < len(applied) and valid < len(sound_changes):  # the sound changes differ from those applied
+            evolution = (evolution[0], applied[:valid],
+                         {count: stem for count, stem in stems.items() if count <= valid},
+                         {count: stem for count, stem in checkpoints.items() if count <= valid})
+            self._evolution = evolution
+            _, applied, stems, checkpoints = evolution
+        applied.extend((sound_change, sound_change.compile()) for sound_change in sound_changes[len(applied):])
+        start = max((count for count in itertools.chain(stems, checkpoints) if count <= valid), default=0)
+        return start, stems.get(start, checkpoints.get(start, base_stem)), evolution
+
+    def _evolve_with_checkpoints(self, base_stem: 'list[list[Sound]]', stem: 'list[list[Sound]]',
+                                 sound_changes: 'list[SoundChangeRule]', start: int, interval: int,
+                                 backend: str, evolution: tuple) -> 'list[list[Sound]]':
+        """Apply the sound changes from start on, keeping a checkpoint of the
+        stem every interval sound changes in the evolution record."""
+        checkpoints = evolution[3]
+        for count in [count for count in checkpoints if count % interval != 0]:
+            del checkpoints[count]
+        while start < len(sound_changes):
+            end = min(len(sound_changes), (start // interval + 1) * interval)
+            stem = self._evolve(stem, sound_changes[start:end], backend)
+            if end % interval == 0:
+                if stem is base_stem:
+                    stem = sound_helpers.copy_sequence(base_stem)
+                checkpoints[end] = stem
+            start = end
+        return stem
+
+    def get_modern_stem(self, backend: str = 'python') -> 'list[list[Sound]]':
+        return self._get_cached_stem(None, backend)
 
     def get_modern_stem_string(self, include_ipa: bool = False) -> str:
-        return self.get_stem_string(self.get_modern_stem(), include_ipa=include_ipa)
+        return self._get_cached_string(None, include_ipa)
 
     def print_modern_stem(self, include_ipa: bool = False):
         print(self.get_modern_stem_string(include_ipa=include_ipa))
 
-    def get_stem_at_stage(self, stage: int) -> 'list[list[Sound]]':
-        stage_stem = copy.deepcopy(self.get_base_stem())
-        for sound_change in self.sound_changes_at_stage(stage):
-            stage_stem = sound_helpers.change_sounds(stage_stem, sound_change.old_sounds, sound_change.new_sounds,
-                                                     sound_change.condition, sound_change.condition_sounds)
-        return stage_stem
+    def get_stem_at_stage(self, stage: int, backend: str = 'python') -> 'list[list[Sound]]':
+        return self._get_cached_stem(stage, backend)
 
     def get_stem_string_at_stage(self, stage: int, include_ipa: bool = False) -> str:
-        return self.get_stem_string(self.get_stem_at_stage(stage), include_ipa=include_ipa)
+        return self._get_cached_string(stage, include_ipa)
 
     def print_stem_at_stage(self, stage: int, include_ipa: bool = False):
         print(self.get_stem_string_at_stage(stage, include_ipa=include_ipa))
 
+    def iter_stem_history(self, backend: str = 'python') -> 'Generator[tuple[int, list[list[Sound]], bool]]':
+        """Yield the stem of this Word at every stage from its original stage
+        to its current stage.
+
+        The sound changes are replayed once from the base stem, so the whole
+        history costs about as much as a single modern stem. Each stem is the
+        same as get_stem_at_stage would give for its stage.
+
+        :param backend: The name of the evolution backend to use.
+        :type backend: str
+        :return: A generator of (stage, stem, changed) tuples, where changed
+        is whether the stem differs from the previous stage's stem (or from
+        the base stem, for the original stage).
+        :rtype: Generator[tuple[int, list[list[Sound]], bool]]
+        """
+        order = self.get_sound_change_order()
+        sound_changes = list(order.sound_changes)  # in case the Word changes while the generator is suspended
+        stages = list(order.stages)
+        ordered_by_stage = order.ordered_by_stage
+        previous_stem = self._get_shared_base_stem()
+        stem = previous_stem
+        position = 0
+        for stage in range(self.original_language_stage, self.get_current_stage() + 1):
+            if ordered_by_stage:
+                end = bisect_right(stages, stage, lo=position)
+                stem = self._evolve(stem, sound_changes[position:end], backend)
+                position = end
+            else:  # the sound changes of each stage are not a continuation of the previous stage's
+                stem = self.get_stem_at_stage(stage, backend=backend)
+            yield stage, sound_helpers.copy_sequence(stem), not sound_helpers.has_same_sounds(stem, previous_stem)
+            previous_stem = stem
+
+    def iter_stem_history_strings(self, include_ipa: bool = False) -> 'Generator[tuple[int, str, bool]]':
+        for stage, stem, changed in self.iter_stem_history():
+            yield stage, self.get_stem_string(stem, include_ipa=include_ipa), changed
+
+    def print_stem_history(self, include_ipa: bool = False):
+        """Print the stem of this Word at its original stage and at every
+        stage where it changed."""
+        for stage, stem_string, changed in self.iter_stem_history_strings(include_ipa=include_ipa):
+            if changed or stage == self.original_language_stage:
+                print(str(stage) + ': ' + stem_string)
+
     def get_form(self, form_name: str) -> 'list[list[Sound]]':
         if form_name == 'Stem':
             return self.get_modern_stem()
@@ -251,101 +643,71 @@ class Word:
                 return form.get_modern_stem()
 
     def print_form(self, form_name: str, include_ipa: bool = False):
-        orthography = ''
-        ipa = ''
-        form = self.get_form(form_name)
-        for syllable in form:
-            for s in syllable:
-                orthography = orthography + s.orthographic_transcription
-                if include_ipa:
-                    ipa = ipa + s.ipa_transcription
-        if include_ipa and ipa:
-            print(orthography + ' /' + ipa + '/')
-        else:
-            print(orthography)
+        print(self.get_stem_string(self.get_form(form_name), include_ipa=include_ipa))
+
+    def get_form_table(self, include_base_stem: bool = False, include_modern_stem: bool = True) -> \
+            'list[tuple[str, list[list[Sound]], str, str]]':
+        """Evaluate every form of this Word at once.
+
+        The stem this Word shares with its forms is computed only once, and
+        the modern stems of this Word and all of its forms are evolved
+        together (see get_modern_stems). A form is looked up by name as in
+        get_form, so forms sharing a name all give the first one's stem.
+
+        :param include_base_stem: Whether to start with the base stem, named
+        'Old Stem'.
+        :type include_base_stem: bool
+        :param include_modern_stem: Whether to include the modern stem,
+        named 'Stem'.
+        :type include_modern_stem: bool
+        :return: A (name, stem, orthography, IPA) tuple for each form.
+        :rtype: list[tuple[str, list[list[Sound]], str, str]]
+        """
+        named_words = list()
+        if include_modern_stem:
+            named_words.append(('Stem', self))
+        words_by_name = {'Stem': self}
+        for word_form in self.word_forms:
+            words_by_name.setdefault(word_form.word_form_name, word_form)
+        for word_form in self.word_forms:
+            named_words.append((word_form.word_form_name, words_by_name[word_form.word_form_name]))
+        named_stems = list()
+        if include_base_stem:
+            named_stems.append(('Old Stem', sound_helpers.copy_sequence(self.get_base_stem())))
+        named_stems.extend(zip([name for name, _ in named_words],
+                               self.get_modern_stems([word for _, word in named_words])))
+        return [(name, stem) + sound_helpers.get_sequence_strings(stem) for name, stem in named_stems]
 
     def get_all_forms_and_names(self, include_base_stem: bool = False, include_modern_stem: bool = True) -> \
             'tuple[list[list[list[Sound]]], list[str]]':
-        final_forms = list()
-        used_forms: list[str] = list()
-        if include_base_stem:
-            final_forms.append(copy.deepcopy(self.get_base_stem()))
-            used_forms.append('Old Stem')
-        form_names = list()
-        if include_modern_stem:
-            form_names.append('Stem')
-        for word_form in self.word_forms:
-            form_names.append(word_form.word_form_name)
-        for form_name in form_names:
-            final_forms.append(self.get_form(form_name))
-            used_forms.append(form_name)
-        return final_forms, used_forms
+        form_table = self.get_form_table(include_base_stem=include_base_stem, include_modern_stem=include_modern_stem)
+        return [stem for _, stem, _, _ in form_table], [name for name, _, _, _ in form_table]
 
-    def get_all_form_and_name_strings(self, include_ipa: bool = False, include_base_stem: bool = False,
-                                      include_modern_stem: bool = True) -> 'Generator[str]':
-        form_list, form_name_list = self.get_all_forms_and_names(include_base_stem=include_base_stem,
-                                                                 include_modern_stem=include_modern_stem)
-        form_names = list()
-        orthographies = list()
-        ipas = list()
-        longest_form_name = 0
-        longest_orthography = 0
-        for form, form_name in zip(form_list, form_name_list):
-            orthography = ''
-            ipa = ''
-            for syllable in form:
-                for s in syllable:
-                    orthography = orthography + s.orthographic_transcription
-                    if include_ipa:
-                        ipa = ipa + s.ipa_transcription
-            if form_name:
-                form_names.append(form_name)
-                if len(form_name) > longest_form_name:
-                    longest_form_name = len(form_name)
-            if include_ipa and ipa:
-                ipas.append(ipa)
-            orthographies.append(orthography)
-            if len(orthography) > longest_orthography:
-                longest_orthography = len(orthography)
-        for form_name, orthography, ipa in itertools.zip_longest(form_names, orthographies, ipas):
+    @staticmethod
+    def _get_form_table_strings(form_table: 'list[tuple[str, list[list[Sound]], str, str]]',
+                                include_ipa: bool = False) -> 'list[str]':
+        longest_form_name = max([len(name) for name, _, _, _ in form_table if name] + [0])
+        longest_orthography = max([len(orthography) for _, _, orthography, _ in form_table] + [0])
+        print_strings = list()
+        for form_name, _, orthography, ipa in form_table:
             print_string = orthography.ljust(longest_orthography)
             if form_name:
                 print_string = form_name.ljust(longest_form_name) + ' | ' + print_string
-            if ipa:
+            if include_ipa and ipa:
                 print_string = print_string + ' /' + ipa + '/'
+            print_strings.append(print_string)
+        return print_strings
+
+    def get_all_form_and_name_strings(self, include_ipa: bool = False, include_base_stem: bool = False,
+                                      include_modern_stem: bool = True) -> 'Generator[str]':
+        form_table = self.get_form_table(include_base_stem=include_base_stem, include_modern_stem=include_modern_stem)
+        for print_string in self._get_form_table_strings(form_table, include_ipa=include_ipa):
             yield print_string
 
     def print_all_forms(self, include_ipa: bool = False, include_base_stem: bool = False) -> int:
-        form_list, form_name_list = self.get_all_forms_and_names(include_base_stem=include_base_stem)
-        form_names = list()
-        orthographies = list()
-        ipas = list()
-        longest_form_name = 0
-        longest_orthography = 0
-        for form, form_name in zip(form_list, form_name_list):
-            orthography = ''
-            ipa = ''
-            for syllable in form:
-                for s in syllable:
-                    orthography = orthography + s.orthographic_transcription
-                    if include_ipa:
-                        ipa = ipa + s.ipa_transcription
-            if form_name:
-                form_names.append(form_name)
-                if len(form_name) > longest_form_name:
-                    longest_form_name = len(form_name)
-            if include_ipa and ipa:
-                ipas.append(ipa)
-            orthographies.append(orthography)
-            if len(orthography) > longest_orthography:
-                longest_orthography = len(orthography)
+        form_table = self.get_form_table(include_base_stem=include_base_stem)
         longest_print_string = 0
-        for form_name, orthography, ipa in itertools.zip_longest(form_names, orthographies, ipas):
-            print_string = orthography.ljust(longest_orthography)
-            if form_name:
-                print_string = form_name.ljust(longest_form_name) + ' | ' + print_string
-            if ipa:
-                print_string = print_string + ' /' + ipa + '/'
+        for print_string in self._get_form_table_strings(form_table, include_ipa=include_ipa):
             print(print_string)
             if len(print_string) > longest_print_string:
                 longest_print_string = len(print_string)
@@ -366,73 +728,20 @@ class Word:
         else:
             return len(self.language_sound_changes)
 
-    def fits_phonotactics(self, phonotactics: str, test_base_stem: bool = False) -> bool:
+    def fits_phonotactics(self, phonotactics: 'str | PhonotacticsAutomaton', test_base_stem: bool = False) -> bool:
         """Check if the Word is compatible with the given phonotactics string.
 
         Compares each syllable in the Word to the phonotactics and returns
         False if any syllable is incompatible.
 
-        Supports (), {}, and numbers in the phonotactics string.
+        Supports (), {}, and numbers in the phonotactics string. The string
+        is compiled once (see PhonotacticsAutomaton), and an already
+        compiled one can be passed in instead.
         """
         test_stem = self.get_modern_stem() if not test_base_stem else self.get_base_stem()
-        phonotactics.translate(dict.fromkeys(map(ord, u"1234567890,")))  # don't care about these characters
-
-        def split_parenthesis(tactics):
-            """Create a list of all possible resolutions of parentheses in a phonotactics string."""
-            for i, char in enumerate(tactics):
-                if char == '(':
-                    j = i
-                    layer = 1
-                    while layer > 0:
-                        j = j + 1
-                        if tactics[j] == '(':
-                            layer = layer + 1
-                        elif tactics[j] == ')':
-                            layer = layer - 1
-                    excluded = split_parenthesis(tactics[:i] + tactics[j+1:])  # without content in parentheses
-                    included = split_parenthesis(tactics[:i] + tactics[i+1:j] + tactics[j+1:])  # including it
-                    return excluded + included
-            return [tactics]  # string contains no parentheses (base case)
-
-        possibilities = []
-        for possibility in split_parenthesis(phonotactics):  # resolve {} brackets
-            parsed = []
-            index = 0
-            while index < len(possibility):
-                if possibility[index] != '{':
-                    parsed.append(possibility[index])
-                else:
-                    sounds = ''
-                    index = index + 1
-                    while possibility[index] != '}':
-                        sounds = sounds + possibility[index]
-                        index = index + 1
-                    parsed.append(sounds)
-                index = index + 1
-            possibilities.append(parsed)
-
-        # see if each syllable matches at least one possible resolution of the phonotactics
-        for syllable in test_stem:  # kind of a brute-force approach but this won't be called much so probably ok
-            syllable_tactics = [s.phonotactics_categories for s in syllable]
-            found_possibility = False
-            for possibility in possibilities:
-                if len(possibility) != len(syllable_tactics):
-                    continue
-                for p, st in zip(possibility, syllable_tactics):
-                    if len(st) == 1 and st not in p:
-                        continue
-                    found = False
-                    for category in st:
-                        if category in p:
-                            found = True
-                    if not found:
-                        continue
-                found_possibility = True
-                break
-            if not found_possibility:
-                return False
-
-        return True
+        if not isinstance(phonotactics, PhonotacticsAutomaton):
+            phonotactics = get_phonotactics_automaton(phonotactics)
+        return all(phonotactics.fits_syllable(syllable) for syllable in test_stem)
 
     def get_base_sounds(self) -> 'Generator[Sound]':
         for syllable in self.get_base_stem():
@@ -444,6 +753,87 @@ class Word:
             for sound in syllable:
                 yield sound
 
+    def copy_at_stage(self, language_stage: int, include_language_sound_changes: bool = True, branch: bool = False,
+                      include_all_definitions: bool = False, preserve_ids: bool = False,
+                      include_forms: bool = True) -> 'Word':
+        """Return a detached copy of this Word as it existed at a language
+        stage. See Language.copy_words_at_stage for the parameters; for a
+        read-only look at the stage without copying anything, use a
+        WordStageView instead."""
+        new_word = copy.deepcopy(self)
+        if not preserve_ids:
+            new_word.word_id = None
+        if not include_forms:
+            new_word.word_forms = []
+        if not preserve_ids and include_forms:
+            for form in new_word.word_forms:
+                form.word_id = None
+        if branch:
+            new_word.set_as_branch(self, language_stage)
+        new_word.copied_from = self
+
+        # trim sound changes to match language stage
+        new_word.word_sound_changes = [s for s in new_word.word_sound_changes if s.stage <= language_stage]
+        if include_language_sound_changes:
+            new_word.language_sound_changes = [s for s in new_word.language_sound_changes if s.stage <= language_stage]
+        else:
+            new_word.language_sound_changes = []
+
+        # trim definitions to match language stage
+        if not include_all_definitions:
+            definitions = list()
+            for definition, stage in new_word.get_definitions_and_stages():
+                if stage <= language_stage:
+                    definitions.append((definition, stage))
+            new_word.clear_definitions()
+            if len(definitions) > 0:
+                if branch:
+                    new_word.add_definition(definitions[-1][0], 0)
+                else:
+                    for definition, stage in definitions:
+                        new_word.add_definition(definition, stage)
+        return new_word
+
+    def snapshot_at_stage(self, language_stage: int, sound_map: 'dict[Sound, Sound] | None' = None,
+                          branch: bool = False) -> 'Word':
+        """Return a new Word with this Word's own data up to a language
+        stage, to be added to a copied or branched Language.
+
+        Unlike copy_at_stage, nothing is deep-copied. The new Word has no
+        language sound changes or forms, since the Language it is added to
+        gives it those. Its word sound changes are shallow copies of this
+        Word's up to the stage, and its base stem is the stem this Word
+        starts from (resolved from its stem or source Word if it has one).
+
+        :param language_stage: The language stage to take the Word from.
+        :type language_stage: int
+        :param sound_map: Sounds to replace in the base stem and word sound
+        changes, as in map_sounds. Sounds not in it are kept.
+        :type sound_map: dict[Sound, Sound] | None
+        :param branch: Whether the new Word is branched from this one (see
+        set_as_branch), in which case it has no base stem of its own and
+        only keeps its most recent definition, at stage 0.
+        :type branch: bool
+        :return: The new Word.
+        :rtype: Word
+        """
+        new_word = Word(None, self.categories, self.original_language_stage)
+        new_word.obsoleted_language_stage = self.obsoleted_language_stage
+        new_word.copied_from = self
+        new_word.word_sound_changes = [copy.copy(s) for s in self.word_sound_changes if s.stage <= language_stage]
+        if branch:
+            new_word.set_as_branch(self, language_stage)
+            definitions = [definition for stage, definition in self.definitions.items() if stage <= language_stage]
+            if len(definitions) > 0:
+                new_word.add_definition(definitions[-1], 0)
+        else:
+            base_stem = self._get_shared_base_stem()
+            new_word.base_stem = sound_helpers.copy_sequence(base_stem) if base_stem is not None else None
+            new_word.definitions = self.definitions.copy()
+        if sound_map:
+            new_word.map_sounds(sound_map)
+        return new_word
+
     def map_sounds(self, sound_map: 'dict[Sound, Sound]'):
         if self.base_stem:
             new_base_stem = []
@@ -462,3 +852,142 @@ class Word:
             sound_change.map_sounds(sound_map)
         for form in self.word_forms:
             form.map_sounds(sound_map)
+
+
+class SoundChangeOrder:
+    """The sound changes of a Word in the order they apply.
+
+    For each language stage from the Word's original stage up to its
+    current stage come the Word's sound changes of that stage and then the
+    language sound change of that stage; after them come the Word's sound
+    changes from its current stage on, ordered by stage. Sound changes of
+    the same stage keep the order they were added in.
+
+    The stage of each sound change is kept alongside. When the stages
+    never decrease along the order, as they do whenever language sound
+    changes have their own index as their stage, the sound changes up to
+    any stage are simply the first ones of the order.
+
+    The version of each sound change the order depends on is kept as well
+    (see is_current).
+    """
+
+    __slots__ = ('token', 'sound_changes', 'stages', 'trailing_start', 'ordered_by_stage', 'versions', 'edit_count')
+
+    def __init__(self, word: 'Word'):
+        self.token = word.get_sound_change_order_token()
+        self.edit_count = SoundChangeRule.edit_count
+        current_stage = word.get_current_stage()
+        self.versions = [(sound_change, sound_change.version) for sound_change in word.word_sound_changes]
+        self.versions.extend([(word.language_sound_changes[i], word.language_sound_changes[i].version)
+                              for i in range(word.original_language_stage, current_stage)])
+        by_stage = dict()  # [stage] = word sound changes of that stage
+        for sound_change in word.word_sound_changes:
+            by_stage.setdefault(sound_change.stage, list()).append(sound_change)
+        self.sound_changes = list()
+        for i in range(word.original_language_stage, current_stage):
+            self.sound_changes.extend(by_stage.get(i, ()))
+            self.sound_changes.append(word.language_sound_changes[i])
+        self.trailing_start = len(self.sound_changes)  # where the word sound changes past the current stage begin
+        for stage in sorted([stage for stage in by_stage if stage >= current_stage]):
+            self.sound_changes.extend(by_stage[stage])
+        self.stages = [sound_change.stage for sound_change in self.sound_changes]
+        self.ordered_by_stage = all(self.stages[k] <= self.stages[k + 1] for k in range(len(self.stages) - 1))
+
+    def is_current(self) -> bool:
+        """Return whether none of the sound changes this order depends on
+        were edited since it was built. Their versions are only compared if
+        any rule at all was edited since they were last compared."""
+        if self.edit_count == SoundChangeRule.edit_count:
+            return True
+        if any(sound_change.version != version for sound_change, version in self.versions):
+            return False
+        self.edit_count = SoundChangeRule.edit_count
+        return True
+
+    def get_sound_changes_at_stage(self, stage: int) -> 'list[SoundChangeRule]':
+        if self.ordered_by_stage:
+            return self.sound_changes[:bisect_right(self.stages, stage)]
+        return [s for s in self.sound_changes if s.stage <= stage]
+
+    def _insert(self, position: int, sound_change: SoundChangeRule):
+        self.sound_changes.insert(position, sound_change)
+        self.stages.insert(position, sound_change.stage)
+        if position > 0 and self.stages[position - 1] > sound_change.stage or \
+                position + 1 < len(self.stages) and sound_change.stage > self.stages[position + 1]:
+            self.ordered_by_stage = False
+
+    def add_language_sound_change(self, word: 'Word', stage: int):
+        """Update the order for the language sound change of a stage, which
+        was appended to the language sound changes of a Word whose order was
+        current up to the stage before. The caller updates the token."""
+        if word.obsoleted_language_stage < 0 or word.obsoleted_language_stage > stage:
+            # the current stage moved past the word sound changes of this stage
+            position = self.trailing_start
+            while position < len(self.stages) and self.stages[position] == stage:
+                position = position + 1
+            if stage >= word.original_language_stage:  # they go first, then the language sound change
+                self._insert(position, word.language_sound_changes[stage])
+                self.versions.append((word.language_sound_changes[stage], word.language_sound_changes[stage].version))
+                self.trailing_start = position + 1
+            else:  # neither applies to a Word that did not exist yet
+                del self.sound_changes[self.trailing_start:position]
+                del self.stages[self.trailing_start:position]
+
+    def add_word_sound_change(self, word: 'Word', sound_change: SoundChangeRule):
+        """Update the order after a word sound change was appended to a Word
+        whose order was current."""
+        self.versions.append((sound_change, sound_change.version))
+        if sound_change.stage >= word.get_current_stage():
+            position = len(self.sound_changes)
+            while position > self.trailing_start and self.stages[position - 1] > sound_change.stage:
+                position = position - 1
+            self._insert(position, sound_change)
+        elif sound_change.stage >= word.original_language_stage:
+            # it goes right before the language sound change of its stage
+            language_sound_change = word.language_sound_changes[sound_change.stage]
+            position = len(self.sound_changes) - 1
+            while self.sound_changes[position] is not language_sound_change:
+                position = position - 1
+            self._insert(position, sound_change)
+            self.trailing_start = self.trailing_start + 1
+        self.token = word.get_sound_change_order_token()
+
+
+def get_checkpoint_interval(sound_change_count: int) -> int:
+    """Return how many sound changes apart a Word with a certain number of
+    sound changes keeps checkpoints of its stem, or 0 if checkpointing is
+    off.
+
+    :param sound_change_count: The number of sound changes of the Word.
+    :type sound_change_count: int
+    :return: The checkpoint interval.
+    :rtype: int
+    """
+    if not checkpoint_interval and not max_checkpoints:
+        return 0
+    interval = max(checkpoint_interval, 1)
+    if max_checkpoints:
+        interval = max(interval, -(-sound_change_count // max_checkpoints))
+    return interval
+
+
+def set_checkpointing(interval: int = 0, max_checkpoints_per_word: int = 0):
+    """Turn checkpointing of Word stems on or off.
+
+    With checkpointing on, a Word keeps its stem after every interval
+    sound changes rather than its stem at every stage asked for, so asking
+    for any stage applies at most interval sound changes to the nearest
+    checkpoint before it.
+
+    :param interval: How many sound changes apart checkpoints are kept, or
+    0 to turn checkpointing off unless max_checkpoints_per_word is given.
+    :type interval: int
+    :param max_checkpoints_per_word: The most checkpoints a Word can keep,
+    which widens the interval for Words with many sound changes, or 0 for
+    no limit.
+    :type max_checkpoints_per_word: int
+    """
+    global checkpoint_interval, max_checkpoints
+    checkpoint_interval = interval
+    max_checkpoints = max_checkpoints_per_word
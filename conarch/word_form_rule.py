@@ -1,8 +1,8 @@
 import copy
 from collections.abc import Generator
+from conarch.multi_pattern import MultiPatternMatcher
 from conarch.sound import Sound
 from conarch.sound_change_rule import SoundChangeRule
-from conarch import sound_helpers
 
 
 class WordFormRule:
@@ -31,6 +31,7 @@ class WordFormRule:
         self.sound_changes = []  # the sound change rules that have affected the form over time
         self.original_language_stage = original_language_stage  # the stage the form was added to the language
         self.obsoleted_language_stage = -1  # the stage the form was removed from the language
+        self._matcher = None  # base form rules compiled together; shared by the forms created from this rule
 
     def add_suffix_rule(self, suffix: 'Sound | list[Sound]', word_end_sound_type: str = ''):
         if type(suffix) is not list:
@@ -62,11 +63,23 @@ class WordFormRule:
         for sound_change in self.get_adjusted_rules(stage=stage):
             yield sound_change.get_as_conjugation_rule_string()
 
+    def get_matcher(self) -> MultiPatternMatcher:
+        """Return the base form rules compiled into a Multi Pattern Matcher.
+
+        The matcher is kept and reused until a rule is added, removed, or
+        edited. Forms created from this rule apply their conjugation rules
+        with it while they are unedited (see Word.add_form_from_rule).
+        """
+        matcher = self._matcher
+        if matcher is None or len(matcher.sound_changes) != len(self.base_form_rules) or not matcher.is_current() or \
+                any(a is not b for a, b in zip(matcher.sound_changes, self.base_form_rules)):
+            matcher = MultiPatternMatcher(self.base_form_rules)
+            self._matcher = matcher
+        return matcher
+
     def transform_sequence(self, sequence: 'list[list[Sound]]') -> 'list[list[Sound]]':
-        for sound_change in self.get_adjusted_rules():
-            sequence = sound_helpers.change_sounds(sequence, sound_change.old_sounds, sound_change.new_sounds,
-                                                   sound_change.condition, sound_change.condition_sounds)
-        return sequence
+        # the adjusted rules are (for now) unmodified copies of the base form rules, so the matcher applies both
+        return self.get_matcher().apply(sequence)
 
     def map_sounds(self, sound_map: 'dict[Sound, Sound]'):
         for rule in self.base_form_rules:
@@ -0,0 +1,248 @@
+from collections.abc import Generator
+from conarch import sound_helpers
+from conarch.definition_timeline import DefinitionTimeline
+from conarch.phonotactics import PhonotacticsAutomaton, get_phonotactics_automaton
+from conarch.sound import Sound
+from conarch.sound_change_rule import SoundChangeRule
+from conarch.word import Word
+
+# methods that modify a Word; calling any of them on a view first turns it into a copy
+_MUTATING_METHODS = ('add_definition', 'clear_definitions', 'add_language_sound_change', 'add_word_sound_change',
+                     'add_form_word', 'add_form_from_rule', 'set_as_branch', 'map_sounds')
+_VIEW_ATTRIBUTES = ('word', 'language_stage', 'include_all_definitions', 'materialize', 'is_materialized')
+
+
+class WordStageView:
+    """A Word as it existed at a language stage, without copying it.
+
+    Reads the same way as a Word returned by Language.copy_words_at_stage:
+    stems, stem strings, definitions, and sound changes are those up to and
+    including the stage, and forms are views of the forms that existed at
+    the stage. Stems come from the stem cache of the original Word, so a
+    view costs nothing until it is read. Lists returned by a view are new
+    lists, and any other attribute (categories, word_id, etc.) is read
+    from the original Word.
+
+    The first time a view is modified, whether by calling a method that
+    modifies a Word or by setting an attribute, it makes a detached copy
+    with Word.copy_at_stage and from then on behaves as that copy. The
+    original Word is never modified through a view.
+    """
+
+    def __init__(self, word: Word, language_stage: int, include_all_definitions: bool = False):
+        object.__setattr__(self, '_copy', None)
+        object.__setattr__(self, 'word', word)
+        object.__setattr__(self, 'language_stage', language_stage)
+        object.__setattr__(self, 'include_all_definitions', include_all_definitions)
+
+    def __getattribute__(self, name: str):
+        if name.startswith('__') or name in _VIEW_ATTRIBUTES:
+            return object.__getattribute__(self, name)
+        word_copy = object.__getattribute__(self, '_copy')
+        if word_copy is None and name in _MUTATING_METHODS:
+            word_copy = object.__getattribute__(self, 'materialize')()
+        if word_copy is not None and not name.startswith('_'):
+            return getattr(word_copy, name)
+        return object.__getattribute__(self, name)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):  # the internals of the Word do not know about the stage
+            raise AttributeError(name)
+        return getattr(self.word, name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self.materialize(), name, value)
+
+    def __str__(self):
+        return self.get_modern_stem_string(include_ipa=False)
+
+    def materialize(self) -> Word:
+        """Return the detached copy of the Word at the stage that this view
+        behaves as from now on, copying it if that has not happened yet."""
+        word_copy = object.__getattribute__(self, '_copy')
+        if word_copy is None:
+            word_copy = self.word.copy_at_stage(self.language_stage,
+                                                include_all_definitions=self.include_all_definitions)
+            object.__setattr__(self, '_copy', word_copy)
+        return word_copy
+
+    def is_materialized(self) -> bool:
+        return object.__getattribute__(self, '_copy') is not None
+
+    @property
+    def copied_from(self) -> Word:
+        return self.word
+
+    @property
+    def base_stem(self) -> 'list[list[Sound]] | None':
+        return self.get_base_stem() if self.word.base_stem is not None else None
+
+    @property
+    def language_sound_changes(self) -> 'list[SoundChangeRule]':
+        return [s for s in self.word.language_sound_changes if s.stage <= self.language_stage]
+
+    @property
+    def word_sound_changes(self) -> 'list[SoundChangeRule]':
+        return [s for s in self.word.word_sound_changes if s.stage <= self.language_stage]
+
+    @property
+    def definitions(self) -> DefinitionTimeline:
+        if self.include_all_definitions:
+            return self.word.definitions.copy()
+        return DefinitionTimeline({stage: definition for stage, definition in self.word.definitions.items()
+                                   if stage <= self.language_stage})
+
+    @property
+    def word_forms(self) -> 'list[WordStageView]':
+        return [WordStageView(form, self.language_stage, include_all_definitions=self.include_all_definitions)
+                for form in self.word.word_forms if form.original_language_stage <= self.language_stage and
+                (form.obsoleted_language_stage == -1 or form.obsoleted_language_stage > self.language_stage)]
+
+    def _get_stage(self, stage: int) -> int:
+        return min(stage, self.language_stage)
+
+    def get_base_stem(self) -> 'list[list[Sound]]':
+        return sound_helpers.copy_sequence(self.word.get_base_stem())
+
+    def get_base_stem_string(self, include_ipa: bool = False) -> str:
+        return self.word.get_base_stem_string(include_ipa=include_ipa)
+
+    def print_base_stem(self, include_ipa: bool = False):
+        print(self.get_base_stem_string(include_ipa=include_ipa))
+
+    def get_modern_stem(self, backend: str = 'python') -> 'list[list[Sound]]':
+        return self.word.get_stem_at_stage(self.language_stage, backend=backend)
+
+    def get_modern_stem_string(self, include_ipa: bool = False) -> str:
+        return self.word.get_stem_string_at_stage(self.language_stage, include_ipa=include_ipa)
+
+    def print_modern_stem(self, include_ipa: bool = False):
+        print(self.get_modern_stem_string(include_ipa=include_ipa))
+
+    def get_stem_at_stage(self, stage: int, backend: str = 'python') -> 'list[list[Sound]]':
+        return self.word.get_stem_at_stage(self._get_stage(stage), backend=backend)
+
+    def get_stem_string_at_stage(self, stage: int, include_ipa: bool = False) -> str:
+        return self.word.get_stem_string_at_stage(self._get_stage(stage), include_ipa=include_ipa)
+
+    def print_stem_at_stage(self, stage: int, include_ipa: bool = False):
+        print(self.get_stem_string_at_stage(stage, include_ipa=include_ipa))
+
+    def iter_stem_history(self, backend: str = 'python') -> 'Generator[tuple[int, list[list[Sound]], bool]]':
+        current_stage = self.get_current_stage()
+        previous_stem = self.get_base_stem()
+        next_stage = self.word.original_language_stage
+        for stage, stem, changed in self.word.iter_stem_history(backend=backend):
+            if stage > min(self.language_stage, current_stage):
+                break
+            yield stage, stem, changed
+            previous_stem = stem
+            next_stage = stage + 1
+        for stage in range(next_stage, current_stage + 1):  # past the stage of this view, the stem stays as it was
+            stem = self.get_stem_at_stage(stage, backend=backend)
+            yield stage, stem, not sound_helpers.has_same_sounds(stem, previous_stem)
+            previous_stem = stem
+
+    def iter_stem_history_strings(self, include_ipa: bool = False) -> 'Generator[tuple[int, str, bool]]':
+        for stage, stem, changed in self.iter_stem_history():
+            yield stage, Word.get_stem_string(stem, include_ipa=include_ipa), changed
+
+    def all_sound_changes(self) -> 'list[SoundChangeRule]':
+        return self.word.sound_changes_at_stage(self.language_stage)
+
+    def sound_changes_at_stage(self, stage: int) -> 'list[SoundChangeRule]':
+        return self.word.sound_changes_at_stage(self._get_stage(stage))
+
+    def get_current_stage(self) -> int:
+        stage = len(self.language_sound_changes)
+        if self.word.obsoleted_language_stage >= 0:
+            return min(stage, self.word.obsoleted_language_stage)
+        return stage
+
+    def get_definitions_and_stages(self) -> 'Generator[str]':
+        for stage, definition in self.definitions.items():
+            yield definition, stage
+
+    def get_definition_at_stage(self, language_stage: int, exact: bool = False) -> str:
+        if self.include_all_definitions:
+            return self.word.get_definition_at_stage(language_stage, exact=exact)
+        if exact and language_stage > self.language_stage:
+            return ''
+        return self.word.get_definition_at_stage(self._get_stage(language_stage), exact=exact)
+
+    def get_definition_stage_at_stage(self, language_stage: int) -> int:
+        if self.include_all_definitions:
+            return self.word.get_definition_stage_at_stage(language_stage)
+        return self.word.get_definition_stage_at_stage(self._get_stage(language_stage))
+
+    def has_definition_at_stage(self, language_stage: int, exact: bool = False) -> bool:
+        if self.include_all_definitions:
+            return self.word.has_definition_at_stage(language_stage, exact=exact)
+        if exact and language_stage > self.language_stage:
+            return False
+        return self.word.has_definition_at_stage(self._get_stage(language_stage), exact=exact)
+
+    def get_form(self, form_name: str) -> 'list[list[Sound]]':
+        if form_name == 'Stem':
+            return self.get_modern_stem()
+        for form in self.word_forms:
+            if form.word_form_name == form_name:
+                return form.get_modern_stem()
+
+    def print_form(self, form_name: str, include_ipa: bool = False):
+        print(Word.get_stem_string(self.get_form(form_name), include_ipa=include_ipa))
+
+    def get_form_table(self, include_base_stem: bool = False, include_modern_stem: bool = True) -> \
+            'list[tuple[str, list[list[Sound]], str, str]]':
+        """Return a (name, stem, orthography, IPA) tuple for this Word and
+        each of its forms at the stage, as in Word.get_form_table."""
+        word_forms = self.word_forms
+        forms_by_name = dict()
+        for word_form in word_forms:
+            forms_by_name.setdefault(word_form.word_form_name, word_form)
+        named_stems = list()
+        if include_base_stem:
+            named_stems.append(('Old Stem', self.get_base_stem()))
+        if include_modern_stem:
+            named_stems.append(('Stem', self.get_modern_stem()))
+        for word_form in word_forms:
+            named_stems.append((word_form.word_form_name, forms_by_name[word_form.word_form_name].get_modern_stem()))
+        return [(name, stem) + sound_helpers.get_sequence_strings(stem) for name, stem in named_stems]
+
+    def get_all_forms_and_names(self, include_base_stem: bool = False, include_modern_stem: bool = True) -> \
+            'tuple[list[list[list[Sound]]], list[str]]':
+        form_table = self.get_form_table(include_base_stem=include_base_stem, include_modern_stem=include_modern_stem)
+        return [stem for _, stem, _, _ in form_table], [name for name, _, _, _ in form_table]
+
+    def get_all_form_and_name_strings(self, include_ipa: bool = False, include_base_stem: bool = False,
+                                      include_modern_stem: bool = True) -> 'Generator[str]':
+        form_table = self.get_form_table(include_base_stem=include_base_stem, include_modern_stem=include_modern_stem)
+        for print_string in Word._get_form_table_strings(form_table, include_ipa=include_ipa):
+            yield print_string
+
+    def print_all_forms(self, include_ipa: bool = False, include_base_stem: bool = False) -> int:
+        longest_print_string = 0
+        for print_string in self.get_all_form_and_name_strings(include_ipa=include_ipa,
+                                                               include_base_stem=include_base_stem):
+            print(print_string)
+            longest_print_string = max(longest_print_string, len(print_string))
+        return longest_print_string
+
+    def is_empty(self) -> bool:
+        return self.word.is_empty()
+
+    def fits_phonotactics(self, phonotactics: 'str | PhonotacticsAutomaton', test_base_stem: bool = False) -> bool:
+        test_stem = self.get_modern_stem() if not test_base_stem else self.get_base_stem()
+        if not isinstance(phonotactics, PhonotacticsAutomaton):
+            phonotactics = get_phonotactics_automaton(phonotactics)
+        return all(phonotactics.fits_syllable(syllable) for syllable in test_stem)
+
+    def get_base_sounds(self) -> 'Generator[Sound]':
+        for syllable in self.get_base_stem():
+            for sound in syllable:
+                yield sound
+
+    def get_modern_sounds(self) -> 'Generator[Sound]':
+        for syllable in self.get_modern_stem():
+            for sound in syllable:
+                yield sound
@@ -1,3 +1,7 @@
 from setuptools import setup
 
-setup()
+setup(
+    extras_require={
+        'batch': ['numpy'],  # lets conarch.batch apply a sound change to many stems at once
+    },
+)
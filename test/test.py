@@ -1,12 +1,24 @@
 import unittest
 from copy import copy
 
+from conarch import batch
+from conarch import evolution
+from conarch import regex_backend
+from conarch import sound_change_timeline
+from conarch import word as word_module
+from conarch.flat_stem import FlatStem, SoundTable, change_sounds_flat
 from conarch.language import Language
-from conarch.sound import Sound
+from conarch.multi_pattern import MultiPatternMatcher, apply_anchored_insertion, get_insertion_anchor
+from conarch.phonotactics import PhonotacticsAutomaton
+from conarch.sound import Sound, WORD_BOUNDARY
 from conarch.sound_change_rule import SoundChangeRule
-from conarch.sound_helpers import change_sounds
+from conarch.sound_change_timeline import SoundChangeTimeline
+from conarch.sound_helpers import CompiledCondition, SequenceIndex, change_sounds, get_nearby_sound, \
+    get_sequence_index
+from conarch.transducer import SoundChangeTransducer
 from conarch.word import Word
 from conarch.word_form_rule import WordFormRule
+from conarch.word_stage_view import WordStageView
 
 
 # noinspection SpellCheckingInspection
@@ -683,6 +695,103 @@ class TestSoundHelpers(unittest.TestCase):
         new_sequence = change_sounds(old_sequence, ['C'], [d, d])
         self.assertEqual(target_sequence, new_sequence)
 
+    def test_change_sounds_45(self):
+        """
+        Test that a sound change shares Sound objects with its input and
+        replacement instead of copying them.
+
+        'ab' to 'ac' via 'b > c'
+        """
+        a = Sound('a', phonotactics_categories='V')
+        b = Sound('b', phonotactics_categories='C')
+        c = Sound('c', phonotactics_categories='C')
+        old_sequence = [[a, b]]
+        new_sequence = change_sounds(old_sequence, [b], [c])
+        self.assertIs(new_sequence[0][0], a)
+        self.assertIs(new_sequence[0][1], c)
+        self.assertIsNot(new_sequence[0], old_sequence[0])
+
+    def test_compiled_condition_1(self):
+        """
+        Test that a condition with negation and a word boundary compiles into
+        one step per checked position with the right offsets.
+
+        '!V_#'
+        """
+        condition = CompiledCondition('!V_#')
+        self.assertEqual(condition.steps, ((False, -1, 'V', None, True), (True, 1, '#', None, False)))
+
+    def test_compiled_condition_2(self):
+        """
+        Test that a compiled condition with condition sounds only passes for
+        sounds in between those specific sounds.
+
+        'sab' and 'tab' against '@_@' with 's' and 'b'
+        """
+        a = Sound('a', phonotactics_categories='V')
+        b = Sound('b', phonotactics_categories='C')
+        s = Sound('s', phonotactics_categories='C')
+        t = Sound('t', phonotactics_categories='C')
+        condition = CompiledCondition('@_@', [s, b])
+        self.assertTrue(condition.evaluate([[s, a, b]], 0, 1, 0, 1))
+        self.assertFalse(condition.evaluate([[t, a, b]], 0, 1, 0, 1))
+
+    def test_get_nearby_sound_1(self):
+        """
+        Test that running off either end of a sequence returns the shared
+        word boundary, which cannot be modified.
+        """
+        a = Sound('a', phonotactics_categories='V')
+        self.assertIs(get_nearby_sound([[a]], 0, 0, 1), WORD_BOUNDARY)
+        self.assertIs(get_nearby_sound([[a]], 0, 0, -1), WORD_BOUNDARY)
+        self.assertEqual(WORD_BOUNDARY, Sound('#', phonotactics_categories='#'))
+        with self.assertRaises(AttributeError):
+            WORD_BOUNDARY.phonotactics_categories = 'V'
+
+    def test_get_nearby_sound_2(self):
+        """
+        Test that a Sequence Index finds the same sounds as stepping through
+        the syllables, at any distance and in both directions.
+
+        'sa.bat'
+        """
+        a = Sound('a', phonotactics_categories='V')
+        b = Sound('b', phonotactics_categories='C')
+        s = Sound('s', phonotactics_categories='C')
+        t = Sound('t', phonotactics_categories='C')
+        sequence = [[s, a], [b, a, t]]
+        index = get_sequence_index(sequence)
+        self.assertIsInstance(index, SequenceIndex)
+        for i, j in [(0, 0), (0, 1), (1, 0), (1, 2)]:
+            for steps in [-3, -2, -1, 1]:
+                self.assertIs(get_nearby_sound(sequence, i, j, steps, index=index),
+                              get_nearby_sound(sequence, i, j, steps))
+        self.assertIs(get_nearby_sound(sequence, 0, 1, 2, index=index), get_nearby_sound(sequence, 0, 1, 2))
+        self.assertIs(index.get_nearby_sound(1, 2, -4), s)
+        self.assertIsNone(index.get_nearby_sound(1, 2, 2))
+
+    def test_get_nearby_sound_3(self):
+        """
+        Test that sequences with an empty syllable are not indexed, since
+        stepping into an empty syllable reads as a word boundary.
+        """
+        a = Sound('a', phonotactics_categories='V')
+        self.assertIsNone(get_sequence_index([[a], [], [a]]))
+        self.assertIsNone(get_sequence_index([]))
+
+    def test_sound_edit_1(self):
+        """
+        Test that editing a Sound in place is counted, while creating or
+        copying a Sound or setting a value it already has is not.
+        """
+        edit_count = Sound.edit_count
+        a = Sound('a', phonotactics_categories='V')
+        copy(a)
+        a.orthographic_transcription = 'a'
+        self.assertEqual(Sound.edit_count, edit_count)
+        a.phonotactics_categories = 'C'
+        self.assertEqual(Sound.edit_count, edit_count + 1)
+
 
 # noinspection SpellCheckingInspection
 class TestWord(unittest.TestCase):
@@ -1122,6 +1231,359 @@ class TestWord(unittest.TestCase):
         form = self.abacus.add_form_from_rule(self.plural)
         self.assertEqual(form.get_modern_stem(), modern_stem[:-1] + [modern_stem[-1] + [self.s]])
 
+    def test_word_40(self):
+        """
+        Test that modifying the lists of a modern stem does not modify the
+        base stem, even though the two share their Sound objects.
+        """
+        modern_stem = self.abacus.get_modern_stem()
+        modern_stem[0].append(self.s)
+        self.assertEqual(self.abacus.get_base_stem()[0], [self.a_ae])
+        self.assertIs(modern_stem[0][0], self.abacus.get_base_stem()[0][0])
+
+    def test_word_41(self):
+        """
+        Test that asking for the same stem twice is served from the stem
+        cache the second time, and that the cached stem cannot be modified
+        through a returned copy.
+        """
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        word_module.stem_cache_statistics.clear()
+        modern_stem = self.abacus.get_modern_stem()
+        modern_stem[0].append(self.s)
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.a_ae], [self.p, self.a_schwa],
+                                                         [self.c_k, self.u_schwa, self.s]])
+        self.assertEqual(word_module.stem_cache_statistics['misses'], 1)
+        self.assertEqual(word_module.stem_cache_statistics['hits'], 1)
+
+    def test_word_42(self):
+        """
+        Test that the stem cache notices a new base stem and new sound
+        changes of the Word or its Language.
+        """
+        self.abacus.get_modern_stem()
+        self.abacus.base_stem = [[self.b, self.u]]
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.b, self.u]])
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.p, self.u]])
+        self.schwa_u.stage = 1
+        self.abacus.add_word_sound_change(self.schwa_u)
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.p, self.u_schwa]])
+        self.abacus.word_sound_changes.pop()
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.p, self.u]])
+
+    def test_word_43(self):
+        """
+        Test that the stem cache notices an edit to a Sound Change Rule
+        that has already been used, including a change of its stage.
+        """
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.assertEqual(self.abacus.get_stem_at_stage(0)[1][0], self.p)
+        self.unvoice_b.new_sounds = [self.d]
+        self.assertEqual(self.abacus.get_stem_at_stage(0)[1][0], self.d)
+        self.unvoice_b.stage = 1
+        self.assertEqual(self.abacus.get_stem_at_stage(0)[1][0], self.b)
+
+    def test_word_44(self):
+        """
+        Test that the cached stems of a form are recomputed when the Word
+        it is a form of changes.
+        """
+        form = self.abacus.add_form_from_rule(self.plural)
+        self.assertEqual(form.get_modern_stem()[-1][-1], self.s)
+        self.abacus.base_stem = [[self.b, self.u]]
+        self.assertEqual(form.get_modern_stem(), [[self.b, self.u, self.s]])
+
+    def test_word_45(self):
+        """
+        Test that appending a language sound change only applies the new
+        sound change to the previously cached modern stem.
+        """
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.abacus.add_language_sound_change(self.unschwa_u)
+        self.abacus.get_modern_stem()
+        self.abacus.add_language_sound_change(self.final_s_to_t)
+        word_module.stem_cache_statistics.clear()
+        evolution.reset_prefilter_statistics()
+        self.assertEqual(self.abacus.get_modern_stem(), [[self.a_ae], [self.p, self.a_schwa],
+                                                         [self.c_k, self.u, self.t]])
+        self.assertEqual(word_module.stem_cache_statistics['resumed'], 1)
+        self.assertEqual(sum(evolution.prefilter_statistics.values()), 1)
+
+    def test_word_46(self):
+        """
+        Test that editing an older sound change recomputes the modern stem
+        from the furthest stem that is still valid, with the same result as
+        a Word with no cache.
+        """
+        for stage, sound_change in enumerate([self.unvoice_b, self.unschwa_u, self.final_s_to_t]):
+            sound_change.stage = stage
+            self.abacus.add_language_sound_change(sound_change)
+        self.abacus.get_stem_at_stage(0)
+        self.abacus.get_modern_stem()
+        self.unschwa_u.new_sounds = [self.a_ae]
+        word_module.stem_cache_statistics.clear()
+        evolution.reset_prefilter_statistics()
+        modern_stem = self.abacus.get_modern_stem()
+        self.assertEqual(word_module.stem_cache_statistics['resumed'], 1)
+        self.assertEqual(sum(evolution.prefilter_statistics.values()), 2)
+        fresh = Word(self.abacus.base_stem)
+        for sound_change in self.abacus.language_sound_changes:
+            fresh.add_language_sound_change(sound_change)
+        self.assertEqual(modern_stem, fresh.get_modern_stem())
+
+    def test_word_47(self):
+        """
+        Test that with checkpointing on, a stem at any stage is replayed
+        from the nearest checkpoint and matches the stem without
+        checkpoints.
+        """
+        sound_changes = [self.unvoice_b, self.puh_to_duh, self.unschwa_u, self.final_s_to_t, self.voice_t]
+        for stage, sound_change in enumerate(sound_changes):
+            sound_change.stage = stage
+            self.abacus.add_language_sound_change(sound_change)
+        expected = [self.abacus.get_stem_at_stage(stage) for stage in range(len(sound_changes))]
+        self.abacus.invalidate_stem_cache()
+        word_module.set_checkpointing(2)
+        self.addCleanup(word_module.set_checkpointing)
+        self.abacus.get_modern_stem()
+        evolution.reset_prefilter_statistics()
+        self.assertEqual(self.abacus.get_stem_at_stage(2), expected[2])
+        self.assertEqual(sum(evolution.prefilter_statistics.values()), 1)
+        self.assertEqual([self.abacus.get_stem_at_stage(stage) for stage in range(len(sound_changes))], expected)
+
+    def test_word_48(self):
+        """
+        Test that a limit on checkpoints per Word widens the checkpoint
+        interval for Words with many sound changes.
+        """
+        word_module.set_checkpointing(2, max_checkpoints_per_word=4)
+        self.addCleanup(word_module.set_checkpointing)
+        self.assertEqual(word_module.get_checkpoint_interval(6), 2)
+        self.assertEqual(word_module.get_checkpoint_interval(100), 25)
+        word_module.set_checkpointing()
+        self.assertEqual(word_module.get_checkpoint_interval(100), 0)
+
+    def test_word_49(self):
+        """
+        Test that adding sound changes through the Word updates its sound
+        change order in place, with word sound changes of a stage before
+        the language sound change of that stage.
+        """
+        self.unvoice_b.stage = 0
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        order = self.abacus.get_sound_change_order()
+        self.schwa_u.stage = 1
+        self.abacus.add_word_sound_change(self.schwa_u)
+        self.unschwa_u.stage = 1
+        self.abacus.add_language_sound_change(self.unschwa_u)
+        self.puh_to_duh.stage = 0
+        self.abacus.add_word_sound_change(self.puh_to_duh)
+        self.assertIs(self.abacus.get_sound_change_order(), order)
+        self.assertEqual(self.abacus.all_sound_changes(),
+                         [self.puh_to_duh, self.unvoice_b, self.schwa_u, self.unschwa_u])
+        self.assertEqual(self.abacus.sound_changes_at_stage(0), [self.puh_to_duh, self.unvoice_b])
+
+    def test_word_50(self):
+        """
+        Test that the sound change order is rebuilt when the lists of sound
+        changes are modified directly.
+        """
+        self.unvoice_b.stage = 0
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.abacus.get_sound_change_order()
+        self.schwa_u.stage = 0
+        self.abacus.word_sound_changes.append(self.schwa_u)
+        self.assertEqual(self.abacus.all_sound_changes(), [self.schwa_u, self.unvoice_b])
+        self.abacus.language_sound_changes = []
+        self.assertEqual(self.abacus.all_sound_changes(), [self.schwa_u])
+
+    def test_word_51(self):
+        """
+        Test that the stem history gives the stem of every stage, marks the
+        stages where it changed, and only applies each sound change once.
+        """
+        for stage, sound_change in enumerate([self.unvoice_b, self.schwa_u, self.final_s_to_t]):
+            sound_change.stage = stage
+            self.abacus.add_language_sound_change(sound_change)
+        expected = [(stage, self.abacus.get_stem_at_stage(stage)) for stage in range(4)]
+        evolution.reset_prefilter_statistics()
+        history = list(self.abacus.iter_stem_history())
+        self.assertEqual([(stage, stem) for stage, stem, _ in history], expected)
+        self.assertEqual([changed for _, _, changed in history], [True, False, True, False])
+        self.assertEqual(sum(evolution.prefilter_statistics.values()), 3)
+
+    def test_word_52(self):
+        """
+        Test the string version of the stem history.
+        """
+        self.unvoice_b.stage = 0
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.assertEqual(list(self.abacus.iter_stem_history_strings()), [(0, 'apacus', True), (1, 'apacus', False)])
+
+    def test_word_53(self):
+        """
+        Test that every form of a Word shares one computation of the Word's
+        stem at the stage the forms were added, even with checkpointing on.
+        """
+        word_module.set_checkpointing(1)
+        self.addCleanup(word_module.set_checkpointing)
+        self.unvoice_b.stage = 0
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        forms = [self.abacus.add_form_word(Word(None), stage=1) for _ in range(3)]
+        word_module.stem_cache_statistics.clear()
+        for form in forms:
+            self.assertEqual(form.get_modern_stem()[1][0], self.p)
+        self.assertEqual(word_module.stem_cache_statistics['misses'], 4)
+        self.assertEqual(word_module.stem_cache_statistics['hits'], 2)
+        self.assertIs(forms[0].get_base_stem()[0][0], forms[1].get_base_stem()[0][0])
+
+    def test_word_54(self):
+        """
+        Test that the stem shared with the forms of a Word follows changes
+        to the Word, and that modifying a form's base stem does not affect
+        the shared stem.
+        """
+        form = self.abacus.add_form_word(Word(None), stage=0)
+        form.get_base_stem()[0].append(self.s)
+        self.assertEqual(form.get_modern_stem()[0], [self.a_ae])
+        self.abacus.base_stem = [[self.b, self.u]]
+        self.assertEqual(form.get_modern_stem(), [[self.b, self.u]])
+
+    def test_word_55(self):
+        """
+        Test that a Word defined at exactly the given stage gives that stage
+        as the stage it was most recently defined at.
+        """
+        self.abacus.add_definition('A tool for performing calculations.', 3)
+        self.assertEqual(self.abacus.get_definition_stage_at_stage(3), 3)
+        self.assertEqual(self.abacus.get_definition_stage_at_stage(2), -1)
+
+    def test_word_56(self):
+        """
+        Test that definitions far apart are found from any stage between
+        them, and that a copied Word keeps its own definitions.
+        """
+        self.abacus.add_definition('A tool for performing calculations.', 1000)
+        self.abacus.add_definition('A tool for counting.', 10)
+        self.assertEqual(self.abacus.get_definition_stage_at_stage(999), 10)
+        self.assertEqual(self.abacus.get_definition_at_stage(5000), 'A tool for performing calculations.')
+        self.assertEqual(list(self.abacus.get_definitions_and_stages()),
+                         [('A tool for performing calculations.', 1000), ('A tool for counting.', 10)])
+        copied = copy(self.abacus)
+        copied.definitions = copied.definitions.copy()
+        del copied.definitions[10]
+        self.assertEqual(self.abacus.get_definition_at_stage(999), 'A tool for counting.')
+        self.assertEqual(copied.get_definition_at_stage(999), '')
+
+    def test_word_57(self):
+        """
+        Test that a Word only fits phonotactics whose categories match its
+        sounds, not just phonotactics of the right length.
+        """
+        self.assertTrue(self.abacus.fits_phonotactics('(C)V(C)'))
+        self.assertFalse(self.abacus.fits_phonotactics('CV(C)'))
+        self.assertFalse(self.abacus.fits_phonotactics('VC(C)'))
+        self.assertTrue(self.abacus.fits_phonotactics('{C,V}(5C)(V)(C)'))
+
+    def test_word_58(self):
+        """
+        Test that the form table gives the name, stem, orthography and IPA of
+        the base stem, the modern stem and every form.
+        """
+        self.abacus.add_form_from_rule(self.plural)
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        form_table = self.abacus.get_form_table(include_base_stem=True)
+        self.assertEqual([(name, orthography, ipa) for name, _, orthography, ipa in form_table],
+                         [('Old Stem', 'abacus', 'æbəkəs'), ('Stem', 'apacus', 'æpəkəs'),
+                          ('Plural', 'apacuss', 'æpəkəss')])
+        self.assertEqual(form_table[2][1], self.abacus.word_forms[0].get_modern_stem())
+        self.assertEqual(list(self.abacus.get_all_form_and_name_strings(include_ipa=True)),
+                         ['Stem   | apacus  /æpəkəs/', 'Plural | apacuss /æpəkəss/'])
+
+    def test_word_59(self):
+        """
+        Test that evaluating the forms of a Word a second time only uses
+        cached stems.
+        """
+        for _ in range(3):
+            self.abacus.add_form_from_rule(self.plural)
+        self.abacus.get_form_table()
+        word_module.stem_cache_statistics.clear()
+        self.abacus.get_form_table()
+        self.assertEqual(word_module.stem_cache_statistics['misses'], 0)
+        self.assertEqual(word_module.stem_cache_statistics['hits'], 2)
+
+    def test_word_60(self):
+        """
+        Test that stem strings are cached by stage and transcription, and
+        rendered again once the Word changes.
+        """
+        word_module.stem_cache_statistics.clear()
+        self.assertEqual(self.abacus.get_modern_stem_string(), 'abacus')
+        self.assertEqual(self.abacus.get_modern_stem_string(include_ipa=True), 'abacus /æbəkəs/')
+        self.assertEqual(str(self.abacus), 'abacus')
+        self.assertEqual(word_module.stem_cache_statistics['string_misses'], 2)
+        self.assertEqual(word_module.stem_cache_statistics['string_hits'], 1)
+        self.unvoice_b.stage = 0
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        self.assertEqual(str(self.abacus), 'apacus')
+        self.assertEqual(self.abacus.get_stem_string_at_stage(0, include_ipa=True), 'apacus /æpəkəs/')
+
+    def test_word_61(self):
+        """
+        Test that editing a Sound Change Rule the Word does not use leaves
+        its cached stems valid, while editing one of its own still does not.
+        """
+        self.abacus.add_language_sound_change(self.unvoice_b)
+        other_word = Word([[self.b, self.u]], 'N')
+        other_word.add_language_sound_change(self.schwa_u)
+        self.abacus.get_modern_stem()
+        other_word.get_modern_stem()
+        self.schwa_u.new_sounds = [self.a_schwa]
+        word_module.stem_cache_statistics.clear()
+        self.assertEqual(self.abacus.get_modern_stem()[1][0], self.p)
+        self.assertEqual(word_module.stem_cache_statistics['hits'], 1)
+        self.assertEqual(word_module.stem_cache_statistics['misses'], 0)
+        self.unvoice_b.new_sounds = [self.d]
+        self.assertEqual(self.abacus.get_modern_stem()[1][0], self.d)
+        self.assertEqual(other_word.get_modern_stem(), [[self.b, self.a_schwa]])
+
+    def test_word_62(self):
+        """
+        Test that the stems of every stage share one list of the sound
+        changes applied, and that an edit resumes from the furthest stem
+        before the edited sound change.
+        """
+        for stage, sound_change in enumerate([self.unvoice_b, self.unschwa_u, self.final_s_to_t]):
+            sound_change.stage = stage
+            self.abacus.add_language_sound_change(sound_change)
+        for stage in range(3):
+            self.abacus.get_stem_at_stage(stage)
+        self.assertEqual([sound_change for sound_change, _ in self.abacus._evolution[1]],
+                         [self.unvoice_b, self.unschwa_u, self.final_s_to_t])
+        self.assertEqual(sorted(self.abacus._evolution[2]), [1, 2, 3])
+        self.final_s_to_t.new_sounds = [self.d]
+        word_module.stem_cache_statistics.clear()
+        evolution.reset_prefilter_statistics()
+        self.assertEqual(self.abacus.get_modern_stem()[-1][-1], self.d)
+        self.assertEqual(word_module.stem_cache_statistics['resumed'], 1)
+        self.assertEqual(sum(evolution.prefilter_statistics.values()), 1)
+        self.assertEqual(sorted(self.abacus._evolution[2]), [1, 2, 3])
+
+    def test_word_63(self):
+        """
+        Test that cached stem strings are dropped once a Sound is edited in
+        place, so the Word is rendered with the edited Sound.
+        """
+        self.assertEqual(self.abacus.get_modern_stem_string(include_ipa=True), 'abacus /æbəkəs/')
+        self.assertEqual(str(self.abacus), 'abacus')
+        self.a_ae.ipa_transcription = 'a'
+        self.c_k.orthographic_transcription = 'k'
+        self.assertEqual(str(self.abacus), 'abakus')
+        self.assertEqual(list(self.abacus._string_cache), [(None, False)])
+        self.assertEqual(self.abacus.get_modern_stem_string(include_ipa=True), 'abakus /abəkəs/')
+
 
 # noinspection SpellCheckingInspection
 class TestLanguage(unittest.TestCase):
@@ -1555,6 +2017,818 @@ class TestLanguage(unittest.TestCase):
         self.assertIn('word', new_stems)
         self.assertNotIn('wort', new_stems)
 
+    def test_language_29(self):
+        """
+        Test that the definitions of every Word at a stage can be resolved
+        at once, with '' for words not defined by that stage.
+        """
+        self.speak.add_definition('To say something.', 1)
+        self.testspeak.apply_sound_change(self.final_st_to_s)
+        self.assertEqual(self.testspeak.get_word_definitions_at_stage(0),
+                         ['A suffix for the name of a language.', ''])
+        self.assertEqual(self.testspeak.get_word_definitions_at_stage(),
+                         ['A suffix for the name of a language.', 'To say something.'])
+        self.assertEqual(self.testspeak.get_word_definitions_at_stage(1, exact=True), ['', 'To say something.'])
+
+    def test_language_30(self):
+        """
+        Test that every syllable of the lexicon that does not fit the
+        phonotactics of the Language is reported, at the requested stage.
+        """
+        self.assertEqual(self.testspeak.get_phonotactics_violations(), [])
+        self.testspeak.add_word(self.speech, language_stage=1)
+        self.testspeak.apply_sound_change(SoundChangeRule(self.e, None))
+        self.assertEqual(self.testspeak.get_phonotactics_violations(), [(self.test, 0, [self.t, self.s, self.t])])
+        self.assertEqual(self.testspeak.get_phonotactics_violations(language_stage=0),
+                         [(self.test, 0, [self.t, self.s, self.t])])
+        self.testspeak.phonotactics = 'C(C)(V)C(C)'
+        self.assertEqual(self.testspeak.get_phonotactics_violations(), [])
+
+    def test_language_31(self):
+        """
+        Test that the phonetic inventory at each stage includes the sounds of
+        words added at or before the stage and of sound changes before it,
+        without sounds removed by unconditioned sound changes.
+        """
+        self.testspeak.add_word(self.word)
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        self.testspeak.add_word(self.speech)
+        original = [self.t, self.e, self.s, self.p, self.ea_i, self.k]
+        self.assertEqual(self.testspeak.get_phonetic_inventory_at_stage(0), original + [self.w, self.or_e, self.d])
+        self.assertEqual(self.testspeak.get_phonetic_inventory_at_stage(1),
+                         original + [self.w, self.or_e, self.ee_i, self.ch])
+        self.assertEqual(self.testspeak.get_phonetic_inventory_at_stage(),
+                         self.testspeak.get_phonetic_inventory_at_stage(1))
+
+    def test_language_32(self):
+        """
+        Test that the phonetic inventory is built from the sounds of the words
+        themselves rather than copies, and follows changes to their base
+        stems.
+        """
+        self.testspeak.add_word(self.word)
+        inventory = self.testspeak.get_phonetic_inventory_at_stage()
+        self.assertIs(inventory[-1], self.d)
+        self.word.base_stem = [[self.w, self.or_e, self.ch]]
+        inventory = self.testspeak.get_phonetic_inventory_at_stage()
+        self.assertIs(inventory[-1], self.ch)
+        self.assertNotIn(self.d, inventory)
+
+    def test_language_33(self):
+        """
+        Test that the full sound inventory includes each Sound from every
+        stage once, including sounds that were later removed.
+        """
+        self.testspeak.add_word(self.word)
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        self.testspeak.add_word(self.speech)
+        self.testspeak.add_word(Word([[self.w, copy(self.ch)]]))
+        self.assertEqual(self.testspeak.get_full_sound_inventory(),
+                         [self.t, self.e, self.s, self.p, self.ea_i, self.k, self.w, self.or_e, self.d, self.ee_i,
+                          self.ch])
+
+    def test_language_34(self):
+        """
+        Test that the full sound inventory follows changes to the base stems
+        and stages of words.
+        """
+        self.testspeak.add_word(self.word)
+        self.assertIn(self.d, self.testspeak.get_full_sound_inventory())
+        self.word.base_stem = [[self.w, self.or_e, self.t]]
+        self.assertNotIn(self.d, self.testspeak.get_full_sound_inventory())
+        self.speech.original_language_stage = 1
+        self.testspeak.words.append(self.speech)
+        self.assertNotIn(self.ch, self.testspeak.get_full_sound_inventory())
+        self.testspeak.apply_sound_change(self.final_st_to_s)
+        self.assertIn(self.ch, self.testspeak.get_full_sound_inventory())
+
+    def test_language_35(self):
+        """
+        Test that words added after stage 0 keep their stage and their stems
+        in a copied Language.
+        """
+        self.testspeak.apply_sound_change(self.final_st_to_s)
+        self.testspeak.add_word(self.word)
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        cloned = self.testspeak.copy_language_at_stage()
+        self.assertEqual([w.original_language_stage for w in cloned.words], [0, 0, 1])
+        for source_word, cloned_word in zip(self.testspeak.words, cloned.words):
+            for stage in range(self.testspeak.get_current_stage() + 1):
+                self.assertEqual(source_word.get_stem_string_at_stage(stage, include_ipa=True),
+                                 cloned_word.get_stem_string_at_stage(stage, include_ipa=True))
+        self.assertEqual(cloned.words[2].get_modern_stem_string(), 'wort')
+
+    def test_language_36(self):
+        """
+        Test that copying and branching a Language share nothing with it that
+        could be modified, while branched words still take their stems from
+        the source words.
+        """
+        self.test.add_word_sound_change(self.final_st_to_s)
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        cloned = self.testspeak.copy_language_at_stage()
+        branch = self.testspeak.branch_language_at_stage()
+        self.assertIsNot(cloned.sound_changes[0], self.unvoice_d)
+        self.assertIsNot(cloned.words[0].word_sound_changes[0], self.final_st_to_s)
+        self.assertIsNot(branch.words[0].word_sound_changes[0], self.final_st_to_s)
+        self.assertIsNone(branch.words[0].base_stem)
+        self.assertIs(branch.words[0].source_word, self.test)
+        self.assertEqual(self.test.word_sound_changes, [self.final_st_to_s])
+        self.assertEqual(self.test.language_sound_changes, [self.unvoice_d])
+
+    def test_language_37(self):
+        """
+        Test that the words of a Language and their forms share its sound
+        change timeline, so a new stage reaches all of them through it.
+        """
+        self.testspeak.add_word_form(self.plural)
+        form = self.test.word_forms[0]
+        self.assertEqual(form.get_modern_stem_string(), 'tests')
+        self.testspeak.apply_sound_change(self.final_st_to_s)
+        self.assertIsInstance(self.testspeak.sound_changes, SoundChangeTimeline)
+        self.assertIs(self.test.language_sound_changes, self.testspeak.sound_changes)
+        self.assertIs(form.language_sound_changes, self.testspeak.sound_changes)
+        self.assertEqual(self.test.get_modern_stem_string(), 'tes')
+        self.assertEqual(form.get_current_stage(), 1)
+
+    def test_language_38(self):
+        """
+        Test that giving one Word of a Language a language sound change of its
+        own does not add a stage to the Language or its other words.
+        """
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        self.test.get_modern_stem()
+        self.test.add_language_sound_change(self.final_st_to_s)
+        self.assertEqual(self.test.get_modern_stem_string(), 'tes')
+        self.assertEqual(self.testspeak.sound_changes, [self.unvoice_d])
+        self.assertEqual(self.speak.language_sound_changes, [self.unvoice_d])
+        self.assertEqual(self.testspeak.get_current_stage(), 1)
+        self.testspeak.apply_sound_change(SoundChangeRule([self.k], [self.t]))
+        self.assertEqual(self.test.get_current_stage(), 3)
+        self.assertEqual(self.speak.get_modern_stem_string(), 'speat')
+
+    def test_language_39(self):
+        """
+        Test that the full sound inventory is told about words edited in
+        place or moved to a later stage, and only reads those words again.
+        """
+        self.testspeak.add_word(self.word)
+        self.testspeak.get_full_sound_inventory()
+        self.word.base_stem[0].append(self.ch)
+        self.word.invalidate_stem_cache()
+        self.assertEqual(list(self.testspeak._inventory_log._changed.values()), [self.word])
+        self.assertIn(self.ch, self.testspeak.get_full_sound_inventory())
+        self.assertEqual(self.testspeak._inventory_log._changed, {})
+        self.word.original_language_stage = 1
+        self.assertNotIn(self.ch, self.testspeak.get_full_sound_inventory())
+        self.testspeak.apply_sound_change(self.unvoice_d)
+        self.assertIn(self.ch, self.testspeak.get_full_sound_inventory())
+
+    def test_language_40(self):
+        """
+        Test that editing a Sound in place after a Word was rendered
+        evolves and renders the Word again with the edited Sound.
+        """
+        a = Sound('a', 'a', 'V')
+        b = Sound('b', 'b', 'C')
+        c = Sound('c', 'c', 'C')
+        language = Language('Edited', [a, b, c], 'CV')
+        word = Word([[b, a]])
+        language.add_word(word)
+        language.apply_sound_change(SoundChangeRule(b, c, condition='_V'))
+        self.assertEqual(word.get_stem_string_at_stage(0), 'ca')
+        self.assertEqual(str(word), 'ca')
+        b.orthographic_transcription = 'B'
+        a.phonotactics_categories = 'C'
+        self.assertEqual(word.get_stem_string_at_stage(0), 'Ba')
+        self.assertEqual(str(word), 'Ba')
+
+
+# noinspection SpellCheckingInspection
+class TestSoundChangeRule(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.b_to_c = SoundChangeRule(self.b, self.c, condition='V_')
+
+    def test_sound_change_rule_1(self):
+        """
+        Test that compiling a rule twice returns the same cached matcher.
+        """
+        self.assertIs(self.b_to_c.compile(), self.b_to_c.compile())
+
+    def test_sound_change_rule_2(self):
+        """
+        Test that a compiled rule gives the same result as change_sounds
+        called with the rule's sounds and condition.
+
+        'bab' to 'bac' via 'b > c / V_'
+        """
+        sequence = [[self.b, self.a], [self.b]]
+        self.assertEqual(self.b_to_c.compile().apply(sequence),
+                         change_sounds(sequence, [self.b], [self.c], 'V_'))
+        self.assertEqual(self.b_to_c.compile().apply(sequence), [[self.b, self.a], [self.c]])
+
+    def test_sound_change_rule_3(self):
+        """
+        Test that editing the condition of a rule discards its compiled
+        matcher so that the new condition is used.
+        """
+        sequence = [[self.b, self.a], [self.b]]
+        compiled = self.b_to_c.compile()
+        self.b_to_c.condition = '#_'
+        self.assertIsNot(compiled, self.b_to_c.compile())
+        self.assertEqual(self.b_to_c.compile().apply(sequence), [[self.c, self.a], [self.b]])
+
+    def test_sound_change_rule_4(self):
+        """
+        Test that mapping the sounds of a rule discards its compiled matcher
+        so that the mapped sounds are used.
+        """
+        d = Sound('d', 'd', 'C')
+        compiled = self.b_to_c.compile()
+        self.b_to_c.map_sounds({self.c: d})
+        self.assertIsNot(compiled, self.b_to_c.compile())
+        self.assertEqual(self.b_to_c.compile().apply([[self.a, self.b]]), [[self.a, d]])
+
+    def test_sound_change_rule_5(self):
+        """
+        Test that editing a Sound in place discards compiled matchers, so
+        that a rule matches on the Sound's new orthography and categories.
+
+        'ab' to 'ac' via 'b > c / V_' after 'b' is renamed 'B'
+        """
+        self.assertEqual(self.b_to_c.compile().apply([[self.a, self.b]]), [[self.a, self.c]])
+        self.b.orthographic_transcription = 'B'
+        self.assertEqual(self.b_to_c.compile().apply([[self.a, self.b]]), [[self.a, self.c]])
+        self.a.phonotactics_categories = 'C'
+        self.assertEqual(self.b_to_c.compile().apply([[self.a, self.b]]), [[self.a, self.b]])
+
+
+# noinspection SpellCheckingInspection
+class TestFlatStem(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.table = SoundTable()
+        self.sequence = [[self.b, self.a], [self.c, self.a, self.b]]
+
+    def test_flat_stem_1(self):
+        """
+        Test that converting a sequence to a Flat Stem and back gives the
+        original sequence.
+        """
+        flat_stem = FlatStem.from_sequence(self.sequence, self.table)
+        self.assertEqual(len(flat_stem), 5)
+        self.assertEqual(list(flat_stem.syllable_starts), [0, 2])
+        self.assertEqual(flat_stem.to_sequence(self.table), self.sequence)
+
+    def test_flat_stem_2(self):
+        """
+        Test that equal sounds share one id and that positions outside the
+        stem read as the word boundary.
+        """
+        flat_stem = FlatStem.from_sequence(self.sequence, self.table)
+        self.assertEqual(flat_stem.sound_ids[0], flat_stem.sound_ids[4])
+        self.assertEqual(flat_stem.sound_id_at(-1), SoundTable.BOUNDARY_ID)
+        self.assertEqual(flat_stem.sound_id_at(5), SoundTable.BOUNDARY_ID)
+        self.assertEqual(flat_stem.syllable_of(3), 1)
+
+    def test_flat_stem_3(self):
+        """
+        Test that a conditioned sound change on a Flat Stem gives the same
+        result as on the nested sequence.
+
+        'ba.kab' to 'ba.kac' via 'b > c / V_'
+        """
+        rule = SoundChangeRule(self.b, self.c, condition='V_')
+        flat_stem = FlatStem.from_sequence(self.sequence, self.table)
+        new_stem = change_sounds_flat(flat_stem, rule.compile(), self.table)
+        self.assertEqual(new_stem.to_sequence(self.table), rule.compile().apply(self.sequence))
+        self.assertEqual(new_stem.to_sequence(self.table), [[self.b, self.a], [self.c, self.a, self.c]])
+
+    def test_flat_stem_4(self):
+        """
+        Test that a suffix added to a Flat Stem goes at the end of its last
+        syllable.
+
+        'ba.kab' to 'ba.kabab' via 'Ø > ab / _#'
+        """
+        rule = SoundChangeRule(None, [self.a, self.b], condition='_#')
+        flat_stem = FlatStem.from_sequence(self.sequence, self.table)
+        new_stem = change_sounds_flat(flat_stem, rule.compile(), self.table)
+        self.assertEqual(new_stem.to_sequence(self.table), [[self.b, self.a], [self.c, self.a, self.b, self.a, self.b]])
+
+
+# noinspection SpellCheckingInspection
+class TestEvolution(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.sequence = [[self.b, self.a], [self.b]]
+        evolution.reset_prefilter_statistics()
+
+    def test_evolution_1(self):
+        """
+        Test that a sound change whose sounds do not appear in a sequence is
+        skipped and counted, and that the sequence is unchanged.
+        """
+        rule = SoundChangeRule(self.c, self.a)
+        self.assertFalse(evolution.can_match(rule.compile(), evolution.get_sequence_features(self.sequence)))
+        self.assertEqual(evolution.evolve_sequence(self.sequence, [rule]), [[self.b, self.a], [self.b]])
+        self.assertEqual(evolution.prefilter_statistics['skipped'], 1)
+        self.assertEqual(evolution.prefilter_statistics['applied'], 0)
+
+    def test_evolution_2(self):
+        """
+        Test that a sound change made possible by an earlier sound change in
+        the same list is not skipped.
+
+        'ba.b' to 'ka.k' to 'ba.b' via 'b > c', 'c > b'
+        """
+        rules = [SoundChangeRule(self.b, self.c), SoundChangeRule(self.c, self.b)]
+        self.assertEqual(evolution.evolve_sequence(self.sequence, rules), [[self.b, self.a], [self.b]])
+        self.assertEqual(evolution.prefilter_statistics['applied'], 2)
+
+    def test_evolution_3(self):
+        """
+        Test that an insertion is never skipped and that a category needs a
+        Sound in that category to be present.
+
+        'ba.b' to 'ba.ba' via 'Ø > a / _#'
+        """
+        insertion = SoundChangeRule(None, self.a, condition='_#')
+        category_change = SoundChangeRule('F', self.a)
+        self.assertEqual(evolution.evolve_sequence(self.sequence, [category_change, insertion]),
+                         [[self.b, self.a], [self.b, self.a]])
+        self.assertEqual(evolution.prefilter_statistics['skipped'], 1)
+        self.assertEqual(evolution.prefilter_statistics['applied'], 1)
+
+    def test_evolution_4(self):
+        """
+        Test that a Word's modern stem is a new list even when every sound
+        change was skipped.
+        """
+        word = Word(self.sequence)
+        word.language_sound_changes = [SoundChangeRule(self.c, self.a, stage=0)]
+        word.original_language_stage = 0
+        modern_stem = word.get_modern_stem()
+        self.assertEqual(modern_stem, self.sequence)
+        self.assertIsNot(modern_stem, word.get_base_stem())
+        self.assertIsNot(modern_stem[0], word.get_base_stem()[0])
+
+
+# noinspection SpellCheckingInspection
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.stems = [[[self.b, self.a], [self.b]], [[self.a, self.b, self.a]], [[self.c, self.a, self.b, self.b]]]
+
+    @unittest.skipIf(batch.np is None, 'numpy is not installed')
+    def test_batch_1(self):
+        """
+        Test that a conditioned sound change applied to several stems at once
+        gives the same stems as change_sounds.
+
+        'ba.b', 'aba', 'kabb' to 'ba.c', 'aca', 'kacb' via 'b > c / V_'
+        """
+        rule = SoundChangeRule(self.b, self.c, condition='V_')
+        self.assertTrue(batch.can_batch(rule.compile()))
+        expected = [change_sounds(stem, self.b, self.c, condition='V_') for stem in self.stems]
+        self.assertEqual(batch.apply_sound_change_to_stems(self.stems, rule), expected)
+        self.assertEqual(expected, [[[self.b, self.a], [self.c]], [[self.a, self.c, self.a]],
+                                    [[self.c, self.a, self.c, self.b]]])
+
+    @unittest.skipIf(batch.np is None, 'numpy is not installed')
+    def test_batch_2(self):
+        """
+        Test that a failed partial match is not retried from its second Sound
+        when stems are converted in a batch.
+
+        'abab' to 'abab' and 'aab' to 'ac' via 'ab > c' skipping 'aab'
+        """
+        rule = SoundChangeRule([self.a, self.b], self.c)
+        stems = [[[self.a, self.a, self.b]], [[self.b, self.a, self.b]]]
+        expected = [change_sounds(stem, [self.a, self.b], self.c) for stem in stems]
+        self.assertEqual(batch.apply_sound_change_to_stems(stems, rule), expected)
+        self.assertEqual(expected, [[[self.a, self.a, self.b]], [[self.b, self.c]]])
+
+    def test_batch_3(self):
+        """
+        Test that an insertion falls back to converting stems one at a time
+        and still matches change_sounds.
+
+        'ba.b' to 'ba.ba' via 'Ø > a / _#'
+        """
+        rule = SoundChangeRule(None, self.a, condition='_#')
+        self.assertFalse(batch.can_batch(rule.compile()))
+        self.assertEqual(batch.apply_sound_change_to_stems(self.stems[:1], rule),
+                         [[[self.b, self.a], [self.b, self.a]]])
+
+    def test_batch_4(self):
+        """
+        Test that each stem evolved together keeps its own order of sound
+        changes.
+
+        'ba.b' to 'ka.k' to 'ba.b' and 'aba' to 'aka' via different orders
+        """
+        b_to_c = SoundChangeRule(self.b, self.c)
+        c_to_b = SoundChangeRule(self.c, self.b)
+        new_stems = batch.evolve_stems(self.stems[:2], [[b_to_c, c_to_b], [c_to_b, b_to_c]])
+        self.assertEqual(new_stems, [[[self.b, self.a], [self.b]], [[self.a, self.c, self.a]]])
+
+    def test_batch_5(self):
+        """
+        Test that the stems of every word in a Language at a stage match the
+        stems of each Word.
+        """
+        language = Language('', [self.a, self.b, self.c], '')
+        for stem in self.stems:
+            language.add_word(Word(stem))
+        language.apply_sound_change(SoundChangeRule(self.b, self.c, condition='V_'))
+        language.apply_sound_change(SoundChangeRule([self.a, self.c], self.b))
+        language.words[0].add_word_sound_change(SoundChangeRule(self.a, self.c, stage=1))
+        self.assertEqual(language.get_word_stems_at_stage(), [word.get_modern_stem() for word in language.words])
+        self.assertEqual(language.get_word_stems_at_stage(1), [word.get_stem_at_stage(1) for word in language.words])
+        self.assertEqual(language.get_word_stem_strings_at_stage(0), ['bac', 'aca', 'cacb'])
+
+
+# noinspection SpellCheckingInspection
+class TestTransducer(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.e = Sound('e', 'e', 'V')
+        self.sequence = [[self.b, self.a], [self.c, self.a, self.b]]
+
+    def test_transducer_1(self):
+        """
+        Test that unconditioned single sound changes are fused into one pass
+        and give the same result as applying them one by one.
+
+        'ba.kab' to 'k.kb' via 'b > c', 'a > ea', 'V > Ø', 'c > b / _#'
+        """
+        rules = [SoundChangeRule(self.b, self.c), SoundChangeRule(self.a, [self.e, self.a]), SoundChangeRule('V', None),
+                 SoundChangeRule(self.c, self.b, condition='_#')]
+        transducer = SoundChangeTransducer(rules)
+        self.assertEqual(transducer.fused_rules, rules[:3])
+        self.assertEqual(transducer.unfused_rules, rules[3:])
+        self.assertEqual(transducer.get_pass_count(), 2)
+        expected = self.sequence
+        for rule in rules:
+            expected = change_sounds(expected, rule.old_sounds, rule.new_sounds, rule.condition, rule.condition_sounds)
+        self.assertEqual(transducer.apply(self.sequence), expected)
+        self.assertEqual(expected, [[self.c], [self.c, self.b]])
+
+    def test_transducer_2(self):
+        """
+        Test that a conditioned sound change splits a fused run and is
+        applied in order between the two halves.
+
+        'ba.kab' to 'ca.kac' to 'ba.bab' via 'b > c', 'c > b / #_', 'c > b'
+        """
+        rules = [SoundChangeRule(self.b, self.c), SoundChangeRule(self.c, self.b, condition='#_'),
+                 SoundChangeRule(self.c, self.b)]
+        transducer = SoundChangeTransducer(rules)
+        self.assertEqual(transducer.get_pass_count(), 3)
+        self.assertEqual(transducer.apply(self.sequence), [[self.b, self.a], [self.b, self.a, self.b]])
+
+    def test_transducer_3(self):
+        """
+        Test that a Language reuses its transducer until one of its sound
+        changes is edited.
+        """
+        language = Language('', [self.a, self.b, self.c], '')
+        language.add_word(Word(self.sequence))
+        language.apply_sound_change(SoundChangeRule(self.b, self.c))
+        language.apply_sound_change(SoundChangeRule(self.a, self.e))
+        transducer = language.get_sound_change_transducer()
+        self.assertIs(language.get_sound_change_transducer(), transducer)
+        self.assertEqual(transducer.apply(self.sequence), language.words[0].get_modern_stem())
+        language.sound_changes[1].new_sounds = [self.b]
+        self.assertFalse(transducer.is_current())
+        self.assertEqual(language.get_sound_change_transducer().apply(self.sequence),
+                         [[self.c, self.b], [self.c, self.b, self.c]])
+        self.assertEqual(language.get_sound_change_transducer(1).apply(self.sequence),
+                         [[self.b, self.b], [self.c, self.b, self.b]])
+
+    def test_transducer_4(self):
+        """
+        Test that words evolved with the transducer backend use the
+        transducers of their Language, split around word sound changes.
+        """
+        language = Language('', [self.a, self.b, self.c], '')
+        language.add_words([Word(self.sequence), Word([[self.a, self.b]])])
+        language.apply_sound_change(SoundChangeRule(self.b, self.c))
+        language.apply_sound_change(SoundChangeRule(self.a, self.e))
+        language.apply_sound_change(SoundChangeRule(self.c, self.b, condition='_#'))
+        language.words[1].add_word_sound_change(SoundChangeRule(self.e, self.a, stage=2))
+        for word in language.words:
+            self.assertEqual(word.get_modern_stem(backend='transducer'), word.get_modern_stem())
+        self.assertEqual(set(language.sound_changes._transducers), {(0, 3), (0, 2), (2, 3)})
+        transducer = language.sound_changes._transducers[(0, 3)]
+        self.assertIs(language.get_sound_change_transducer(), transducer)
+        self.assertEqual(transducer.apply(self.sequence), language.words[0].get_modern_stem())
+
+    def test_transducer_5(self):
+        """
+        Test that a timeline only keeps its most recently used transducers.
+        """
+        timeline = SoundChangeTimeline([SoundChangeRule(self.b, self.c), SoundChangeRule(self.a, self.e)])
+        sound_change_timeline.max_transducers = 2
+        self.addCleanup(setattr, sound_change_timeline, 'max_transducers', 64)
+        transducer = timeline.get_transducer(0, 2)
+        timeline.get_transducer(0, 1)
+        self.assertIs(timeline.get_transducer(0, 2), transducer)
+        timeline.get_transducer(1, 2)
+        self.assertEqual(list(timeline._transducers), [(0, 2), (1, 2)])
+
+
+# noinspection SpellCheckingInspection
+class TestMultiPattern(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.s = Sound('s', 's', 'C')
+        self.sequence = [[self.b, self.a], [self.c, self.a, self.b]]
+
+    def test_multi_pattern_1(self):
+        """
+        Test that suffix and prefix rules are recognized as anchored
+        insertions and give the same result as change_sounds.
+
+        'ba.kab' to 'ba.kabas' via 'Ø > as / C_#' and 'ba.kab' to 'sba.kab'
+        via 'Ø > s / #_C'
+        """
+        suffix = SoundChangeRule(None, [self.a, self.s], condition='C_#')
+        prefix = SoundChangeRule(None, self.s, condition='#_C')
+        unanchored = SoundChangeRule(None, self.s, condition='V_')
+        self.assertEqual(get_insertion_anchor(suffix.compile()), (True, 1))
+        self.assertEqual(get_insertion_anchor(prefix.compile()), (False, -1))
+        self.assertIsNone(get_insertion_anchor(unanchored.compile()))
+        for rule in [suffix, prefix, unanchored]:
+            self.assertEqual(apply_anchored_insertion(rule.compile(), self.sequence),
+                             change_sounds(self.sequence, rule.old_sounds, rule.new_sounds, rule.condition))
+        self.assertEqual(apply_anchored_insertion(suffix.compile(), self.sequence),
+                         [[self.b, self.a], [self.c, self.a, self.b, self.a, self.s]])
+
+    def test_multi_pattern_2(self):
+        """
+        Test that sound changes that cannot see each other's sounds share
+        one scan and give the same result as applying them in order.
+
+        'ba.kab' to 'sa.sas' via 'b > s', 'k > s'
+        """
+        rules = [SoundChangeRule(self.b, self.s), SoundChangeRule(self.c, self.s)]
+        matcher = MultiPatternMatcher(rules)
+        self.assertEqual(matcher.get_scan_count(), 1)
+        self.assertEqual(matcher.apply(self.sequence), [[self.s, self.a], [self.s, self.a, self.s]])
+
+    def test_multi_pattern_3(self):
+        """
+        Test that a sound change that can match the output of an earlier one
+        gets its own scan so that ordering is preserved.
+
+        'ba.kab' to 'ka.kak' to 'sa.sas' via 'b > k', 'k > s'
+        """
+        rules = [SoundChangeRule(self.b, self.c), SoundChangeRule(self.c, self.s)]
+        matcher = MultiPatternMatcher(rules)
+        self.assertEqual(matcher.get_scan_count(), 2)
+        self.assertEqual(matcher.apply(self.sequence), [[self.s, self.a], [self.s, self.a, self.s]])
+
+    def test_multi_pattern_4(self):
+        """
+        Test that a Word Form Rule transforms a sequence with its matcher
+        and rebuilds the matcher when a rule is added.
+
+        'ba.kab' to 'ba.kabas' to 'sba.kabas'
+        """
+        form = WordFormRule('Test')
+        form.add_suffix_rule([self.a, self.s], 'C')
+        self.assertEqual(form.transform_sequence(self.sequence),
+                         [[self.b, self.a], [self.c, self.a, self.b, self.a, self.s]])
+        matcher = form.get_matcher()
+        self.assertIs(form.get_matcher(), matcher)
+        form.add_prefix_rule(self.s)
+        self.assertIsNot(form.get_matcher(), matcher)
+        self.assertEqual(form.get_matcher().get_scan_count(), 0)
+        self.assertEqual(form.transform_sequence(self.sequence),
+                         [[self.s, self.b, self.a], [self.c, self.a, self.b, self.a, self.s]])
+
+    def test_multi_pattern_5(self):
+        """
+        Test that forms created from a Word Form Rule apply their
+        conjugation rules with its matcher until one of them is edited.
+
+        'ba.kab' to 'ba.kabas' to 'sa.sasas' and 'ka' to 'sa' via 'Ø > as /
+        C_#', 'b > s', 'k > s', then 'ka' to 'ba' once 'k > s' becomes 'k > b'
+        """
+        form = WordFormRule('Test', 'N')
+        form.add_suffix_rule([self.a, self.s], 'C')
+        form.add_custom_rule(SoundChangeRule(self.b, self.s))
+        form.add_custom_rule(SoundChangeRule(self.c, self.s))
+        language = Language('', [self.a, self.b, self.c, self.s], '')
+        language.add_words([Word(self.sequence, 'N'), Word([[self.c, self.a]], 'N')])
+        language.add_word_form(form)
+        language.apply_sound_change(SoundChangeRule(self.a, self.c, condition='#_'))
+        form_words = [word.word_forms[0] for word in language.words]
+        for form_word in form_words:
+            self.assertIn(form.get_matcher(), form_word._group_form_rules(form_word.all_sound_changes()))
+        self.assertEqual(Word.get_modern_stems(form_words),
+                         [[[self.s, self.a], [self.s, self.a, self.s, self.a, self.s]], [[self.s, self.a]]])
+        self.assertEqual(form_words[0].get_modern_stem(), [[self.s, self.a], [self.s, self.a, self.s, self.a, self.s]])
+        form_words[1].word_sound_changes[2].new_sounds = [self.b]
+        self.assertNotIn(form.get_matcher(), form_words[1]._group_form_rules(form_words[1].all_sound_changes()))
+        self.assertEqual(form_words[1].get_modern_stem(), [[self.b, self.a]])
+
+
+# noinspection SpellCheckingInspection
+class TestRegexBackend(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.sequence = [[self.b, self.a], [self.c, self.a, self.b]]
+
+    def test_regex_backend_1(self):
+        """
+        Test that a sound change with a negated condition gives the same
+        result through a regular expression as through change_sounds.
+
+        'ba.kab' to 'ba.kac' via 'b > c / !#_'
+        """
+        rule = SoundChangeRule(self.b, self.c, condition='!#_')
+        self.assertEqual(regex_backend.apply_sound_change(rule, self.sequence),
+                         change_sounds(self.sequence, self.b, self.c, condition='!#_'))
+        self.assertEqual(regex_backend.apply_sound_change(rule, self.sequence),
+                         [[self.b, self.a], [self.c, self.a, self.c]])
+
+    def test_regex_backend_2(self):
+        """
+        Test that a sound change spanning a syllable boundary puts its
+        replacement in the syllable of the last Sound it replaces, and that
+        a failed partial match is not retried.
+
+        'ba.kab' to 'b.cab' via 'ak > c' and 'aab' to 'aab' via 'ab > c / #_'
+        """
+        rule = SoundChangeRule([self.a, self.c], self.c)
+        self.assertEqual(regex_backend.apply_sound_change(rule, self.sequence), [[self.b], [self.c, self.a, self.b]])
+        rule = SoundChangeRule([self.a, self.b], self.c, condition='#_')
+        self.assertEqual(regex_backend.apply_sound_change(rule, [[self.a, self.a, self.b]]), [[self.a, self.a, self.b]])
+
+    def test_regex_backend_3(self):
+        """
+        Test that the pattern for a rule is cached, kept when the new sounds
+        encoded do not fit any of its character classes, and rebuilt once
+        one does.
+        """
+        rule = SoundChangeRule('C', self.a)
+        encoder = regex_backend.RegexEncoder()
+        encoder.encode_sequence(self.sequence)
+        pattern = encoder.get_pattern(rule.compile())
+        self.assertIs(encoder.get_pattern(rule.compile()), pattern)
+        encoder.encode_sequence([[Sound('regex_backend_3', '', 'V')]])
+        self.assertIs(encoder.get_pattern(rule.compile()), pattern)
+        encoder.encode_sequence([[Sound('regex_backend_3', '', 'C')]])
+        self.assertIsNot(encoder.get_pattern(rule.compile()), pattern)
+        self.assertEqual(len(regex_backend.RegexEncoder().table), 1)
+
+    def test_regex_backend_4(self):
+        """
+        Test that every evolution backend gives a Word the same modern stem.
+        """
+        word = Word(self.sequence)
+        word.original_language_stage = 0
+        word.language_sound_changes = [SoundChangeRule(self.b, self.c, condition='V_', stage=0),
+                                       SoundChangeRule(self.a, None, condition='_#', stage=1),
+                                       SoundChangeRule(None, self.a, condition='C_#', stage=2),
+                                       SoundChangeRule('C', self.b, stage=3)]
+        expected = word.get_modern_stem()
+        expected_at_stage = word.get_stem_at_stage(1)
+        for backend in evolution.BACKENDS:
+            word.invalidate_stem_cache()
+            self.assertEqual(word.get_modern_stem(backend=backend), expected)
+            self.assertEqual(word.get_stem_at_stage(1, backend=backend), expected_at_stage)
+
+    def test_regex_backend_5(self):
+        """
+        Test that words of a Language are encoded with the Regex Encoder of
+        its sound change timeline, which only holds the sounds of that
+        Language.
+        """
+        language = Language('', [self.a, self.b, self.c], '')
+        language.add_word(Word(self.sequence))
+        language.apply_sound_change(SoundChangeRule(self.b, self.c, condition='V_'))
+        other = Language('', [Sound('o', 'o', 'V')], '')
+        other.add_word(Word([[other.original_phonetic_inventory[0]]]))
+        other.apply_sound_change(SoundChangeRule('V', self.a))
+        self.assertEqual(language.words[0].get_modern_stem(backend='regex'),
+                         [[self.b, self.a], [self.c, self.a, self.c]])
+        self.assertEqual(other.words[0].get_modern_stem(backend='regex'), [[self.a]])
+        self.assertEqual(language.sound_changes.get_regex_encoder().table.sounds[1:], [self.b, self.a, self.c])
+        self.assertEqual(other.sound_changes.get_regex_encoder().table.sounds[1:], other.original_phonetic_inventory)
+
+
+# noinspection SpellCheckingInspection
+class TestPhonotactics(unittest.TestCase):
+    def test_phonotactics_1(self):
+        """
+        Test that optional groups, nested optional groups, and choices are
+        all resolved.
+        """
+        automaton = PhonotacticsAutomaton('(C(N))V{C,N}')
+        self.assertTrue(automaton.fits_categories(['V', 'C']))
+        self.assertTrue(automaton.fits_categories(['C', 'V', 'N']))
+        self.assertTrue(automaton.fits_categories(['C', 'N', 'V', 'C']))
+        self.assertFalse(automaton.fits_categories(['N', 'V', 'C']))
+        self.assertFalse(automaton.fits_categories(['V']))
+
+    def test_phonotactics_2(self):
+        """
+        Test that a Sound with several categories fits any place that
+        allows one of them, and that chances and commas are ignored.
+        """
+        automaton = PhonotacticsAutomaton('C(3V),S')
+        self.assertTrue(automaton.fits_categories(['CS', 'S']))
+        self.assertTrue(automaton.fits_categories(['C', 'VX', 'CS']))
+        self.assertFalse(automaton.fits_categories(['C', 'V', 'V']))
+
+    def test_phonotactics_3(self):
+        """
+        Test that unbalanced phonotactics strings are rejected.
+        """
+        self.assertRaises(AssertionError, PhonotacticsAutomaton, 'C(V')
+        self.assertRaises(AssertionError, PhonotacticsAutomaton, 'CV)')
+        self.assertRaises(AssertionError, PhonotacticsAutomaton, 'C{V')
+
+
+# noinspection SpellCheckingInspection
+class TestWordStageView(unittest.TestCase):
+    def setUp(self):
+        self.a = Sound('a', 'a', 'V')
+        self.b = Sound('b', 'b', 'C')
+        self.c = Sound('c', 'k', 'C')
+        self.language = Language('Viewspeak', [self.a, self.b, self.c], 'CV')
+        self.word = Word([[self.b, self.a], [self.b, self.a]], 'N')
+        self.word.add_definition('Something seen.', 0)
+        self.language.add_word(self.word)
+        self.language.apply_sound_change(SoundChangeRule(self.b, self.c, condition='V_'))
+        self.word.add_definition('Something looked at.', 1)
+        self.language.apply_sound_change(SoundChangeRule(self.a, None, condition='_#'))
+
+    def test_word_stage_view_1(self):
+        """
+        Test that a view reads the same as a copy of the Word at its stage.
+        """
+        for stage in range(self.language.get_current_stage() + 1):
+            view = self.language.get_word_views_at_stage(stage)[0]
+            word_copy = self.language.copy_words_at_stage(stage)[0]
+            self.assertEqual(view.get_modern_stem(), word_copy.get_modern_stem())
+            self.assertEqual(view.get_current_stage(), word_copy.get_current_stage())
+            self.assertEqual(dict(view.definitions), dict(word_copy.definitions))
+            self.assertEqual(view.get_definition_at_stage(2), word_copy.get_definition_at_stage(2))
+            self.assertEqual(list(view.iter_stem_history_strings()), list(word_copy.iter_stem_history_strings()))
+        self.assertEqual(str(WordStageView(self.word, 0)), 'baca')
+
+    def test_word_stage_view_2(self):
+        """
+        Test that a view is only copied once it is modified, and that
+        modifying it leaves the original Word alone.
+        """
+        view = WordStageView(self.word, 0)
+        self.assertEqual(view.categories, 'N')
+        self.assertFalse(view.is_materialized())
+        view.add_definition('Something changed.', 0)
+        self.assertTrue(view.is_materialized())
+        self.assertEqual(view.get_definition_at_stage(0), 'Something changed.')
+        self.assertEqual(self.word.get_definition_at_stage(0), 'Something seen.')
+        view.categories = 'V'
+        self.assertEqual(view.categories, 'V')
+        self.assertEqual(self.word.categories, 'N')
+        self.assertIsNot(view.materialize(), self.word)
+
+    def test_word_stage_view_3(self):
+        """
+        Test that a view only includes the forms that existed at its stage,
+        and that adding a form to a Language does not copy its words.
+        """
+        plural = WordFormRule('Plural', 'N')
+        plural.add_suffix_rule(self.b)
+        forms = self.language.add_word_form(plural)
+        self.assertIs(forms[0].stem_word, self.word)
+        self.assertEqual(WordStageView(self.word, 0).word_forms, [])
+        view = WordStageView(self.word, self.language.get_current_stage())
+        self.assertEqual([form.word for form in view.word_forms], forms)
+        self.assertEqual(view.get_all_forms_and_names()[1], ['Stem', 'Plural'])
+        self.assertEqual(view.get_form('Plural'), self.word.get_form('Plural'))
+
 
 if __name__ == '__main__':
     unittest.main()